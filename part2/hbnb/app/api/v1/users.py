@@ -73,9 +73,10 @@ class UserResource(Resource):
             return {'error': 'Invalid last_name'}, 400
         if 'email' in data and (not data['email'] or '@' not in data['email']):
             return {'error': 'Invalid email'}, 400
-        user.first_name = data.get('first_name', user.first_name)
-        user.last_name = data.get('last_name', user.last_name)
-        user.email = data.get('email', user.email)
+        try:
+            user = facade.update_user(user_id, data)
+        except ValueError as e:
+            return {'error': str(e)}, 400
         return {
             'id': user.id,
             'first_name': user.first_name,
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
 
 
 class Repository(ABC):
@@ -26,13 +27,106 @@ class Repository(ABC):
     def get_by_attribute(self, attr_name, attr_value):
         pass
 
+    @abstractmethod
+    def find_all_by_attribute(self, attr_name, attr_value):
+        pass
+
+
+# Copie de part4/hbnb/app/persistence/repository.py : part2 reste un projet autonome,
+# part4/hbnb/tests/test_indexes.py vérifie que les deux classes restent identiques
+class AttributeIndex:
+    """Secondary index on one attribute of the objects of an InMemoryRepository.
+
+    Values are hashed to the set of ids holding them. unique=True refuses a
+    second object with the same value, ordered=True also keeps the distinct
+    values sorted for range queries and key normalizes values (e.g. str.lower).
+    """
+    def __init__(self, attr_name, unique=False, ordered=False, key=None):
+        self.attr_name = attr_name
+        self.unique = unique
+        self.ordered = ordered
+        self.key = key
+        self._ids = {}
+        self._value_of = {}
+        self._sorted = []
+
+    def normalize(self, value):
+        if self.key is not None and value is not None:
+            return self.key(value)
+        return value
+
+    def check(self, obj_id, value):
+        """Raise ValueError if obj_id cannot take value in a unique index."""
+        value = self.normalize(value)
+        if not self.unique or value is None:
+            return
+        ids = self._ids.get(value)
+        if ids and ids != {obj_id}:
+            raise ValueError("{} '{}' already exists".format(self.attr_name, value))
+
+    def add(self, obj_id, value):
+        self.remove(obj_id)
+        value = self.normalize(value)
+        ids = self._ids.get(value)
+        if ids is None:
+            ids = self._ids[value] = set()
+            if self.ordered and value is not None:
+                insort(self._sorted, value)
+        ids.add(obj_id)
+        self._value_of[obj_id] = value
+
+    def remove(self, obj_id):
+        # Use the value recorded at indexing time: the object may have changed since
+        if obj_id not in self._value_of:
+            return
+        value = self._value_of.pop(obj_id)
+        ids = self._ids[value]
+        ids.discard(obj_id)
+        if not ids:
+            del self._ids[value]
+            if self.ordered and value is not None:
+                del self._sorted[bisect_left(self._sorted, value)]
+
+    def find(self, value):
+        return self._ids.get(self.normalize(value), ())
+
+    def find_range(self, low=None, high=None):
+        """Ids whose value is between low and high (inclusive), in value order."""
+        if not self.ordered:
+            raise ValueError("Index on '{}' is not ordered".format(self.attr_name))
+        start = 0 if low is None else bisect_left(self._sorted, self.normalize(low))
+        end = len(self._sorted) if high is None else bisect_right(self._sorted, self.normalize(high))
+        for value in self._sorted[start:end]:
+            yield from self._ids[value]
+
 
 class InMemoryRepository(Repository):
-    def __init__(self):
+    def __init__(self, indexes=None):
+        """indexes maps an attribute name to AttributeIndex options,
+        e.g. {'email': {'unique': True}, 'price': {'ordered': True}}."""
         self._storage = {}
+        self._indexes = {}
+        for attr_name, options in (indexes or {}).items():
+            self.add_index(attr_name, **options)
+
+    def add_index(self, attr_name, unique=False, ordered=False, key=None):
+        """Declare a secondary index, built from the objects already stored."""
+        index = AttributeIndex(attr_name, unique, ordered, key)
+        for obj in self._storage.values():
+            index.check(obj.id, getattr(obj, attr_name, None))
+            index.add(obj.id, getattr(obj, attr_name, None))
+        self._indexes[attr_name] = index
+        return index
+
+    def _reindex(self, obj):
+        for attr_name, index in self._indexes.items():
+            index.add(obj.id, getattr(obj, attr_name, None))
 
     def add(self, obj):
+        for attr_name, index in self._indexes.items():
+            index.check(obj.id, getattr(obj, attr_name, None))
         self._storage[obj.id] = obj
+        self._reindex(obj)
 
     def get(self, obj_id):
         return self._storage.get(obj_id)
@@ -40,9 +134,18 @@ class InMemoryRepository(Repository):
     def get_all(self):
         return list(self._storage.values())
 
+    def _check_update(self, obj, data):
+        for attr_name, index in self._indexes.items():
+            if isinstance(data, dict):
+                value = data.get(attr_name, getattr(obj, attr_name, None))
+            else:
+                value = getattr(data, attr_name, getattr(obj, attr_name, None))
+            index.check(obj.id, value)
+
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
+            self._check_update(obj, data)
             # If data is a dict, use BaseModel.update path
             if isinstance(data, dict):
                 obj.update(data)
@@ -54,10 +157,29 @@ class InMemoryRepository(Repository):
                 # ensure updated_at is updated
                 if hasattr(obj, "save"):
                     obj.save()
+            self._reindex(obj)
 
     def delete(self, obj_id):
         if obj_id in self._storage:
             del self._storage[obj_id]
+            for index in self._indexes.values():
+                index.remove(obj_id)
 
     def get_by_attribute(self, attr_name, attr_value):
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            return next((self._storage[i] for i in index.find(attr_value)), None)
         return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
+
+    def find_all_by_attribute(self, attr_name, attr_value):
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            return [self._storage[i] for i in index.find(attr_value)]
+        return [obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value]
+
+    def find_by_range(self, attr_name, low=None, high=None):
+        """Objects whose attribute is between low and high, needs an ordered index."""
+        index = self._indexes.get(attr_name)
+        if index is None:
+            raise ValueError("No index on '{}'".format(attr_name))
+        return [self._storage[i] for i in index.find_range(low, high)]
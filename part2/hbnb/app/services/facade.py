@@ -6,9 +6,9 @@ from app.models.review import Review
 
 
 class HBnBFacade:
-    user_repo = InMemoryRepository()
+    user_repo = InMemoryRepository(indexes={'email': {'unique': True}})
     place_repo = InMemoryRepository()
-    review_repo = InMemoryRepository()
+    review_repo = InMemoryRepository(indexes={'place_id': {}})
     amenity_repo = InMemoryRepository()
 
     def __init__(self):
@@ -52,9 +52,9 @@ class HBnBFacade:
         if not place:
             raise ValueError("Place not found")
 
-        for key, value in place_data.items():
-            if hasattr(place, key):
-                setattr(place, key, value)
+        # via le repository : vérification et mise à jour des index
+        changes = {k: v for k, v in place_data.items() if k != 'id'}
+        self.place_repo.update(place_id, changes)
         return place
 
     """user facade"""
@@ -73,6 +73,19 @@ class HBnBFacade:
     def get_all_users(self):
         return self.user_repo.get_all()
 
+    def update_user(self, user_id, user_data):
+        """Raise ValueError when the new email is already taken (unique index)."""
+        user = self.user_repo.get(user_id)
+        if not user:
+            return None
+        changes = {k: user_data[k] for k in ('first_name', 'last_name', 'email') if k in user_data}
+        old_email = user.email
+        self.user_repo.update(user_id, changes)
+        if user.email != old_email:
+            User._emails.discard(old_email)
+            User._emails.add(user.email)
+        return user
+
     """Amenity facade """
 
     def create_amenity(self, amenity_data):
@@ -90,10 +103,8 @@ class HBnBFacade:
         amenity = self.amenity_repo.get(amenity_id)
         if not amenity:
             return None
-        for key, value in amenity_data.items():
-            setattr(amenity, key, value)
-        # pass a dict to repository.update for consistency
-        self.amenity_repo.update(amenity.id, {'name': amenity.name})
+        changes = {k: v for k, v in amenity_data.items() if k != 'id'}
+        self.amenity_repo.update(amenity.id, changes)
         return amenity
 
     """Review facade"""
@@ -126,24 +137,18 @@ class HBnBFacade:
         return self.review_repo.get_all()
 
     def get_reviews_by_place(self, place_id):
-        all_reviews = self.review_repo.get_all()
-        return [r for r in all_reviews if r.place_id == place_id]
+        return self.review_repo.find_all_by_attribute('place_id', place_id)
 
     def update_review(self, review_id, review_data):
         review = self.review_repo.get(review_id)
         if not review:
             return None
 
-        if 'text' in review_data:
-            review.text = review_data['text']
-        if 'rating' in review_data:
-            rating = review_data['rating']
-            if not (1 <= rating <= 5):
-                raise ValueError("Rating must be between 1 and 5.")
-            review.rating = rating
+        changes = {k: review_data[k] for k in ('text', 'rating') if k in review_data}
+        if 'rating' in changes and not (1 <= changes['rating'] <= 5):
+            raise ValueError("Rating must be between 1 and 5.")
 
-        # pass a dict (not the object) to repository.update to match its contract
-        self.review_repo.update(review_id, {'text': review.text, 'rating': review.rating})
+        self.review_repo.update(review_id, changes)
         return review
 
     def delete_review(self, review_id):
@@ -1,7 +1,13 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
+from app.password_hasher import PasswordHasher
+from app.rate_limit import RateLimiter
+from app.persistence.replicas import RoutingSession
 
-db = SQLAlchemy()
+# Session qui envoie les lectures des repositories aux replicas (READ_REPLICAS)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 bcrypt = Bcrypt()
 jwt = JWTManager()
+password_hasher = PasswordHasher(bcrypt)
+rate_limiter = RateLimiter()
@@ -1,6 +1,15 @@
+import click
 from flask import Flask
 from flask_restx import Api
-from app.Extensions import jwt, bcrypt, db
+from flask_jwt_extended.exceptions import JWTExtendedException, RevokedTokenError
+from jwt import ExpiredSignatureError, PyJWTError
+from app.Extensions import jwt, bcrypt, db, password_hasher, rate_limiter
+from app.identity import token_denylist
+from app.password_hasher import PasswordHasherBusy
+from app.persistence import migrations, sqlite_pragmas, unit_of_work
+from app.persistence.replicas import replica_router
+from app import serializers, server
+from app.services import facade
 from config import DevelopmentConfig
 from flask_cors import CORS
 
@@ -10,12 +19,14 @@ from app.api.v1.users import api as users_ns
 from app.api.v1.amenities import api as amenities_ns
 from app.api.v1.reviews import api as reviews_ns
 from app.api.v1.auth import api as auth_ns
+from app.api.v1.admin import api as admin_ns
 
 # Import explicite des modèles pour que SQLAlchemy connaisse toutes les tables
 from app.models.user import User
 from app.models.place import Place
 from app.models.amenity import Amenity
 from app.models.review import Review
+from app.models.revoked_token import RevokedToken
 
 authorizations = {
     'Bearer': {
@@ -26,27 +37,76 @@ authorizations = {
     }
 }
 
+# Mêmes messages que les réponses par défaut de flask-jwt-extended
+JWT_ERROR_MESSAGES = {
+    ExpiredSignatureError: 'Token has expired',
+    RevokedTokenError: 'Token has been revoked',
+}
+
+
 def create_app(config_class=DevelopmentConfig):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
-    CORS(app, resources={r"/api/*": {"origins": "http://localhost:8000"}}, supports_credentials=True)
+    # ETag / Last-Modified lisibles par le front pour ses requêtes conditionnelles
+    CORS(app, resources={r"/api/*": {"origins": "http://localhost:8000"}}, supports_credentials=True,
+         expose_headers=['ETag', 'Last-Modified'])
 
 
     # Initialisation des extensions
     db.init_app(app)
+    sqlite_pragmas.init_app(app)
+    replica_router.init_app(app)
     bcrypt.init_app(app)
+    password_hasher.init_app(app)
+    rate_limiter.init_app(app)
     jwt.init_app(app)
+    token_denylist.init_app(app)
+    facade.init_app(app)
+    serializers.init_app(app, (User, Place, Amenity, Review))
+
+    # Révocation vérifiée en mémoire, sans requête SQL
+    @jwt.token_in_blocklist_loader
+    def token_revoked(jwt_header, jwt_payload):
+        return token_denylist.is_revoked(jwt_payload['jti'])
+
+    # Unit of work : une seule transaction (et un seul commit) par requête
+    @app.before_request
+    def begin_unit_of_work():
+        unit_of_work.begin()
+
+    @app.after_request
+    def commit_unit_of_work(response):
+        unit_of_work.end(success=response.status_code < 400)
+        return response
+
+    @app.teardown_request
+    def rollback_unit_of_work(exc):
+        # after_request n'est pas appelé si la requête a levé une exception
+        unit_of_work.end(success=False)
 
-    # Initialisation de l'API
+    # Initialisation de l'API (sans Swagger UI ni spec si SWAGGER_ENABLED est faux)
+    swagger = app.config.get('SWAGGER_ENABLED', True)
     api = Api(
-        app,
         version='1.0',
         title='HBnB API',
         description='HBnB Application API',
-        doc='/api/v1/',
+        doc='/api/v1/' if swagger else False,
         authorizations=authorizations,
     )
+    # add_specs n'est lu que par init_app : Api(app, add_specs=False) sert quand même /swagger.json
+    api.init_app(app, add_specs=swagger)
+
+    # flask-restx intercepte les erreurs JWT avant les handlers de flask-jwt-extended :
+    # sans ce handler un jeton absent, expiré ou révoqué donnerait une 500 hors debug
+    @api.errorhandler(JWTExtendedException)
+    @api.errorhandler(PyJWTError)
+    def jwt_error(error):
+        return {'msg': JWT_ERROR_MESSAGES.get(type(error), str(error))}, 401
+
+    @api.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy(error):
+        return {'error': str(error)}, 503, {'Retry-After': '1'}
 
     # Enregistrement des namespaces
     api.add_namespace(users_ns, path='/api/v1/users')
@@ -54,9 +114,50 @@ def create_app(config_class=DevelopmentConfig):
     api.add_namespace(amenities_ns, path='/api/v1/amenities')
     api.add_namespace(reviews_ns, path='/api/v1/reviews')
     api.add_namespace(auth_ns, path='/api/v1/auth')
+    api.add_namespace(admin_ns, path='/api/v1/admin')
+
+    @app.cli.command('migrate')
+    def migrate():
+        """Create the missing tables and apply the pending schema revisions."""
+        applied = migrations.migrate()
+        print("{} revision(s) applied{}".format(len(applied), ': ' + ', '.join(applied) if applied else ''))
+
+    @app.cli.command('rebuild-ratings')
+    def rebuild_ratings():
+        """Recompute review_count / rating_sum / rating_average of every place."""
+        with facade.transaction():
+            count = facade.rebuild_place_ratings()
+        print(f"{count} places updated")
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index():
+        """Rebuild the full-text index of the places."""
+        with facade.transaction():
+            facade.rebuild_place_text_index()
+        print("Search index rebuilt")
+
+    @app.cli.command('purge-revoked-tokens')
+    def purge_revoked_tokens():
+        """Delete the revoked token ids whose token has expired."""
+        with facade.transaction():
+            count = token_denylist.purge_expired()
+        print(f"{count} expired revoked tokens removed")
+
+    @app.cli.command('serve')
+    @click.option('--bind', help='host:port (default: SERVER_BIND)')
+    @click.option('--workers', type=int, help='Worker processes (default: SERVER_WORKERS)')
+    @click.option('--check', is_flag=True, help='Load and warm up the application, then exit')
+    def serve(bind, workers, check):
+        """Run the API under gunicorn, settings of gunicorn.conf.py."""
+        try:
+            server.serve(app, bind, workers, check)
+        except ValueError as e:
+            raise click.UsageError(str(e))
 
-    # Création des tables
-    with app.app_context():
-        db.create_all()  # toutes les tables importées sont créées ici
+    # Création des tables et migrations au démarrage (dev, tests) ;
+    # en production AUTO_MIGRATE est faux et c'est `flask migrate` qui s'en charge
+    if app.config.get('AUTO_MIGRATE', True):
+        with app.app_context():
+            migrations.migrate()
 
     return app
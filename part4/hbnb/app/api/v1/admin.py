@@ -0,0 +1,25 @@
+from flask_restx import Namespace, Resource
+import os
+from app.api.v1.auth import role_required
+from app.Extensions import password_hasher
+from app.services import facade
+
+api = Namespace('admin', description='Operations of the running server')
+
+
+# -----------------------
+# METRICS
+# -----------------------
+@api.route('/metrics')
+class Metrics(Resource):
+    @role_required('admin')
+    @api.doc(security='Bearer')
+    @api.response(200, 'Counters of the process that served the request')
+    @api.response(403, 'Admin privileges required')
+    def get(self):
+        """Admin only - Counters of this worker process (each worker of `flask serve` has its own)"""
+        return {
+            'pid': os.getpid(),
+            'password_hasher': password_hasher.metrics(),
+            'cache': facade.cache_stats(),
+        }, 200
@@ -1,10 +1,20 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request
-from flask_jwt_extended import jwt_required, get_jwt
+from flask_jwt_extended import jwt_required
 from app.services import facade
+from app.identity import current_identity
+from app.api.v1.pagination import page_args, page_response
+from app.api.v1.streaming import stream_requested, stream_response
+from app.api.v1.conditional import check_if_match, conditional_list, conditional_response, entity_validators
+from app.models.amenity import Amenity
+from app.serializers import json_response, serializer_for
 
 api = Namespace('amenities', description='Amenity operations')
 
+AMENITY_SERIALIZER = serializer_for(Amenity)
+# Champs acceptés par ?fields=
+AMENITY_FIELDS = ('id', 'name', 'created_at', 'updated_at')
+
 # -----------------------
 # Swagger Models
 # -----------------------
@@ -17,8 +27,7 @@ amenity_model = api.model('Amenity', {
 # -----------------------
 def admin_required():
     """Abort if the current user is not an admin"""
-    claims = get_jwt()
-    if not claims.get('is_admin', False):
+    if not current_identity().is_admin:
         api.abort(403, "Admin privileges required")
 
 # -----------------------
@@ -26,11 +35,19 @@ def admin_required():
 # -----------------------
 @api.route('/')
 class AmenityList(Resource):
+    @api.doc(params={'limit': 'Page size', 'cursor': 'Next page cursor', 'fields': 'Fields to return',
+                     'stream': '1 to stream the whole list (or Accept: application/x-ndjson)'})
     @api.response(200, 'List of amenities retrieved successfully')
-    def get(self):
+    @api.response(304, 'Not modified')
+    @conditional_list('amenity', lambda: page_args(api, AMENITY_FIELDS))
+    def get(self, args):
         """Public - Retrieve all amenities"""
+        if args:
+            return page_response(api, facade.get_amenities_page, args, AMENITY_SERIALIZER)
+        if stream_requested():
+            return stream_response(facade.iter_amenities(), AMENITY_SERIALIZER)
         amenities = facade.get_all_amenities()
-        return [a.to_dict() for a in amenities], 200
+        return json_response(AMENITY_SERIALIZER.many(amenities))
 
     @api.doc(security='Bearer')  # ✅ Swagger prend en charge le header Authorization
     @jwt_required()
@@ -47,28 +64,51 @@ class AmenityList(Resource):
         if not name:
             api.abort(400, "Missing required field: 'name'")
 
-        # Vérifie si un amenity avec ce nom existe déjà
-        existing = next((a for a in facade.get_all_amenities() if a.name.lower() == name.lower()), None)
-        if existing:
-            api.abort(400, f"Amenity '{name}' already exists")
-
+        # Les doublons (sans tenir compte de la casse) sont refusés par l'index unique
         try:
             amenity = facade.create_amenity({'name': name})
             return amenity.to_dict(), 201
+        except ValueError as e:
+            api.abort(400, str(e))
         except Exception as e:
             api.abort(500, f"Error creating amenity: {str(e)}")
 
 
+amenity_bulk_model = api.model('AmenityBulk', {
+    'create': fields.List(fields.Nested(amenity_model), description='Amenities to create'),
+    'update': fields.List(fields.Raw, description="Amenities with 'id' and new 'name'"),
+    'delete': fields.List(fields.Integer, description='IDs of amenities to delete')
+})
+
+
+@api.route('/bulk')
+class AmenityBulk(Resource):
+    @api.doc(security='Bearer')
+    @jwt_required()
+    @api.expect(amenity_bulk_model)
+    @api.response(200, 'All operations applied')
+    @api.response(400, 'Some rows are invalid, nothing was written')
+    @api.response(403, 'Admin privileges required')
+    def post(self):
+        """Admin only - Create, update and delete amenities in one request"""
+        admin_required()
+        result, errors = facade.bulk_amenities(request.get_json() or {})
+        if errors:
+            return {"errors": errors}, 400
+        return result, 200
+
+
 @api.route('/<string:amenity_id>')
 class AmenityResource(Resource):
     @api.response(200, 'Amenity details retrieved successfully')
+    @api.response(304, 'Not modified')
     @api.response(404, 'Amenity not found')
     def get(self, amenity_id):
         """Public - Get amenity details by ID"""
         amenity = facade.get_amenity(amenity_id)
         if not amenity:
             api.abort(404, f"Amenity with id '{amenity_id}' not found")
-        return amenity.to_dict(), 200
+        return conditional_response(entity_validators(amenity), lambda: (amenity.to_dict(), 200))
 
     @api.doc(security='Bearer')
     @jwt_required()
@@ -77,6 +117,7 @@ class AmenityResource(Resource):
     @api.response(400, 'Invalid input data')
     @api.response(403, 'Admin privileges required')
     @api.response(404, 'Amenity not found')
+    @api.response(412, 'If-Match does not match the current version')
     def put(self, amenity_id):
         """Admin only - Update an amenity"""
         admin_required()
@@ -89,10 +130,13 @@ class AmenityResource(Resource):
         amenity = facade.get_amenity(amenity_id)
         if not amenity:
             api.abort(404, f"Amenity with id '{amenity_id}' not found")
+        check_if_match(api, entity_validators(amenity)[0], amenity)
 
         try:
             updated = facade.update_amenity(amenity_id, {'name': name})
             return updated.to_dict(), 200
+        except ValueError as e:
+            api.abort(400, str(e))
         except Exception as e:
             api.abort(500, f"Error updating amenity: {str(e)}")
 
@@ -101,6 +145,7 @@ class AmenityResource(Resource):
     @api.response(200, 'Amenity deleted successfully')
     @api.response(403, 'Admin privileges required')
     @api.response(404, 'Amenity not found')
+    @api.response(412, 'If-Match does not match the current version')
     def delete(self, amenity_id):
         """Admin only - Delete an amenity"""
         admin_required()
@@ -108,6 +153,7 @@ class AmenityResource(Resource):
         amenity = facade.get_amenity(amenity_id)
         if not amenity:
             api.abort(404, f"Amenity with id '{amenity_id}' not found")
+        check_if_match(api, entity_validators(amenity)[0], amenity)
 
         try:
             facade.delete_amenity(amenity_id)
@@ -0,0 +1,175 @@
+"""Async versions of the public read routes and of the login, for app/asgi.py.
+
+Same URLs, parameters, bodies and validators as the flask-restx resources,
+which stay the reference: every helper (query string parsing, serializers,
+ETags) is theirs, only the database calls are awaited. A view returning
+None hands the request back to the WSGI app (e.g. streamed lists).
+"""
+from flask import request
+from flask_jwt_extended import create_refresh_token
+from app.services.async_facade import async_facade
+from app.api.v1 import amenities, places, reviews, users
+from app.api.v1.auth import access_token_for, too_many_requests
+from app.api.v1.conditional import collection_validators, conditional_response_async, entity_validators
+from app.api.v1.pagination import page_args, page_json
+from app.api.v1.streaming import stream_requested
+from app.serializers import json_response
+
+
+async def list_response(api, collection, allowed_fields, fetch_page, fetch_all, serializer):
+    """List endpoint: validators of the collection, then a page or the whole list."""
+    # paramètres vérifiés avant les validateurs : pas de 304 pour une requête invalide
+    args = page_args(api, allowed_fields)
+
+    async def build():
+        if args:
+            return await page(api, fetch_page, args, serializer)
+        return json_response(serializer.many(await fetch_all()))
+    return await versioned(collection, build)
+
+
+async def versioned(collection, build):
+    validators = collection_validators(await async_facade.collection_version(collection))
+    response = await conditional_response_async(validators, build)
+    if validators[0] is not None:
+        response.vary.add('Accept')
+    return response
+
+
+async def entity_response(obj, serializer):
+    async def build():
+        return json_response(serializer.to_dict(obj))
+    return await conditional_response_async(entity_validators(obj), build)
+
+
+async def page(api, fetch, args, serializer):
+    limit, cursor, fields = args
+    try:
+        items, next_cursor = await fetch(limit, cursor, fields)
+    except ValueError as e:
+        api.abort(400, str(e))
+    return page_json(items, next_cursor, serializer, fields)
+
+
+# -----------------------
+# Places
+# -----------------------
+async def place_list():
+    if stream_requested():
+        return None
+
+    query, args = places.place_list_args()
+
+    async def build():
+        if query:
+            if args:
+                return await page(places.api, lambda limit, cursor, fields: async_facade.search_places(
+                    query, limit, cursor, fields), args, places.PLACE_SUMMARY)
+            found, _ = await async_facade.search_places(query)
+            return json_response(places.PLACE_SUMMARY.many(found))
+        if args:
+            return await page(places.api, async_facade.get_places_page, args, places.PLACE_SUMMARY)
+        return json_response(places.PLACE_SUMMARY.many(await async_facade.get_all_places()))
+    return await versioned('place', build)
+
+
+async def place_resource(place_id):
+    detail = await async_facade.get_place_detail(place_id)
+    if not detail:
+        return json_response({"error": "Place not found"}, 404)
+    place, review_count, average_rating = detail
+    if not place.owner:
+        return json_response({"error": "Owner not found"}, 404)
+
+    async def build():
+        return json_response(places.place_detail(place, review_count, average_rating))
+    return await conditional_response_async(places.place_validators(place), build)
+
+
+# -----------------------
+# Amenities
+# -----------------------
+async def amenity_list():
+    if stream_requested():
+        return None
+    return await list_response(amenities.api, 'amenity', amenities.AMENITY_FIELDS,
+                               async_facade.get_amenities_page, async_facade.get_all_amenities,
+                               amenities.AMENITY_SERIALIZER)
+
+
+async def amenity_resource(amenity_id):
+    amenity = await async_facade.get_amenity(amenity_id)
+    if not amenity:
+        amenities.api.abort(404, f"Amenity with id '{amenity_id}' not found")
+    return await entity_response(amenity, amenities.AMENITY_SERIALIZER)
+
+
+# -----------------------
+# Reviews
+# -----------------------
+async def review_list():
+    if stream_requested():
+        return None
+    return await list_response(reviews.api, 'review', reviews.REVIEW_FIELDS,
+                               async_facade.get_reviews_page, async_facade.get_all_reviews,
+                               reviews.REVIEW_SERIALIZER)
+
+
+async def review_resource(review_id):
+    review = await async_facade.get_review(review_id)
+    if not review:
+        return json_response({"message": "Review not found"}, 404)
+    return await entity_response(review, reviews.REVIEW_SERIALIZER)
+
+
+async def place_review_list(place_id):
+    if not await async_facade.place_exists(place_id):
+        return json_response({"message": "Place not found"}, 404)
+    validators = collection_validators(await async_facade.collection_version('review'))
+
+    async def build():
+        return json_response(reviews.REVIEW_SERIALIZER.many(await async_facade.get_reviews_by_place(place_id)))
+    return await conditional_response_async(validators, build)
+
+
+# -----------------------
+# Users
+# -----------------------
+async def user_list():
+    if stream_requested():
+        return None
+    return await list_response(users.api, 'user', users.USER_FIELDS,
+                               async_facade.get_users_page, async_facade.get_all_users,
+                               users.USER_SERIALIZER)
+
+
+# -----------------------
+# Auth
+# -----------------------
+async def login():
+    data = request.json
+    limited = too_many_requests(('login_ip', request.remote_addr),
+                                ('login_account', str(data.get('email', '')).lower()))
+    if limited:
+        return json_response(*limited)
+    user = await async_facade.authenticate(data['email'], data['password'])
+    if not user:
+        return json_response({'error': 'Invalid credentials'}, 401)
+    return json_response({
+        'access_token': access_token_for(user),
+        'refresh_token': create_refresh_token(identity=str(user.id))
+    })
+
+
+# (endpoint of the flask-restx resource, method) -> async view
+VIEWS = {
+    ('places_place_list', 'GET'): place_list,
+    ('places_place_resource', 'GET'): place_resource,
+    ('amenities_amenity_list', 'GET'): amenity_list,
+    ('amenities_amenity_resource', 'GET'): amenity_resource,
+    ('reviews_review_list', 'GET'): review_list,
+    ('reviews_review_resource', 'GET'): review_resource,
+    ('reviews_place_review_list', 'GET'): place_review_list,
+    ('users_user_list', 'GET'): user_list,
+    ('auth_login', 'POST'): login,
+}
@@ -1,7 +1,10 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import (create_access_token, create_refresh_token, decode_token,
+                                get_jwt, jwt_required)
 from app.services import facade
+from app.Extensions import rate_limiter
+from app.identity import current_identity, token_denylist
 
 api = Namespace('auth', description='Authentication operations')
 
@@ -10,6 +13,10 @@ login_model = api.model('Login', {
     'password': fields.String(required=True, description='User password')
 })
 
+logout_model = api.model('Logout', {
+    'refresh_token': fields.String(description='Refresh token to revoke as well')
+})
+
 register_model = api.model('Register', {
     'first_name': fields.String(required=True),
     'last_name': fields.String(required=True),
@@ -17,23 +24,73 @@ register_model = api.model('Register', {
     'password': fields.String(required=True)
 })
 
+def too_many_requests(*checks):
+    """Run (limit_name, key) checks; return a 429 response if one is exceeded."""
+    for name, key in checks:
+        retry_after = rate_limiter.check(name, key)
+        if retry_after:
+            return {'error': 'Too many attempts, retry later'}, 429, {'Retry-After': str(retry_after)}
+    return None
+
+
+def access_token_for(user):
+    return create_access_token(identity=str(user.id), additional_claims={'is_admin': user.is_admin})
+
+
 @api.route('/login')
 class Login(Resource):
     @api.expect(login_model)
     def post(self):
-        """Authenticate user and return JWT token"""
+        """Authenticate user and return an access token and a refresh token"""
         data = request.json
-        user = facade.get_user_by_email(data['email'])
-        if not user or not user.verify_password(data['password']):
+        # avant bcrypt : une rafale de tentatives ne doit pas occuper tout le pool
+        limited = too_many_requests(('login_ip', request.remote_addr),
+                                    ('login_account', str(data.get('email', '')).lower()))
+        if limited:
+            return limited
+        user = facade.authenticate(data['email'], data['password'])
+        if not user:
             return {'error': 'Invalid credentials'}, 401
 
-        access_token = create_access_token(
-            identity=str(user.id),
-            additional_claims={'is_admin': user.is_admin},
-            expires_delta=False
-        )
+        return {
+            'access_token': access_token_for(user),
+            'refresh_token': create_refresh_token(identity=str(user.id))
+        }, 200
+
+
+@api.route('/refresh')
+class Refresh(Resource):
+    @api.doc(security='Bearer')
+    @jwt_required(refresh=True)
+    def post(self):
+        """Return a new access token (send the refresh token as Bearer)"""
+        # le rôle est relu : un admin rétrogradé ne le reste pas jusqu'à l'expiration
+        user = facade.get_user(current_identity().user_id)
+        if not user:
+            return {'error': 'User not found'}, 401
+        return {'access_token': access_token_for(user)}, 200
+
+
+@api.route('/logout')
+class Logout(Resource):
+    @api.doc(security='Bearer')
+    @api.expect(logout_model)
+    @jwt_required(verify_type=False)
+    def post(self):
+        """Revoke the token sent as Bearer, and the refresh token given in the body"""
+        claims = get_jwt()
+        token_denylist.revoke(claims['jti'], claims.get('exp'))
 
-        return {'access_token': access_token}, 200
+        refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+        if refresh_token:
+            try:
+                refresh_claims = decode_token(refresh_token)
+            except Exception:
+                return {'error': 'Invalid refresh token'}, 400
+            if str(refresh_claims['sub']) != current_identity().user_id:
+                return {'error': 'Unauthorized action'}, 403
+            token_denylist.revoke(refresh_claims['jti'], refresh_claims.get('exp'))
+        return {'message': 'Logged out'}, 200
 
 
 @api.route('/register')
@@ -42,6 +99,9 @@ class Register(Resource):
     def post(self):
         """Register a new user"""
         data = request.json
+        limited = too_many_requests(('register_ip', request.remote_addr))
+        if limited:
+            return limited
         if facade.get_user_by_email(data['email']):
             return {'error': 'Email already registered'}, 400
         try:
@@ -59,8 +119,7 @@ def role_required(role):
         @wraps(fn)
         @jwt_required()
         def wrapper(*args, **kwargs):
-            claims = get_jwt()
-            if role == 'admin' and not claims.get('is_admin', False):
+            if role == 'admin' and not current_identity().is_admin:
                 return {'error': 'Admin privileges required'}, 403
             return fn(*args, **kwargs)
         return wrapper
@@ -0,0 +1,125 @@
+"""HTTP validators (ETag, Last-Modified) and conditional requests.
+
+An entity's ETag hashes the id and updated_at of every object its response
+is built from. A list's ETag hashes the version counter of its collection
+with the URL. Both are known before anything is serialized, so a matching
+If-None-Match / If-Modified-Since gets its 304 without building the body.
+PUT and DELETE honour If-Match with a compare-and-set on updated_at.
+"""
+from datetime import timezone
+from functools import wraps
+from flask import Response, request
+from werkzeug.http import generate_etag, http_date, quote_etag
+from app.services import facade
+from app.api.v1.streaming import prefers_ndjson
+
+
+def _utc(value):
+    return value.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def entity_validators(*objs):
+    """(etag, last_modified) of a response built from objs (None entries are skipped)."""
+    parts, last_modified = [], None
+    for obj in objs:
+        if obj is None:
+            continue
+        updated_at = obj.updated_at
+        parts.append("{}:{}:{}".format(obj.__tablename__, obj.id, updated_at.isoformat() if updated_at else ''))
+        if updated_at is not None and (last_modified is None or updated_at > last_modified):
+            last_modified = updated_at
+    return generate_etag('|'.join(parts).encode('utf-8')), last_modified
+
+
+def collection_validators(version):
+    """(etag, last_modified) of a list response, (None, None) when the collection is not versioned."""
+    if version is None:
+        return None, None
+    number, last_modified = version
+    # la même version donne un autre corps selon la page, les filtres ou le format
+    key = "{}:{}:{}".format(number, request.full_path, 'ndjson' if prefers_ndjson() else 'json')
+    return generate_etag(key.encode('utf-8')), last_modified
+
+
+def is_fresh(etag, last_modified=None):
+    """True when the client's cached copy is current (If-None-Match wins over If-Modified-Since)."""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return _utc(last_modified) <= request.if_modified_since
+    return False
+
+
+def _validator_headers(etag, last_modified):
+    # no-cache : les clients gardent la réponse mais la revalident à chaque fois
+    headers = {'ETag': quote_etag(etag), 'Cache-Control': 'no-cache'}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(_utc(last_modified))
+    return headers
+
+
+def with_validators(result, etag, last_modified=None):
+    """Add the validators to a Response or a (data, status) tuple, on 200 only."""
+    headers = _validator_headers(etag, last_modified)
+    if isinstance(result, Response):
+        if result.status_code == 200:
+            result.headers.update(headers)
+        return result
+    data, status = result[0], result[1]
+    if status != 200:
+        return result
+    return data, status, headers
+
+
+def not_modified(etag, last_modified=None):
+    return Response(status=304, headers=_validator_headers(etag, last_modified))
+
+
+def conditional_response(validators, build):
+    """304 if the client copy is current, else build() with the validators set."""
+    etag, last_modified = validators
+    if etag is None:
+        return build()
+    if is_fresh(etag, last_modified):
+        return not_modified(etag, last_modified)
+    return with_validators(build(), etag, last_modified)
+
+
+async def conditional_response_async(validators, build):
+    """conditional_response() of the ASGI mode, build being a coroutine function."""
+    etag, last_modified = validators
+    if etag is None:
+        return await build()
+    if is_fresh(etag, last_modified):
+        return not_modified(etag, last_modified)
+    return with_validators(await build(), etag, last_modified)
+
+
+def conditional_list(collection, parse=None):
+    """Decorator of list GETs: validators from the version of collection ('place', ...).
+
+    parse() reads the query string before the validators are looked at, so an
+    invalid request gets its 400 and never a 304; its result is passed to the
+    view as last positional argument.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if parse is not None:
+                args = args + (parse(),)
+            validators = collection_validators(facade.collection_version(collection))
+            response = conditional_response(validators, lambda: func(*args, **kwargs))
+            if isinstance(response, Response) and validators[0] is not None:
+                response.vary.add('Accept')
+            return response
+        return wrapper
+    return decorator
+
+
+def check_if_match(api, etag, obj):
+    """412 unless If-Match matches etag and obj is still unchanged in the database (PUT / DELETE)."""
+    if_match = request.if_match
+    if not if_match:
+        return
+    if not if_match.contains(etag) or not facade.touch_if_unmodified(obj):
+        api.abort(412, "The resource was modified, fetch it again before changing it")
@@ -0,0 +1,61 @@
+from flask import request
+from app.persistence import repository
+from app.serializers import json_response
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def page_args(api, allowed_fields, decode_cursor=None):
+    """Read limit / cursor / fields from the query string.
+
+    Returns None when the client did not ask for a page, so list endpoints
+    keep their historical "return everything" behaviour by default. The
+    cursor is checked with decode_cursor (default: the (created_at, id)
+    cursor of the repositories).
+    """
+    args = request.args
+    if not any(k in args for k in ('limit', 'cursor', 'fields')):
+        return None
+
+    try:
+        limit = int(args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        api.abort(400, "'limit' must be an integer")
+    if not 1 <= limit <= MAX_LIMIT:
+        api.abort(400, f"'limit' must be between 1 and {MAX_LIMIT}")
+
+    fields = None
+    if args.get('fields'):
+        fields = [f.strip() for f in args['fields'].split(',') if f.strip()]
+        unknown = [f for f in fields if f not in allowed_fields]
+        if unknown:
+            api.abort(400, f"Unknown fields: {', '.join(unknown)}")
+
+    cursor = args.get('cursor')
+    if cursor:
+        try:
+            (decode_cursor or repository.decode_cursor)(cursor)
+        except ValueError as e:
+            api.abort(400, str(e))
+    return limit, cursor, fields
+
+
+def page_response(api, fetch, args, serializer):
+    """Run fetch(limit, cursor, fields) and wrap the page with its next_cursor.
+
+    serializer is a compiled Serializer; with ?fields= only its projection
+    on those columns is used.
+    """
+    limit, cursor, fields = args
+    try:
+        items, next_cursor = fetch(limit, cursor, fields)
+    except ValueError as e:
+        api.abort(400, str(e))
+    return page_json(items, next_cursor, serializer, fields)
+
+
+def page_json(items, next_cursor, serializer, fields=None):
+    if fields:
+        serializer = serializer.project(fields)
+    return json_response({'items': serializer.many(items), 'next_cursor': next_cursor})
@@ -1,7 +1,14 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required
 from app.services import facade  # instance commune du facade
+from app.identity import current_identity
+from app.api.v1.pagination import DEFAULT_LIMIT, MAX_LIMIT, page_args, page_response
+from app.api.v1.streaming import stream_requested, stream_response
+from app.api.v1.conditional import check_if_match, conditional_list, conditional_response, entity_validators
+from app.models.place import Place
+from app.persistence import text_search
+from app.serializers import Serializer, json_response
 
 api = Namespace('places', description='Place operations')
 
@@ -29,22 +36,113 @@ place_model = api.model('Place', {
     'amenities': fields.List(fields.String, required=True, description="List of amenities ID's")
 })
 
+PLACE_FIELDS = ('id', 'title', 'description', 'price', 'latitude', 'longitude',
+                'owner_id', 'review_count', 'rating_sum', 'created_at', 'updated_at')
+
+page_params = {
+    'limit': 'Page size (enables pagination)',
+    'cursor': 'next_cursor returned by the previous page',
+    'fields': 'Comma separated list of fields to return',
+    'min_price': 'Minimum price',
+    'max_price': 'Maximum price',
+    'amenities': 'Comma separated amenity ids',
+    'match': "'all' (default) or 'any' of the amenities",
+    'owner_id': 'Only the places of this owner',
+    'sort': 'price, created_at, rating or review_count, prefixed by - for descending',
+    'stream': '1 to stream the whole list (or Accept: application/x-ndjson)'
+}
+
+
+PLACE_SUMMARY = Serializer(
+    Place,
+    ('id', 'title', 'price', 'latitude', 'longitude', 'review_count', 'average_rating'),
+    computed={'average_rating': lambda p: round(p.average_rating, 2) if p.average_rating is not None else None}
+)
+place_summary = PLACE_SUMMARY.to_dict
+
+
+def place_validators(place):
+    """Validators of the place detail: it also shows the owner and the amenities."""
+    return entity_validators(place, place.owner, *sorted(place.amenities, key=lambda a: a.id))
+
+
+def place_detail(place, review_count, average_rating):
+    """Body of GET /places/<id>, from a place loaded with its owner and amenities."""
+    owner = place.owner
+    return {
+        "id": place.id,
+        "title": place.title,
+        "description": place.description,
+        "price": place.price,
+        "latitude": place.latitude,
+        "longitude": place.longitude,
+        "owner": {
+            "id": owner.id,
+            "first_name": owner.first_name,
+            "last_name": owner.last_name,
+            "email": owner.email
+        },
+        "amenities": [{"id": a.id, "name": a.name} for a in place.amenities],
+        "review_count": review_count,
+        "average_rating": round(average_rating, 2) if average_rating is not None else None
+    }
+
+
+FILTER_PARAMS = ('min_price', 'max_price', 'amenities', 'match', 'owner_id', 'sort')
+
+
+def place_query_args():
+    """Build a PlaceQuery from the query string, None when no filter or sort is given."""
+    args = request.args
+    if not any(k in args for k in FILTER_PARAMS):
+        return None
+    try:
+        min_price = float(args['min_price']) if 'min_price' in args else None
+        max_price = float(args['max_price']) if 'max_price' in args else None
+        amenity_ids = [int(a) for a in args.get('amenities', '').split(',') if a.strip()]
+    except ValueError:
+        api.abort(400, "'min_price', 'max_price' must be numbers and 'amenities' a list of ids")
+    if args.get('match', 'all') not in ('all', 'any'):
+        api.abort(400, "'match' must be 'all' or 'any'")
+    try:
+        return facade.place_query(min_price=min_price, max_price=max_price, amenity_ids=amenity_ids,
+                                  match_all=args.get('match', 'all') == 'all',
+                                  owner_id=args.get('owner_id'), sort=args.get('sort'))
+    except ValueError as e:
+        api.abort(400, str(e))
+
+
+def place_list_args():
+    """(PlaceQuery or None, page args or None) of the query string, 400 when invalid."""
+    query = place_query_args()
+    return query, page_args(api, PLACE_FIELDS, query.decode_cursor if query else None)
+
+
 # -----------------------
 # LIST / CREATE PLACES
 # -----------------------
 @api.route('/')
 class PlaceList(Resource):
+    @api.doc(params=page_params)
     @api.response(200, 'List of places')
-    def get(self):
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Invalid pagination parameters')
+    @conditional_list('place', place_list_args)
+    def get(self, params):
         """List all places (public)"""
+        query, args = params
+        if query:
+            if args:
+                return page_response(api, lambda limit, cursor, fields: facade.search_places(
+                    query, limit, cursor, fields), args, PLACE_SUMMARY)
+            places, _ = facade.search_places(query)
+            return json_response(PLACE_SUMMARY.many(places))
+        if args:
+            return page_response(api, facade.get_places_page, args, PLACE_SUMMARY)
+        if stream_requested():
+            return stream_response(facade.iter_places(), PLACE_SUMMARY)
         places = facade.get_all_places()
-        return [{
-            "id": p.id,
-            "title": p.title,
-            "price": p.price,
-            "latitude": p.latitude,
-            "longitude": p.longitude
-        } for p in places]
+        return json_response(PLACE_SUMMARY.many(places))
 
     @api.expect(place_model)
     @api.doc(security='Bearer')  # Swagger inclut le token
@@ -53,23 +151,135 @@ class PlaceList(Resource):
     @api.response(400, 'Invalid data')
     def post(self):
         """Create a new place (authenticated users only)"""
-        current_user_id = get_jwt_identity()
         data = request.json
-        data['owner_id'] = current_user_id  # assign automatically
+        data['owner_id'] = current_identity().user_id  # assign automatically
 
-        # Vérification des amenities existants
-        for amenity_id in data.get('amenities', []):
-            if not facade.get_amenity(amenity_id):
-                return {"message": f"Amenity {amenity_id} does not exist"}, 400
+        # Les amenities sont vérifiés par le facade en une seule requête
+        try:
+            place = facade.create_place(data)
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        return place_summary(place), 201
 
-        place = facade.create_place(data)
-        return {
-            "id": place.id,
-            "title": place.title,
-            "price": place.price,
-            "latitude": place.latitude,
-            "longitude": place.longitude
-        }, 201
+
+# -----------------------
+# BULK OPERATIONS
+# -----------------------
+place_bulk_model = api.model('PlaceBulk', {
+    'create': fields.List(fields.Nested(place_model), description='Places to create'),
+    'update': fields.List(fields.Raw, description="Partial places, each with its 'id'"),
+    'delete': fields.List(fields.String, description='IDs of places to delete')
+})
+
+
+@api.route('/bulk')
+class PlaceBulk(Resource):
+    @api.expect(place_bulk_model)
+    @api.doc(security='Bearer')
+    @jwt_required()
+    @api.response(200, 'All operations applied')
+    @api.response(400, 'Some rows are invalid, nothing was written')
+    def post(self):
+        """Create, update and delete places in one request (owner or admin)"""
+        identity = current_identity()
+        result, errors = facade.bulk_places(request.json or {}, identity.user_id, identity.is_admin)
+        if errors:
+            return {"errors": errors}, 400
+        return result, 200
+
+
+# -----------------------
+# GEO SEARCH
+# -----------------------
+def parse_float(name, low, high):
+    try:
+        value = float(request.args[name])
+    except (KeyError, ValueError):
+        api.abort(400, f"'{name}' must be a number")
+    if not low <= value <= high:
+        api.abort(400, f"'{name}' must be between {low} and {high}")
+    return value
+
+
+def search_args():
+    """Parameters of /places/search, 400 when invalid:
+    ('text', q, limit, cursor), ('bbox', bbox) or ('near', lat, lon, radius_km).
+    """
+    args = request.args
+    if 'q' in args:
+        try:
+            limit = int(args.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            api.abort(400, "'limit' must be an integer")
+        if not 1 <= limit <= MAX_LIMIT:
+            api.abort(400, f"'limit' must be between 1 and {MAX_LIMIT}")
+        try:
+            text_search.parse_query(args['q'])
+            if args.get('cursor'):
+                text_search.decode_cursor(args['cursor'])
+        except ValueError as e:
+            api.abort(400, str(e))
+        return 'text', args['q'], limit, args.get('cursor')
+
+    if 'bbox' in args:
+        try:
+            bbox = tuple(float(v) for v in args['bbox'].split(','))
+        except ValueError:
+            api.abort(400, "'bbox' must be min_lon,min_lat,max_lon,max_lat")
+        if len(bbox) != 4 or not (-180 <= bbox[0] <= 180 and -180 <= bbox[2] <= 180
+                                  and -90 <= bbox[1] <= bbox[3] <= 90):
+            api.abort(400, "'bbox' must be min_lon,min_lat,max_lon,max_lat")
+        return 'bbox', bbox
+
+    if 'lat' not in args or 'lon' not in args:
+        api.abort(400, "Provide either 'bbox' or 'lat', 'lon' and 'radius_km'")
+    return 'near', parse_float('lat', -90, 90), parse_float('lon', -180, 180), parse_float('radius_km', 0, 20000)
+
+
+def text_search_response(q, limit, cursor):
+    """Ranked page of the places matching q, with the score of each place."""
+    try:
+        results, next_cursor = facade.search_places_text(q, limit, cursor)
+    except ValueError as e:
+        api.abort(400, str(e))
+    items = []
+    for place, score in results:
+        item = place_summary(place)
+        item['score'] = round(-score, 6)  # bm25 : plus petit = meilleur, renvoyé positif
+        items.append(item)
+    return json_response({'items': items, 'next_cursor': next_cursor})
+
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    @api.doc(params={
+        'q': 'Words to find in the title or description (last word matches as a prefix)',
+        'limit': 'Page size of a text search',
+        'cursor': 'next_cursor of the previous text search page',
+        'lat': 'Latitude of the search center',
+        'lon': 'Longitude of the search center',
+        'radius_km': 'Search radius in kilometres',
+        'bbox': 'Bounding box: min_lon,min_lat,max_lon,max_lat'
+    })
+    @api.response(200, 'Places matching the search')
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Invalid search parameters')
+    @conditional_list('place', search_args)
+    def get(self, search):
+        """Search places by text, around a point or inside a bounding box (public)"""
+        kind = search[0]
+        if kind == 'text':
+            return text_search_response(*search[1:])
+        if kind == 'bbox':
+            return json_response(PLACE_SUMMARY.many(facade.search_places_in_bbox(search[1])))
+
+        lat, lon, radius_km = search[1:]
+        results = []
+        for place, distance in facade.search_places_near(lat, lon, radius_km):
+            item = place_summary(place)
+            item['distance_km'] = round(distance, 3)
+            results.append(item)
+        return json_response(results)
 
 
 # -----------------------
@@ -78,37 +288,22 @@ class PlaceList(Resource):
 @api.route('/<string:place_id>')
 class PlaceResource(Resource):
     @api.response(200, 'Place details retrieved')
+    @api.response(304, 'Not modified')
     @api.response(404, 'Place not found')
     def get(self, place_id):
         """Get a specific place (public)"""
-        try:
-            place = facade.get_place(place_id)
-        except ValueError:
+        detail = facade.get_place_detail(place_id)
+        if not detail:
             return {"error": "Place not found"}, 404
+        place, review_count, average_rating = detail
 
-        # Amenities objets directement
-        amenities = [{"id": a.id, "name": a.name} for a in place.amenities]
-
-        # Owner
-        owner = facade.get_user(place.owner_id)
+        owner = place.owner
         if not owner:
             return {"error": "Owner not found"}, 404
 
-        return {
-            "id": place.id,
-            "title": place.title,
-            "description": place.description,
-            "price": place.price,
-            "latitude": place.latitude,
-            "longitude": place.longitude,
-            "owner": {
-                "id": owner.id,
-                "first_name": owner.first_name,
-                "last_name": owner.last_name,
-                "email": owner.email
-            },
-            "amenities": amenities
-        }, 200
+        # Amenities et owner déjà chargés par la même requête, le corps n'est construit qu'en cas de 200
+        return conditional_response(place_validators(place),
+                                    lambda: (place_detail(place, review_count, average_rating), 200))
 
     @api.expect(place_model)
     @api.doc(security='Bearer')  # Swagger + JWT
@@ -116,29 +311,25 @@ class PlaceResource(Resource):
     @api.response(200, 'Place updated successfully')
     @api.response(404, 'Place not found')
     @api.response(403, 'Unauthorized')
+    @api.response(412, 'If-Match does not match the current version')
     def put(self, place_id):
         """Update place info (owner or admin)"""
-        current_user_id = get_jwt_identity()
-        claims = get_jwt()
-        is_admin = claims.get('is_admin', False)
-
-        try:
-            place = facade.get_place(place_id)
-        except ValueError:
+        place = facade.get_place(place_id)
+        if not place:
             return {"error": "Place not found"}, 404
 
-        if place.owner_id != current_user_id and not is_admin:
+        if not current_identity().can_edit(place.owner_id):
             return {"error": "Unauthorized action"}, 403
+        check_if_match(api, place_validators(place)[0], place)
 
         data = api.payload
         data.pop("owner_id", None)  # ne pas changer le propriétaire
 
-        # Vérification des amenities existants
-        for amenity_id in data.get('amenities', []):
-            if not facade.get_amenity(amenity_id):
-                return {"message": f"Amenity {amenity_id} does not exist"}, 400
-
-        facade.update_place(place_id, data)
+        # Les amenities sont vérifiés par le facade en une seule requête
+        try:
+            facade.update_place(place_id, data)
+        except ValueError as e:
+            return {"message": str(e)}, 400
         return {"message": "Place updated successfully"}, 200
 
     @api.doc(security='Bearer')  # Swagger + JWT
@@ -146,19 +337,16 @@ class PlaceResource(Resource):
     @api.response(200, 'Place deleted successfully')
     @api.response(404, 'Place not found')
     @api.response(403, 'Unauthorized')
+    @api.response(412, 'If-Match does not match the current version')
     def delete(self, place_id):
         """Delete a place (owner or admin)"""
-        current_user_id = get_jwt_identity()
-        claims = get_jwt()
-        is_admin = claims.get('is_admin', False)
-
-        try:
-            place = facade.get_place(place_id)
-        except ValueError:
+        place = facade.get_place(place_id)
+        if not place:
             return {"error": "Place not found"}, 404
 
-        if place.owner_id != current_user_id and not is_admin:
+        if not current_identity().can_edit(place.owner_id):
             return {"error": "Unauthorized action"}, 403
+        check_if_match(api, place_validators(place)[0], place)
 
         facade.delete_place(place_id)
         return {"message": "Place deleted successfully"}, 200
@@ -1,13 +1,24 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required
 from app.services import facade
+from app.identity import current_identity
+from app.api.v1.pagination import page_args, page_response
+from app.api.v1.streaming import stream_requested, stream_response
+from app.api.v1.conditional import (check_if_match, collection_validators, conditional_list,
+                                    conditional_response, entity_validators)
+from app.models.review import Review
+from app.serializers import json_response, serializer_for
 
 # -----------------------
 # NAMESPACE
 # -----------------------
 api = Namespace('reviews', description='Review operations')
 
+REVIEW_SERIALIZER = serializer_for(Review)
+# Champs acceptés par ?fields=
+REVIEW_FIELDS = ('id', 'user_id', 'place_id', 'text', 'rating', 'created_at', 'updated_at')
+
 # -----------------------
 # REVIEW MODEL
 # -----------------------
@@ -28,33 +39,39 @@ class ReviewList(Resource):
     @jwt_required()
     def post(self):
         """Register a new review"""
-        current_user_id = get_jwt_identity()
-        claims = get_jwt()
-        is_admin = claims.get('is_admin', False)
+        identity = current_identity()
 
         data = request.json
-        data['user_id'] = current_user_id  # force user_id
+        data['user_id'] = identity.user_id  # force user_id
 
         place = facade.get_place(data['place_id'])
         if not place:
             return {"message": "Place not found"}, 404
 
         # Only non-admins are restricted from reviewing their own places
-        if place.owner_id == current_user_id and not is_admin:
+        if identity.owns(place.owner_id) and not identity.is_admin:
             return {"message": "You cannot review your own place."}, 400
 
-        existing_review = facade.get_user_review_for_place(current_user_id, data['place_id'])
-        if existing_review and not is_admin:
-            return {"message": "You have already reviewed this place."}, 400
-
-        review = facade.create_review(data)
+        # One review per user per place is enforced by a unique index
+        try:
+            review = facade.create_review(data)
+        except ValueError as e:
+            return {"message": str(e)}, 400
         return review.to_dict(), 201
 
+    @api.doc(params={'limit': 'Page size', 'cursor': 'Next page cursor', 'fields': 'Fields to return',
+                     'stream': '1 to stream the whole list (or Accept: application/x-ndjson)'})
     @api.response(200, 'List of reviews retrieved successfully')
-    def get(self):
+    @api.response(304, 'Not modified')
+    @conditional_list('review', lambda: page_args(api, REVIEW_FIELDS))
+    def get(self, args):
         """Retrieve a list of all reviews"""
+        if args:
+            return page_response(api, facade.get_reviews_page, args, REVIEW_SERIALIZER)
+        if stream_requested():
+            return stream_response(facade.iter_reviews(), REVIEW_SERIALIZER)
         reviews = facade.get_all_reviews()
-        return [r.to_dict() for r in reviews], 200
+        return json_response(REVIEW_SERIALIZER.many(reviews))
 
 # -----------------------
 # GET / UPDATE / DELETE REVIEW
@@ -62,51 +79,51 @@ class ReviewList(Resource):
 @api.route('/<review_id>')
 class ReviewResource(Resource):
     @api.response(200, 'Review details retrieved successfully')
+    @api.response(304, 'Not modified')
     @api.response(404, 'Review not found')
     def get(self, review_id):
         review = facade.get_review(review_id)
         if not review:
             return {"message": "Review not found"}, 404
-        return review.to_dict(), 200
+        return conditional_response(entity_validators(review), lambda: (review.to_dict(), 200))
 
     @api.expect(review_model)
     @api.response(200, 'Review updated successfully')
     @api.response(404, 'Review not found')
     @api.response(403, 'Unauthorized')
+    @api.response(412, 'If-Match does not match the current version')
     @jwt_required()
     def put(self, review_id):
         """Update a review (author or admin)"""
-        current_user_id = get_jwt_identity()
-        claims = get_jwt()
-        is_admin = claims.get('is_admin', False)
-
         review = facade.get_review(review_id)
         if not review:
             return {"message": "Review not found"}, 404
 
-        if review.user_id != current_user_id and not is_admin:
+        if not current_identity().can_edit(review.user_id):
             return {"message": "Unauthorized action"}, 403
+        check_if_match(api, entity_validators(review)[0], review)
 
         data = request.json
-        updated_review = facade.update_review(review_id, data)
+        try:
+            facade.update_review(review_id, data)
+        except ValueError as e:
+            return {"message": str(e)}, 400
         return {"message": "Review updated successfully"}, 200
 
     @api.response(200, 'Review deleted successfully')
     @api.response(404, 'Review not found')
     @api.response(403, 'Unauthorized')
+    @api.response(412, 'If-Match does not match the current version')
     @jwt_required()
     def delete(self, review_id):
         """Delete a review (author or admin)"""
-        current_user_id = get_jwt_identity()
-        claims = get_jwt()
-        is_admin = claims.get('is_admin', False)
-
         review = facade.get_review(review_id)
         if not review:
             return {"message": "Review not found"}, 404
 
-        if review.user_id != current_user_id and not is_admin:
+        if not current_identity().can_edit(review.user_id):
             return {"message": "Unauthorized action"}, 403
+        check_if_match(api, entity_validators(review)[0], review)
 
         facade.delete_review(review_id)
         return {"message": "Review deleted successfully"}, 200
@@ -117,10 +134,12 @@ class ReviewResource(Resource):
 @api.route('/places/<place_id>/reviews')
 class PlaceReviewList(Resource):
     @api.response(200, 'List of reviews for the place retrieved successfully')
+    @api.response(304, 'Not modified')
     @api.response(404, 'Place not found')
     def get(self, place_id):
-        place = facade.get_place(place_id)
-        if not place:
+        # place vérifiée avant : une place supprimée ne change pas la version des reviews
+        if not facade.place_exists(place_id):
             return {"message": "Place not found"}, 404
-        reviews = facade.get_reviews_by_place(place_id)
-        return [r.to_dict() for r in reviews], 200
\ No newline at end of file
+        validators = collection_validators(facade.collection_version('review'))
+        return conditional_response(
+            validators, lambda: json_response(REVIEW_SERIALIZER.many(facade.get_reviews_by_place(place_id))))
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""Opt-in streaming of the list endpoints.
+
+?stream=1 sends the usual JSON array with chunked encoding, a request
+preferring application/x-ndjson gets one JSON object per line. Rows are
+serialized as the repository yields them, so memory does not grow with the
+size of the table.
+"""
+from flask import Response, request, stream_with_context
+from app.serializers import dumps
+
+NDJSON = 'application/x-ndjson'
+# Rows grouped per chunk written to the client
+CHUNK_ROWS = 200
+
+
+def prefers_ndjson():
+    return request.accept_mimetypes.best_match(['application/json', NDJSON]) == NDJSON
+
+
+def stream_requested():
+    """True if the client asked for ?stream=1 or prefers NDJSON over JSON."""
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    return prefers_ndjson()
+
+
+def stream_response(rows, serializer):
+    """Response writing each row with serializer, as NDJSON or as a JSON array."""
+    ndjson = prefers_ndjson()
+
+    def join(chunk, written):
+        if ndjson:
+            return b'\n'.join(chunk) + b'\n'
+        return (b',' if written else b'') + b','.join(chunk)
+
+    def generate():
+        if not ndjson:
+            yield b'['
+        chunk, written = [], False
+        to_dict = serializer.to_dict
+        for row in rows:
+            chunk.append(dumps(to_dict(row)))
+            if len(chunk) >= CHUNK_ROWS:
+                yield join(chunk, written)
+                chunk, written = [], True
+        if chunk:
+            yield join(chunk, written)
+        if not ndjson:
+            yield b']'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON if ndjson else 'application/json')
@@ -1,11 +1,21 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required
 from app.services import facade
+from app.identity import current_identity
 from app.api.v1.auth import role_required
+from app.api.v1.pagination import page_args, page_response
+from app.api.v1.streaming import stream_requested, stream_response
+from app.api.v1.conditional import conditional_list
+from app.models.user import User
+from app.serializers import json_response, serializer_for
 
 api = Namespace('users', description='User operations')
 
+USER_SERIALIZER = serializer_for(User)
+# Champs acceptés par ?fields=
+USER_FIELDS = ('id', 'first_name', 'last_name', 'email', 'is_admin', 'created_at', 'updated_at')
+
 # Modèles Swagger
 user_model = api.model('User', {
     'first_name': fields.String(required=True),
@@ -31,10 +41,18 @@ admin_update_model = api.model('AdminUserUpdate', {
 # -----------------------
 @api.route('/')
 class UserList(Resource):
-    def get(self):
+    @api.doc(params={'limit': 'Page size', 'cursor': 'Next page cursor', 'fields': 'Fields to return',
+                     'stream': '1 to stream the whole list (or Accept: application/x-ndjson)'})
+    @api.response(304, 'Not modified')
+    @conditional_list('user', lambda: page_args(api, USER_FIELDS))
+    def get(self, args):
         """List all users"""
+        if args:
+            return page_response(api, facade.get_users_page, args, USER_SERIALIZER)
+        if stream_requested():
+            return stream_response(facade.iter_users(), USER_SERIALIZER)
         users = facade.get_all_users()
-        return [u.to_dict() for u in users], 200
+        return json_response(USER_SERIALIZER.many(users))
 
     @api.expect(user_model)
     def post(self):
@@ -56,12 +74,11 @@ class UserResource(Resource):
     @api.expect(user_update_model)
     def put(self, user_id):
         """Update own profile (first_name / last_name)"""
-        current_user = get_jwt_identity()
-        if str(current_user) != str(user_id):
+        if not current_identity().owns(user_id):
             return {'error': 'Unauthorized action'}, 403
 
-        data = request.json or {}
-        if not any(k in data for k in ['first_name', 'last_name']):
+        data = {k: v for k, v in (request.json or {}).items() if k in ('first_name', 'last_name')}
+        if not data:
             return {'error': 'No valid fields to update'}, 400
 
         try:
@@ -95,6 +112,26 @@ class AdminUserCreate(Resource):
             return {'error': str(e)}, 400
 
 
+user_bulk_model = api.model('UserBulk', {
+    'create': fields.List(fields.Nested(user_model), description='Users to create'),
+    'update': fields.List(fields.Raw, description="Users with their 'id' and fields to change"),
+    'delete': fields.List(fields.String, description='IDs of users to delete')
+})
+
+
+@api.route('/bulk')
+class UserBulk(Resource):
+    @role_required('admin')
+    @api.doc(security='Bearer')
+    @api.expect(user_bulk_model)
+    def post(self):
+        """Admin creates, updates and deletes users in one request"""
+        result, errors = facade.bulk_users(request.json or {})
+        if errors:
+            return {'errors': errors}, 400
+        return result, 200
+
+
 @api.route('/admin/<string:user_id>')
 class AdminUserModify(Resource):
     @role_required('admin')
@@ -0,0 +1,165 @@
+"""ASGI mode: the API served on an asyncio event loop.
+
+    pip install uvicorn a2wsgi aiosqlite "sqlalchemy[asyncio]"
+    HBNB_CONFIG=production uvicorn asgi:app --workers 4
+
+The request is matched with the url_map of the Flask app. The public reads
+and the login have an async view (app/api/v1/async_views.py): they run on
+the event loop, inside a Flask request context, with their database calls
+awaited on an AsyncSession, so waiting on SQLite or bcrypt holds no
+thread. Every other request (writes, search, streams, Swagger) goes to the
+Flask app itself through a2wsgi, in a pool of ASGI_WSGI_WORKERS threads.
+"""
+import io
+import sys
+from a2wsgi import WSGIMiddleware
+from werkzeug.exceptions import HTTPException
+from app import create_app
+from app.password_hasher import PasswordHasherBusy
+from app.serializers import json_response
+from app.services.async_facade import async_facade
+from app.api.v1.async_views import VIEWS
+from config import DevelopmentConfig
+
+
+def build_environ(scope, body):
+    """WSGI environ of an ASGI http scope, for the Flask request context."""
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    server = scope.get('server') or ('localhost', 80)
+    environ['SERVER_NAME'] = server[0]
+    environ['SERVER_PORT'] = str(server[1] or 80)
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name == 'TRANSFER_ENCODING':
+            continue
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else 'HTTP_' + name
+        value = value.decode('latin-1')
+        environ[key] = environ[key] + ',' + value if key in environ else value
+    # Le corps est déjà lu et décodé : sa taille vaut aussi pour une requête
+    # chunked, et sans Transfer-Encoding werkzeug lit bien CONTENT_LENGTH
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+def replay(body):
+    """receive() giving back a body already read, for the WSGI fallback."""
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {'type': 'http.disconnect'}
+        sent = True
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+    return receive
+
+
+async def send_response(send, response):
+    await send({
+        'type': 'http.response.start',
+        'status': response.status_code,
+        'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in response.headers.items()],
+    })
+    await send({'type': 'http.response.body', 'body': response.get_data()})
+
+
+class HBnBAsgi:
+    """ASGI application: async views first, the Flask app for everything else."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WSGIMiddleware(flask_app, workers=flask_app.config.get('ASGI_WSGI_WORKERS', 10))
+        async_facade.init_app(flask_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            return await self.wsgi(scope, receive, send)
+
+        body = await read_body(receive)
+        environ = build_environ(scope, body)
+        ctx = self.flask_app.request_context(environ)
+        ctx.push()
+        try:
+            view, args = self.match(ctx)
+            response = None
+            if view is not None:
+                response = await self.dispatch(view, args)
+            if response is not None:
+                # after_request de Flask (CORS...) comme pour une réponse WSGI
+                response = self.flask_app.process_response(response)
+        finally:
+            ctx.pop()
+        if response is None:
+            return await self.wsgi(scope, replay(body), send)
+        await send_response(send, response)
+
+    def match(self, ctx):
+        """(async view, url args) for this request, or (None, None)."""
+        try:
+            rule, args = ctx.url_adapter.match(return_rule=True)
+        except HTTPException:
+            # 404, 405, redirections : réponses de Flask
+            return None, None
+        return VIEWS.get((rule.endpoint, ctx.request.method)), args
+
+    async def dispatch(self, view, args):
+        """Run the view; its session is committed only if the response succeeded.
+
+        None means that the request is to be served by the Flask app.
+        """
+        success = False
+        try:
+            try:
+                response = await view(**args)
+            except HTTPException:
+                # api.abort() : la réponse d'erreur est celle de flask-restx, via le WSGI
+                return None
+            except PasswordHasherBusy as e:
+                response = json_response({'error': str(e)}, 503, {'Retry-After': '1'})
+            success = response is not None and response.status_code < 400
+            return response
+        except Exception:
+            self.flask_app.logger.exception("Error in async view")
+            return json_response({'message': 'Internal Server Error'}, 500)
+        finally:
+            await async_facade.end_request(success)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_facade.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(config_class=DevelopmentConfig):
+    return HBnBAsgi(create_app(config_class))
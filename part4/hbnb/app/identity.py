@@ -0,0 +1,91 @@
+"""Identity of the authenticated caller, built once per request from the JWT.
+
+Ownership and admin checks only compare ids with the token claims, so they
+never load the user. Revoked tokens are looked up in TokenDenylist, which
+answers from an in-process LRU before asking its store.
+"""
+import time
+from flask import g
+from flask_jwt_extended import get_jwt
+from app.persistence.cache import LocalCache
+from app.persistence.denylist import MemoryDenylistStore, SQLDenylistStore
+
+
+class Identity:
+    """Caller of the current request: user id, admin flag and token id."""
+    __slots__ = ('user_id', 'is_admin', 'jti')
+
+    def __init__(self, claims):
+        self.user_id = str(claims['sub'])
+        self.is_admin = bool(claims.get('is_admin', False))
+        self.jti = claims.get('jti')
+
+    def owns(self, owner_id):
+        return owner_id is not None and str(owner_id) == self.user_id
+
+    def can_edit(self, owner_id):
+        """Owners and admins may modify an object."""
+        return self.is_admin or self.owns(owner_id)
+
+
+def current_identity():
+    """Return the Identity of the request (after @jwt_required)."""
+    identity = g.get('identity')
+    if identity is None:
+        identity = g.identity = Identity(get_jwt())
+    return identity
+
+
+class TokenDenylist:
+    """Revoked token ids (jti), remembered until the token would expire.
+
+    Entries are kept in a DenylistStore ('memory' or 'sql', from
+    JWT_DENYLIST_STORE). Answers are also kept in an in-process LRU for
+    JWT_DENYLIST_CACHE_TTL seconds, so most requests do not reach the SQL
+    store; with several processes a revocation is seen by the others
+    after at most that delay.
+    """
+
+    def __init__(self, app=None):
+        self.default_ttl = 30 * 24 * 3600
+        self.cache_ttl = 5
+        self.store = MemoryDenylistStore()
+        self.cache = LocalCache()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        kind = app.config.get('JWT_DENYLIST_STORE', 'memory')
+        sweep_interval = app.config.get('JWT_DENYLIST_SWEEP_INTERVAL', 60)
+        if kind == 'sql':
+            self.store = SQLDenylistStore(sweep_interval)
+        elif kind == 'memory':
+            self.store = MemoryDenylistStore(sweep_interval)
+        else:
+            raise ValueError("Unknown JWT_DENYLIST_STORE: {}".format(kind))
+        self.cache = LocalCache(app.config.get('JWT_DENYLIST_SIZE', 10000))
+        self.cache_ttl = app.config.get('JWT_DENYLIST_CACHE_TTL', self.cache_ttl)
+        self.default_ttl = app.config.get('JWT_DENYLIST_TTL', self.default_ttl)
+
+    def revoke(self, jti, expires_at=None):
+        """Deny jti; expires_at is the token 'exp' claim (None for tokens that never expire)."""
+        now = time.time()
+        if expires_at is None:
+            expires_at = now + self.default_ttl
+        if expires_at <= now:
+            return
+        self.store.add(jti, expires_at)
+        self.cache.set(jti, True, min(self.cache_ttl, expires_at - now))
+
+    def is_revoked(self, jti):
+        revoked = self.cache.get(jti)
+        if revoked is None:
+            revoked = self.store.contains(jti)
+            self.cache.set(jti, revoked, self.cache_ttl)
+        return revoked
+
+    def purge_expired(self):
+        return self.store.purge_expired()
+
+
+token_denylist = TokenDenylist()
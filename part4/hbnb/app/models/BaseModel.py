@@ -1,4 +1,6 @@
 from app.Extensions import db, bcrypt
+from app.persistence import unit_of_work
+from app.serializers import serializer_for
 import uuid
 from datetime import datetime
 
@@ -10,13 +12,17 @@ class BaseModel(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def save(self):
-        """Update the updated_at timestamp and commit."""
+        """Update the updated_at timestamp and commit (or flush inside a unit of work)."""
         self.updated_at = datetime.utcnow()
         db.session.add(self)
-        db.session.commit()
+        unit_of_work.commit()
+
+    def to_dict(self):
+        """Dict of the fields listed in __serialize__ (compiled serializer)."""
+        return serializer_for(type(self)).to_dict(self)
 
     def update(self, data):
-        """Update attributes based on a dictionary and commit."""
+        """Update attributes based on a dictionary and save."""
         for key, value in data.items():
             if hasattr(self, key):
                 setattr(self, key, value)
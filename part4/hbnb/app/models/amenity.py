@@ -9,6 +9,14 @@ class Amenity(BaseModel, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
 
+    __serialize__ = ('id', 'name')
+
+    __table_args__ = (
+        # names are unique regardless of case
+        db.Index('uq_amenity_name_lower', db.func.lower(name), unique=True),
+        db.Index('ix_amenities_created_at_id', 'created_at', 'id'),
+    )
+
     def __init__(self, name):
 
         super().__init__()
@@ -23,12 +31,6 @@ class Amenity(BaseModel, db.Model):
         self.name = name
 
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-        }
-
     def __str__(self):
 
         return "Amenity(id={}, name={})".format(self.id, self.name)
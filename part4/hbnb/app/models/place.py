@@ -1,25 +1,49 @@
+from sqlalchemy import case, event
+from sqlalchemy.ext.hybrid import hybrid_property
 from app.models.BaseModel import BaseModel
 from app import db
+from app.persistence import geo
 
 # Association table between place and amenities
 place_amenity = db.Table(
     'place_amenity',
     db.Column('place_id', db.Integer, db.ForeignKey('places.id'), primary_key=True),
-    db.Column('amenity_id', db.Integer, db.ForeignKey('amenities.id'), primary_key=True)
+    # place_id est couvert par la clé primaire, amenity_id a besoin de son index
+    db.Column('amenity_id', db.Integer, db.ForeignKey('amenities.id'), primary_key=True, index=True)
 )
 
 
 class Place(BaseModel, db.Model):
     __tablename__ = 'places'
+    __table_args__ = (
+        db.Index('ix_places_created_at_id', 'created_at', 'id'),  # pagination par curseur
+        # places d'un propriétaire, déjà dans l'ordre de la liste (created_at, id)
+        db.Index('ix_places_owner_id_created_at', 'owner_id', 'created_at', 'id'),
+        db.Index('ix_places_rating_average_id', 'rating_average', 'id'),  # sort=rating
+    )
 
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(500))
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Float, nullable=False, index=True)  # filtres / tri par prix
     latitude = db.Column(db.Float)
     longitude = db.Column(db.Float)
+    # Geohash of (latitude, longitude), kept up to date on every write
+    geohash = db.Column(db.String(12), index=True)
+
+    # Review aggregates maintained by the facade on every review write
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Mean rating, 0 without reviews: stored so that sort=rating reads an index
+    rating_average = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
 
     # Relation One-to-Many : a User can have Places
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    owner = db.relationship('User', lazy=True)
+
+    __serialize__ = ('id', 'title', 'description', 'price', 'latitude', 'longitude', 'owner_id',
+                     'created_at', 'updated_at')
+    # Champs modifiables par un client : agrégats, geohash et dates sont tenus par l'application
+    __editable__ = ('title', 'description', 'price', 'latitude', 'longitude', 'amenities')
 
     # Relation Many-to-Many : a Place can have many Amenities
     amenities = db.relationship(
@@ -36,14 +60,7 @@ class Place(BaseModel, db.Model):
     def __init__(self, title, description, price, latitude, longitude, owner_id, amenities=None):
         super().__init__()
 
-        if not title or len(title) > 100:
-            raise ValueError("Title is required and must be 100 characters max.")
-        if price <= 0:
-            raise ValueError("Price must be positive.")
-        if not (-90 <= latitude <= 90):
-            raise ValueError("Latitude must be between -90 and 90.")
-        if not (-180 <= longitude <= 180):
-            raise ValueError("Longitude must be between -180 and 180.")
+        Place.validate(title, price, latitude, longitude)
         if not owner_id:
             raise ValueError("Place must have an owner (User).")
 
@@ -54,20 +71,43 @@ class Place(BaseModel, db.Model):
         self.longitude = longitude
         self.owner_id = owner_id
         self.amenities = amenities or []
+        self.review_count = 0
+        self.rating_sum = 0
+        self.rating_average = 0.0
+
+    @hybrid_property
+    def average_rating(self):
+        """Mean rating, None without reviews (also usable in queries)."""
+        if not self.review_count:
+            return None
+        return self.rating_sum / self.review_count
 
-    
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'price': self.price,
-            'latitude': self.latitude,
-            'longitude': self.longitude,
-            'owner_id': self.owner_id,
-            'created_at': self.created_at,
-            'updated_at': self.updated_at
-        }
+    @average_rating.inplace.expression
+    @classmethod
+    def _average_rating_expression(cls):
+        return case((cls.review_count > 0, cls.rating_sum * 1.0 / cls.review_count), else_=None)
+
+    @staticmethod
+    def validate(title, price, latitude, longitude):
+        """Raise ValueError if one of the place values is invalid."""
+        if not title or len(title) > 100:
+            raise ValueError("Title is required and must be 100 characters max.")
+        if price is None or price <= 0:
+            raise ValueError("Price must be positive.")
+        if latitude is None or not (-90 <= latitude <= 90):
+            raise ValueError("Latitude must be between -90 and 90.")
+        if longitude is None or not (-180 <= longitude <= 180):
+            raise ValueError("Longitude must be between -180 and 180.")
 
     def __repr__(self):
         return f"<Place {self.title}>"
+
+
+@event.listens_for(Place, 'before_insert')
+@event.listens_for(Place, 'before_update')
+def set_geohash(mapper, connection, place):
+    """Recompute the indexed geohash whenever a place is written."""
+    if place.latitude is None or place.longitude is None:
+        place.geohash = None
+    else:
+        place.geohash = geo.encode(place.latitude, place.longitude)
@@ -4,13 +4,20 @@ from app import db
 
 class Review(BaseModel, db.Model):
     __tablename__ = "reviews"
+    __table_args__ = (
+        # one review per user per place, also used for the lookups by user_id
+        db.Index('uq_review_user_place', 'user_id', 'place_id', unique=True),
+        db.Index('ix_reviews_created_at_id', 'created_at', 'id'),
+    )
     text = db.Column(db.String(1024), nullable=False)
     rating = db.Column(db.Integer, nullable=False, default=5)
 
     # add two foreign key link to user_id and place_id
 
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    place_id = db.Column(db.Integer, db.ForeignKey('places.id'), nullable=False)
+    place_id = db.Column(db.Integer, db.ForeignKey('places.id'), nullable=False, index=True)
+
+    __serialize__ = ('id', 'user_id', 'place_id', 'text', 'rating')
 
 
     def __init__(self, user_id, place_id, text, rating=5, **kwargs):
@@ -27,16 +34,6 @@ class Review(BaseModel, db.Model):
         self.text = text
         self.rating = rating
 
-    def to_dict(self):
-
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "place_id": self.place_id,
-            "text": self.text,
-            "rating": self.rating,
-        }
-
     def __str__(self):
         return "Review(id={}, rating={}, place_id={}, user_id={})".format(
             self.id, self.rating, self.place_id, self.user_id)
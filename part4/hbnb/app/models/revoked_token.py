@@ -0,0 +1,9 @@
+from app.Extensions import db
+
+
+class RevokedToken(db.Model):
+    """Denylisted JWT id, kept until the token would have expired."""
+    __tablename__ = "revoked_tokens"
+
+    jti = db.Column(db.String(36), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
@@ -1,9 +1,12 @@
 from app.models.BaseModel import BaseModel
-from app.Extensions import db, bcrypt
+from app.Extensions import db, password_hasher
 import uuid
 
 class User(BaseModel):
     __tablename__ = "users"
+    __table_args__ = (
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
 
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
@@ -11,21 +14,17 @@ class User(BaseModel):
     password = db.Column(db.String(128), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
 
+    # le mot de passe n'est jamais sérialisé
+    __serialize__ = ('id', 'first_name', 'last_name', 'email', 'is_admin', 'created_at', 'updated_at')
+    # Champs modifiables par un admin (le mot de passe a son propre chemin)
+    __editable__ = ('first_name', 'last_name', 'email', 'is_admin')
+
     #_emails = set()
 
     def __init__(self, first_name, last_name, email, password, is_admin=False):
         super().__init__()
 
-        if not first_name or len(first_name) > 50:
-            raise ValueError("first_name is required and must be <= 50 characters")
-
-        if not last_name or len(last_name) > 50:
-            raise ValueError("last_name is required and must be <= 50 characters")
-        if not email or len(email) > 100:
-            raise ValueError("email is required and must be <= 100 characters")
-
-        if '@' not in email or '.' not in email.split('@')[-1]:
-            raise ValueError("email must be a valid email address")
+        User.validate(first_name, last_name, email)
 
         """if email in User._email:
             raise ValueError("email must be unique")
@@ -42,21 +41,26 @@ class User(BaseModel):
         self.is_admin = is_admin
         self.hash_password(password)
 
+    @staticmethod
+    def validate(first_name, last_name, email):
+        """Raise ValueError if one of the user values is invalid."""
+        if not first_name or len(first_name) > 50:
+            raise ValueError("first_name is required and must be <= 50 characters")
+        if not last_name or len(last_name) > 50:
+            raise ValueError("last_name is required and must be <= 50 characters")
+        if not email or len(email) > 100:
+            raise ValueError("email is required and must be <= 100 characters")
+        if '@' not in email or '.' not in email.split('@')[-1]:
+            raise ValueError("email must be a valid email address")
+
     def hash_password(self, password):
-            """Hashes the password before storing it."""
-            self.password = bcrypt.generate_password_hash(password).decode('utf-8')
+            """Hashes the password before storing it (in the bcrypt worker pool)."""
+            self.password = password_hasher.hash(password)
 
     def verify_password(self, password):
             """Verifies if the provided password matches the hashed password."""
-            return bcrypt.check_password_hash(self.password, password)
-
-    def to_dict(self):
-        return {
-        "id": str(self.id),
-        "first_name": self.first_name,
-        "last_name": self.last_name,
-        "email": self.email,
-        "is_admin": self.is_admin,
-        "created_at": self.created_at.isoformat() if hasattr(self, 'created_at') else None,
-        "updated_at": self.updated_at.isoformat() if hasattr(self, 'updated_at') else None
-    }
+            return password_hasher.verify(self.password, password)
+
+    def password_needs_rehash(self):
+            """True when the stored hash uses another cost than BCRYPT_LOG_ROUNDS."""
+            return password_hasher.needs_rehash(self.password)
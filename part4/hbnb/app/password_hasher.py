@@ -0,0 +1,119 @@
+"""Bcrypt hashing on a dedicated, bounded pool of worker threads.
+
+This is a concurrency limiter: at most `workers` hashes run at once, so a
+login storm cannot put every CPU on bcrypt, and the pool accepts at most
+workers + queue_size jobs. Beyond that PasswordHasherBusy is raised
+(returned as 503 by the API) instead of queueing without limit.
+
+hash() and verify() still block the calling request thread until the job
+is done; only the asyncio variants (ASGI mode) free their caller while
+waiting. metrics() is served by GET /api/v1/admin/metrics.
+"""
+import asyncio
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full."""
+
+
+class PasswordHasher:
+    """Hash and check passwords with a Flask-Bcrypt instance, in the pool."""
+    def __init__(self, bcrypt, app=None):
+        self.bcrypt = bcrypt
+        self.rounds = 12
+        self._executor = None
+        self._slots = None
+        self._lock = Lock()
+        self._queued = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        if app is not None:
+            self.init_app(app)
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 2
+        self.queue_size = app.config.get('PASSWORD_HASH_QUEUE_SIZE', 64)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        self._slots = BoundedSemaphore(self.workers + self.queue_size)
+
+    def _after_fork(self):
+        # Les threads du pool ne survivent pas au fork (flask serve) : nouveau pool dans le worker
+        if self._executor is not None:
+            self._lock = Lock()
+            self._queued = self._running = 0
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+            self._slots = BoundedSemaphore(self.workers + self.queue_size)
+
+    def _submit(self, fn, *args):
+        """Queue fn(*args) in the pool and return its Future."""
+        if self._executor is None:
+            # Pas d'application initialisée (scripts) : calcul direct
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy("Too many password operations in progress, retry later")
+        with self._lock:
+            self._queued += 1
+
+        def job():
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self.completed += 1
+                self._slots.release()
+
+        return self._executor.submit(job)
+
+    def _run(self, fn, *args):
+        return self._submit(fn, *args).result()
+
+    def hash(self, password):
+        """Return the bcrypt hash of password at the configured cost."""
+        return self._run(self._hash, password)
+
+    def verify(self, hashed, password):
+        return self._run(self.bcrypt.check_password_hash, hashed, password)
+
+    # Variantes asyncio : la boucle d'événements attend le pool sans être bloquée
+    async def hash_async(self, password):
+        return await asyncio.wrap_future(self._submit(self._hash, password))
+
+    async def verify_async(self, hashed, password):
+        return await asyncio.wrap_future(self._submit(self.bcrypt.check_password_hash, hashed, password))
+
+    def needs_rehash(self, hashed):
+        """True when hashed was made with another cost than the configured one."""
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+    def metrics(self):
+        """Pool size, jobs waiting and running now, totals since the start of the process."""
+        with self._lock:
+            return {
+                'workers': getattr(self, 'workers', 0),
+                'queue_depth': self._queued,
+                'running': self._running,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
+    def _hash(self, password):
+        return self.bcrypt.generate_password_hash(password, self.rounds).decode('utf-8')
@@ -0,0 +1,24 @@
+from sqlalchemy import func
+from app.models.amenity import Amenity
+from app.persistence.replicas import replica_read
+from app.persistence.repository import InMemoryRepository, SQLAlchemyRepository
+
+
+class AmenityRepository(SQLAlchemyRepository):
+    def __init__(self):
+        super().__init__(Amenity)
+
+    @replica_read
+    def get_by_name(self, name):
+        """Case-insensitive lookup, served by the uq_amenity_name_lower index."""
+        return self.model.query.filter(func.lower(Amenity.name) == name.lower()).first()
+
+
+class InMemoryAmenityRepository(InMemoryRepository):
+    """In-memory amenities with a unique case-insensitive index on name,
+    like the uq_amenity_name_lower index of the SQL table."""
+    def __init__(self):
+        super().__init__(indexes={'name': {'unique': True, 'key': str.lower}})
+
+    def get_by_name(self, name):
+        return self.get_by_attribute('name', name)
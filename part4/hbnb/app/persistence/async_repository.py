@@ -0,0 +1,160 @@
+"""Async counterparts of the SQLAlchemy repositories, for the ASGI mode (app/asgi.py).
+
+They run the statements of the synchronous repositories (page_statement,
+search_statement, ...) on an AsyncSession, SQLAlchemy asyncio over
+aiosqlite. Relationships are loaded with raiseload: an attribute that
+was not loaded eagerly raises instead of doing blocking IO.
+
+Needs the optional dependencies: pip install "sqlalchemy[asyncio]" aiosqlite
+"""
+from flask import g
+from sqlalchemy import select
+from sqlalchemy.orm import raiseload
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app import db
+from app.models.user import User
+from app.models.place import Place
+from app.models.review import Review
+from app.models.amenity import Amenity
+from app.persistence.place_repository import detail_statement, search_statement
+from app.persistence.repository import (collection_version_statement, page_statement, split_page,
+                                        version_from_row)
+from app.persistence.sqlite_pragmas import apply_pragmas
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+
+class AsyncDatabase:
+    """Async engine, and the AsyncSession of the current request kept in g."""
+
+    def __init__(self):
+        self.engine = None
+        self._sessionmaker = None
+
+    def init_app(self, app):
+        url = app.config.get('ASYNC_DATABASE_URI')
+        if not url:
+            # même base que l'application synchrone (chemin SQLite déjà résolu par Flask-SQLAlchemy)
+            with app.app_context():
+                url = db.engine.url
+            if url.drivername not in ASYNC_DRIVERS:
+                raise RuntimeError("Set ASYNC_DATABASE_URI for the '{}' database".format(url.drivername))
+            if url.database in (None, '', ':memory:'):
+                raise RuntimeError("The ASGI mode needs a database file, not an in-memory database")
+            url = url.set(drivername=ASYNC_DRIVERS[url.drivername])
+        self.engine = create_async_engine(url, **app.config.get('ASYNC_ENGINE_OPTIONS', {}))
+        apply_pragmas(self.engine.sync_engine, app.config.get('SQLITE_PRAGMAS'))
+        # expire_on_commit=False : les objets restent lisibles après le commit, sans IO
+        self._sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    @property
+    def session(self):
+        session = g.get('async_session')
+        if session is None:
+            session = g.async_session = self._sessionmaker()
+        return session
+
+    async def end(self, success=True):
+        """Commit (or roll back) and close the session of the request, if one was opened."""
+        session = g.pop('async_session', None)
+        if session is None:
+            return
+        try:
+            if success:
+                await session.commit()
+            else:
+                await session.rollback()
+        finally:
+            await session.close()
+
+    async def dispose(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+
+
+async_db = AsyncDatabase()
+
+
+class AsyncRepository:
+    """Reads of SQLAlchemyRepository, awaited. Writes go through the WSGI app."""
+
+    def __init__(self, model):
+        self.model = model
+
+    async def get(self, obj_id):
+        return await async_db.session.get(self.model, obj_id, options=[raiseload('*')])
+
+    async def get_all(self):
+        return (await async_db.session.scalars(select(self.model).options(raiseload('*')))).all()
+
+    async def get_page(self, limit, cursor=None, fields=None):
+        rows = (await async_db.session.scalars(page_statement(self.model, limit, cursor, fields))).all()
+        return split_page(rows, limit)
+
+    async def get_by_attribute(self, attr_name, attr_value):
+        statement = select(self.model).options(raiseload('*')).filter_by(**{attr_name: attr_value})
+        return (await async_db.session.scalars(statement.limit(1))).first()
+
+    async def find_all_by_attribute(self, attr_name, attr_value):
+        statement = select(self.model).options(raiseload('*')).filter_by(**{attr_name: attr_value})
+        return (await async_db.session.scalars(statement)).all()
+
+    async def update(self, obj_id, data):
+        obj = await self.get(obj_id)
+        if not obj:
+            return None
+        for key, value in data.items():
+            setattr(obj, key, value)
+        await async_db.session.flush()
+        return obj
+
+    async def collection_version(self):
+        if async_db.engine.dialect.name != 'sqlite':
+            return None
+        result = await async_db.session.execute(collection_version_statement(self.model))
+        return version_from_row(result.first())
+
+
+class AsyncUserRepository(AsyncRepository):
+    def __init__(self):
+        super().__init__(User)
+
+    async def get_user_by_email(self, email):
+        return await self.get_by_attribute('email', email)
+
+
+class AsyncPlaceRepository(AsyncRepository):
+    def __init__(self):
+        super().__init__(Place)
+
+    async def exists(self, place_id):
+        statement = select(Place.id).where(Place.id == place_id).limit(1)
+        return (await async_db.session.execute(statement)).first() is not None
+
+    async def get_detail(self, place_id):
+        """(place, review_count, average_rating) with owner and amenities loaded, or None."""
+        place = (await async_db.session.scalars(detail_statement(place_id))).unique().first()
+        if place is None:
+            return None
+        return place, place.review_count, place.average_rating
+
+    async def search(self, query, limit=None, cursor=None, fields=None):
+        statement = search_statement(query, cursor, fields)
+        if limit is None:
+            return (await async_db.session.scalars(statement)).all(), None
+        rows = (await async_db.session.scalars(statement.limit(limit + 1))).all()
+        page = rows[:limit]
+        return page, query.encode_cursor(page[-1]) if len(rows) > limit else None
+
+
+class AsyncReviewRepository(AsyncRepository):
+    def __init__(self):
+        super().__init__(Review)
+
+    async def get_by_place(self, place_id):
+        return await self.find_all_by_attribute('place_id', place_id)
+
+
+class AsyncAmenityRepository(AsyncRepository):
+    def __init__(self):
+        super().__init__(Amenity)
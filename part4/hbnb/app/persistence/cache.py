@@ -0,0 +1,241 @@
+"""Read-through cache for Repository.get.
+
+CachedRepository wraps any Repository. Objects read with get() are kept in
+a CacheBackend and dropped again on update/delete. For SQLAlchemy
+repositories only the column values are cached: ORM instances belong to the
+session of the request that loaded them, so a hit is turned back into an
+instance of the current session with merge(load=False), without a query.
+
+Only rows read on the primary fill the cache: a replica may still have the
+version that a write just invalidated, which would then be served for the
+whole ttl.
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+import pickle
+import time
+
+from sqlalchemy.orm import make_transient_to_detached
+from app import db
+from app.persistence import unit_of_work
+from app.persistence.replicas import reading_replica
+from app.persistence.repository import Repository, SQLAlchemyRepository
+
+
+class CacheBackend(ABC):
+    """Storage used by CachedRepository (in-process, or shared like Redis)."""
+
+    @abstractmethod
+    def get(self, key):
+        """Return the cached value or None."""
+        pass
+
+    @abstractmethod
+    def set(self, key, value, ttl):
+        pass
+
+    @abstractmethod
+    def delete(self, key):
+        pass
+
+
+class LocalCache(CacheBackend):
+    """Thread-safe in-process LRU cache with a time to live per entry."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class FakeSharedCache(CacheBackend):
+    """Local stand-in for a shared cache server, for tests.
+
+    Values are pickled like a network backend would do, so code that only
+    works with live objects fails here too.
+    """
+
+    def __init__(self):
+        self._data = {}
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        return pickle.loads(payload)
+
+    def set(self, key, value, ttl):
+        self._data[key] = (pickle.dumps(value), time.monotonic() + ttl)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+
+class CachedRepository(Repository):
+    """Repository decorator adding a read-through cache to get()."""
+
+    def __init__(self, repo, backend, ttl=60, prefix=None):
+        self.repo = repo
+        self.backend = backend
+        self.ttl = ttl
+        model = getattr(repo, 'model', None)
+        self.prefix = prefix or (model.__tablename__ if model is not None else type(repo).__name__)
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name):
+        # Repository specific helpers (get_user_by_email, get_in_bbox...) are not cached
+        if name == 'repo':
+            raise AttributeError(name)
+        return getattr(self.repo, name)
+
+    def _key(self, obj_id):
+        return "{}:{}".format(self.prefix, obj_id)
+
+    def _is_sql(self):
+        return isinstance(self.repo, SQLAlchemyRepository)
+
+    def _dump(self, obj):
+        if not self._is_sql():
+            return obj
+        return {attr.key: getattr(obj, attr.key) for attr in obj.__mapper__.column_attrs}
+
+    def _load(self, value):
+        if not self._is_sql():
+            return value
+        obj = self.repo.model.__mapper__.class_manager.new_instance()
+        for key, column_value in value.items():
+            setattr(obj, key, column_value)
+        make_transient_to_detached(obj)
+        return db.session.merge(obj, load=False)
+
+    def invalidate(self, obj_id):
+        """Drop obj_id now and again after commit, in case another request
+        cached the old row in between."""
+        key = self._key(obj_id)
+        self.backend.delete(key)
+        unit_of_work.after_commit(lambda: self.backend.delete(key))
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def _cacheable(self):
+        # Uncommitted values must not leak to other requests, nor lagging replica rows
+        return not unit_of_work.has_pending_writes() and not reading_replica()
+
+    def get(self, obj_id):
+        value = self.backend.get(self._key(obj_id))
+        if value is not None:
+            self.hits += 1
+            return self._load(value)
+        self.misses += 1
+        obj = self.repo.get(obj_id)
+        if obj is not None and self._cacheable():
+            self.backend.set(self._key(obj_id), self._dump(obj), self.ttl)
+        return obj
+
+    def get_many(self, obj_ids):
+        obj_ids = list(obj_ids)
+        found = {}
+        to_fetch = []
+        for obj_id in obj_ids:
+            value = self.backend.get(self._key(obj_id))
+            if value is not None:
+                self.hits += 1
+                found[str(obj_id)] = self._load(value)
+            elif obj_id not in to_fetch:
+                self.misses += 1
+                to_fetch.append(obj_id)
+        if to_fetch:
+            fetched, _ = self.repo.get_many(to_fetch)
+            cacheable = self._cacheable()
+            for obj in fetched:
+                found[str(obj.id)] = obj
+                if cacheable:
+                    self.backend.set(self._key(obj.id), self._dump(obj), self.ttl)
+        objs, missing = [], []
+        for obj_id in obj_ids:
+            obj = found.get(str(obj_id))
+            if obj is None:
+                missing.append(obj_id)
+            else:
+                objs.append(obj)
+        return objs, missing
+
+    def add(self, obj):
+        return self.repo.add(obj)
+
+    def get_all(self):
+        return self.repo.get_all()
+
+    def iter_all(self, batch_size=1000):
+        return self.repo.iter_all(batch_size)
+
+    def get_page(self, limit, cursor=None, fields=None):
+        return self.repo.get_page(limit, cursor, fields)
+
+    def get_by_attribute(self, attr_name, attr_value):
+        return self.repo.get_by_attribute(attr_name, attr_value)
+
+    def find_all_by_attribute(self, attr_name, attr_value):
+        return self.repo.find_all_by_attribute(attr_name, attr_value)
+
+    def update(self, obj_id, data):
+        self.invalidate(obj_id)
+        return self.repo.update(obj_id, data)
+
+    def delete(self, obj_id):
+        self.invalidate(obj_id)
+        return self.repo.delete(obj_id)
+
+    def touch_if_unmodified(self, obj_id, updated_at):
+        self.invalidate(obj_id)
+        return self.repo.touch_if_unmodified(obj_id, updated_at)
+
+    def collection_version(self):
+        return self.repo.collection_version()
+
+    def add_many(self, objs, batch_size=500):
+        return self.repo.add_many(objs, batch_size)
+
+    def update_many(self, updates, batch_size=500):
+        for obj_id in updates:
+            self.invalidate(obj_id)
+        return self.repo.update_many(updates, batch_size)
+
+    def delete_many(self, obj_ids, batch_size=500):
+        obj_ids = list(obj_ids)
+        for obj_id in obj_ids:
+            self.invalidate(obj_id)
+        return self.repo.delete_many(obj_ids, batch_size)
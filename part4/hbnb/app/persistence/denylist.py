@@ -0,0 +1,105 @@
+"""Storage of revoked token ids (jti) for TokenDenylist.
+
+Both stores answer contains() with one hash / primary key lookup, whatever
+the number of revoked tokens, and forget entries once the token expired.
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from threading import Lock
+import heapq
+import time
+
+from app import db
+from app.models.revoked_token import RevokedToken
+from app.persistence import unit_of_work
+
+
+class DenylistStore(ABC):
+    @abstractmethod
+    def add(self, jti, expires_at):
+        """Deny jti until expires_at (unix timestamp)."""
+        pass
+
+    @abstractmethod
+    def contains(self, jti):
+        pass
+
+    @abstractmethod
+    def purge_expired(self):
+        """Drop expired entries, return how many were removed."""
+        pass
+
+
+class MemoryDenylistStore(DenylistStore):
+    """Dict jti -> expiry, swept at most every sweep_interval seconds.
+
+    A heap ordered by expiry lets a sweep stop at the first live entry.
+    """
+
+    def __init__(self, sweep_interval=60):
+        self.sweep_interval = sweep_interval
+        self._expiry = {}
+        self._heap = []
+        self._next_sweep = 0
+        self._lock = Lock()
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._expiry[jti] = expires_at
+            heapq.heappush(self._heap, (expires_at, jti))
+        self._maybe_sweep()
+
+    def contains(self, jti):
+        self._maybe_sweep()
+        expires_at = self._expiry.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def _maybe_sweep(self):
+        if time.monotonic() >= self._next_sweep:
+            self.purge_expired()
+
+    def purge_expired(self):
+        now = time.time()
+        removed = 0
+        with self._lock:
+            self._next_sweep = time.monotonic() + self.sweep_interval
+            while self._heap and self._heap[0][0] <= now:
+                expires_at, jti = heapq.heappop(self._heap)
+                # jti may have been revoked again with a later expiry
+                if self._expiry.get(jti) == expires_at:
+                    del self._expiry[jti]
+                    removed += 1
+        return removed
+
+    def __len__(self):
+        return len(self._expiry)
+
+
+class SQLDenylistStore(DenylistStore):
+    """revoked_tokens table: primary key lookups, purge through the expires_at index.
+
+    A revocation also purges the expired rows, at most every sweep_interval
+    seconds per process.
+    """
+
+    def __init__(self, sweep_interval=60):
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0
+
+    def add(self, jti, expires_at):
+        db.session.merge(RevokedToken(jti=jti, expires_at=datetime.utcfromtimestamp(expires_at)))
+        unit_of_work.commit()
+        if time.monotonic() >= self._next_sweep:
+            self.purge_expired()
+
+    def contains(self, jti):
+        row = db.session.get(RevokedToken, jti)
+        return row is not None and row.expires_at > datetime.utcnow()
+
+    def purge_expired(self):
+        self._next_sweep = time.monotonic() + self.sweep_interval
+        result = db.session.execute(
+            db.delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow())
+        )
+        unit_of_work.commit()
+        return result.rowcount
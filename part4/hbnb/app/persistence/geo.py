@@ -0,0 +1,162 @@
+"""Geohash helpers used to index and search places by position."""
+from bisect import bisect_left, insort
+from math import asin, cos, floor, radians, sin, sqrt
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# Precision stored on every place (~4.8m x 4.8m cells)
+GEOHASH_PRECISION = 9
+# Above this many cells a coarser precision is used for the search
+MAX_CELLS = 32
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Return the geohash of a point."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """Return (lat_height, lon_width) in degrees of a geohash cell."""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres."""
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(a))
+
+
+def radius_to_bbox(latitude, longitude, radius_km):
+    """Return the (min_lon, min_lat, max_lon, max_lat) box around a circle."""
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    min_lat = max(latitude - d_lat, -90.0)
+    max_lat = min(latitude + d_lat, 90.0)
+    if min_lat == -90.0 or max_lat == 90.0:
+        return -180.0, min_lat, 180.0, max_lat
+    widest = max(abs(min_lat), abs(max_lat))
+    d_lon = radius_km / (KM_PER_DEGREE_LAT * cos(radians(widest)))
+    if d_lon >= 180.0:
+        return -180.0, min_lat, 180.0, max_lat
+    return longitude - d_lon, min_lat, longitude + d_lon, max_lat
+
+
+def split_bbox(bbox):
+    """Split a box crossing the antimeridian into boxes within [-180, 180]."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    if min_lon < -180.0:
+        return [(min_lon + 360.0, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lon, max_lat)]
+    if max_lon > 180.0:
+        return [(min_lon, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lon - 360.0, max_lat)]
+    if min_lon > max_lon:
+        return [(min_lon, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lon, max_lat)]
+    return [bbox]
+
+
+def in_bbox(latitude, longitude, bbox):
+    return any(b[0] <= longitude <= b[2] and b[1] <= latitude <= b[3] for b in split_bbox(bbox))
+
+
+def prefix_end(prefix):
+    """Smallest string greater than every geohash starting with prefix."""
+    return prefix + '~'
+
+
+def _cell_ranges(bbox, precision):
+    lat_h, lon_w = cell_size(precision)
+    ranges = []
+    for min_lon, min_lat, max_lon, max_lat in split_bbox(bbox):
+        lat_cells = range(floor((min_lat + 90.0) / lat_h), floor((min(max_lat, 89.999999) + 90.0) / lat_h) + 1)
+        lon_cells = range(floor((min_lon + 180.0) / lon_w), floor((min(max_lon, 179.999999) + 180.0) / lon_w) + 1)
+        ranges.append((lat_cells, lon_cells))
+    return ranges
+
+
+def covering_prefixes(bbox, max_precision=GEOHASH_PRECISION):
+    """Return the geohash prefixes of the cells covering bbox.
+
+    The finest precision whose cover stays under MAX_CELLS cells is used,
+    so a search only touches the index entries near the area asked for.
+    """
+    for precision in range(max_precision, 0, -1):
+        ranges = _cell_ranges(bbox, precision)
+        if sum(len(la) * len(lo) for la, lo in ranges) <= MAX_CELLS:
+            break
+    lat_h, lon_w = cell_size(precision)
+    prefixes = set()
+    for lat_cells, lon_cells in ranges:
+        for i in lat_cells:
+            for j in lon_cells:
+                prefixes.add(encode(-90.0 + (i + 0.5) * lat_h, -180.0 + (j + 0.5) * lon_w, precision))
+    return sorted(prefixes)
+
+
+class GeohashIndex:
+    """In-memory spatial index: geohash cell -> ids, with cells kept sorted.
+
+    Cells are stored at a fixed precision and kept in a sorted list so that
+    the cells under a search prefix are found with two bisections.
+    """
+
+    def __init__(self, precision=6):
+        self.precision = precision
+        self._cells = {}
+        self._sorted_cells = []
+        self._cell_of = {}
+
+    def add(self, obj_id, latitude, longitude):
+        self.remove(obj_id)
+        if latitude is None or longitude is None:
+            return
+        cell = encode(latitude, longitude, self.precision)
+        if cell not in self._cells:
+            self._cells[cell] = set()
+            insort(self._sorted_cells, cell)
+        self._cells[cell].add(obj_id)
+        self._cell_of[obj_id] = cell
+
+    def remove(self, obj_id):
+        cell = self._cell_of.pop(obj_id, None)
+        if cell is None:
+            return
+        ids = self._cells[cell]
+        ids.discard(obj_id)
+        if not ids:
+            del self._cells[cell]
+            del self._sorted_cells[bisect_left(self._sorted_cells, cell)]
+
+    def candidates(self, bbox):
+        """Return the ids stored in cells that may intersect bbox."""
+        ids = set()
+        for prefix in covering_prefixes(bbox, self.precision):
+            start = bisect_left(self._sorted_cells, prefix)
+            end = bisect_left(self._sorted_cells, prefix_end(prefix), start)
+            for cell in self._sorted_cells[start:end]:
+                ids |= self._cells[cell]
+        return ids
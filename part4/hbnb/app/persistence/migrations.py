@@ -0,0 +1,172 @@
+"""Schema revisions for databases created before a model change.
+
+db.create_all() only creates missing tables. Columns and indexes added to
+existing tables are applied here, in order, and recorded in the
+schema_revisions table. Every step is idempotent so it is also safe on a
+database that create_all() just built.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.persistence import geo
+
+
+def _add_column(conn, table, column, ddl):
+    if column not in {c['name'] for c in inspect(conn).get_columns(table)}:
+        conn.execute(text(ddl))
+
+
+def _rev_0001_place_geohash(conn):
+    _add_column(conn, 'places', 'geohash', 'ALTER TABLE places ADD COLUMN geohash VARCHAR(12)')
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_places_geohash ON places (geohash)'))
+    rows = conn.execute(text(
+        'SELECT id, latitude, longitude FROM places '
+        'WHERE geohash IS NULL AND latitude IS NOT NULL AND longitude IS NOT NULL'
+    )).fetchall()
+    if rows:
+        conn.execute(
+            text('UPDATE places SET geohash = :geohash WHERE id = :id'),
+            [{'id': r.id, 'geohash': geo.encode(r.latitude, r.longitude)} for r in rows]
+        )
+
+
+def _rev_0002_lookup_indexes(conn):
+    # Fails on existing duplicates: clean duplicated reviews or amenity names first
+    for ddl in (
+        'CREATE INDEX IF NOT EXISTS ix_places_owner_id ON places (owner_id)',
+        'CREATE INDEX IF NOT EXISTS ix_places_created_at_id ON places (created_at, id)',
+        'CREATE INDEX IF NOT EXISTS ix_reviews_place_id ON reviews (place_id)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS uq_review_user_place ON reviews (user_id, place_id)',
+        'CREATE INDEX IF NOT EXISTS ix_reviews_created_at_id ON reviews (created_at, id)',
+        'CREATE INDEX IF NOT EXISTS ix_place_amenity_amenity_id ON place_amenity (amenity_id)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS uq_amenity_name_lower ON amenities (lower(name))',
+        'CREATE INDEX IF NOT EXISTS ix_amenities_created_at_id ON amenities (created_at, id)',
+        'CREATE INDEX IF NOT EXISTS ix_users_created_at_id ON users (created_at, id)',
+    ):
+        conn.execute(text(ddl))
+
+
+def _rev_0003_place_rating_aggregates(conn):
+    _add_column(conn, 'places', 'review_count', 'ALTER TABLE places ADD COLUMN review_count INTEGER NOT NULL DEFAULT 0')
+    _add_column(conn, 'places', 'rating_sum', 'ALTER TABLE places ADD COLUMN rating_sum INTEGER NOT NULL DEFAULT 0')
+    conn.execute(text(
+        'UPDATE places SET '
+        'review_count = (SELECT COUNT(*) FROM reviews WHERE reviews.place_id = places.id), '
+        'rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM reviews WHERE reviews.place_id = places.id)'
+    ))
+
+
+def _rev_0004_place_price_index(conn):
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_places_price ON places (price)'))
+
+
+def _rev_0005_places_fts(conn):
+    # Full-text index on SQLite builds compiled with FTS5, LIKE search otherwise
+    if conn.dialect.name != 'sqlite':
+        return
+    try:
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS places_fts USING fts5("
+            "title, description, content='places', content_rowid='rowid', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        ))
+    except OperationalError:
+        return
+    # only title / description changes reindex a place, not the rating updates
+    for ddl in (
+        "CREATE TRIGGER IF NOT EXISTS places_fts_insert AFTER INSERT ON places BEGIN "
+        "INSERT INTO places_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS places_fts_delete AFTER DELETE ON places BEGIN "
+        "INSERT INTO places_fts(places_fts, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS places_fts_update AFTER UPDATE OF title, description ON places BEGIN "
+        "INSERT INTO places_fts(places_fts, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); "
+        "INSERT INTO places_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END",
+    ):
+        conn.execute(text(ddl))
+    conn.execute(text("INSERT INTO places_fts(places_fts) VALUES ('rebuild')"))
+
+
+# collection -> tables whose writes change its list responses
+VERSIONED_COLLECTIONS = {
+    'users': ('users',),
+    'places': ('places', 'place_amenity'),
+    'reviews': ('reviews',),
+    'amenities': ('amenities',),
+}
+
+
+def _rev_0006_collection_versions(conn):
+    # Version counter per collection, bumped by triggers on every write (ETag of the lists)
+    if conn.dialect.name != 'sqlite':
+        return
+    conn.execute(text(
+        'CREATE TABLE IF NOT EXISTS collection_versions '
+        '(name VARCHAR(32) PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0, '
+        'updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)'
+    ))
+    for name, tables in VERSIONED_COLLECTIONS.items():
+        conn.execute(text('INSERT OR IGNORE INTO collection_versions (name) VALUES (:name)'), {'name': name})
+        for table in tables:
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN "
+                    f"UPDATE collection_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP "
+                    f"WHERE name = '{name}'; END"
+                ))
+
+
+def _rev_0007_place_owner_created_at_index(conn):
+    # Owner filter + default sort without a temporary B-tree; covers the owner_id lookups too
+    conn.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_places_owner_id_created_at ON places (owner_id, created_at, id)'))
+    conn.execute(text('DROP INDEX IF EXISTS ix_places_owner_id'))
+
+
+def _rev_0008_place_rating_average(conn):
+    # Stored mean rating: the computed sum / count of sort=rating could not use an index
+    _add_column(conn, 'places', 'rating_average',
+                "ALTER TABLE places ADD COLUMN rating_average FLOAT NOT NULL DEFAULT '0'")
+    conn.execute(text(
+        'UPDATE places SET rating_average = '
+        'CASE WHEN review_count > 0 THEN rating_sum * 1.0 / review_count ELSE 0.0 END'
+    ))
+    conn.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_places_rating_average_id ON places (rating_average, id)'))
+
+
+REVISIONS = [
+    ('0001_place_geohash', _rev_0001_place_geohash),
+    ('0002_lookup_indexes', _rev_0002_lookup_indexes),
+    ('0003_place_rating_aggregates', _rev_0003_place_rating_aggregates),
+    ('0004_place_price_index', _rev_0004_place_price_index),
+    ('0005_places_fts', _rev_0005_places_fts),
+    ('0006_collection_versions', _rev_0006_collection_versions),
+    ('0007_place_owner_created_at_index', _rev_0007_place_owner_created_at_index),
+    ('0008_place_rating_average', _rev_0008_place_rating_average),
+]
+
+
+def upgrade():
+    """Apply the revisions missing from the current database."""
+    applied_now = []
+    with db.engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_revisions '
+            '(id VARCHAR(64) PRIMARY KEY, applied_at DATETIME DEFAULT CURRENT_TIMESTAMP)'
+        ))
+        applied = {row[0] for row in conn.execute(text('SELECT id FROM schema_revisions'))}
+        for revision, apply in REVISIONS:
+            if revision in applied:
+                continue
+            apply(conn)
+            conn.execute(text('INSERT INTO schema_revisions (id) VALUES (:id)'), {'id': revision})
+            applied_now.append(revision)
+    return applied_now
+
+
+def migrate():
+    """Create the missing tables (primary database only), then upgrade(); returns the revisions applied."""
+    db.create_all(bind_key=None)
+    return upgrade()
@@ -0,0 +1,66 @@
+"""Filters and ordering of a place listing, shared by the place repositories.
+
+PlaceRepository.search compiles a PlaceQuery into one SQL statement,
+InMemoryPlaceRepository.search answers it with set operations on its
+secondary indexes. Both return the same rows in the same order and use the
+same keyset cursor, built on (sort value, id).
+"""
+from datetime import datetime
+import base64
+import json
+
+SORTS = ('price', 'created_at', 'rating', 'review_count')
+# Colonne stockée de chaque tri (rating : moyenne dénormalisée, 0.0 sans avis)
+SORT_COLUMNS = {'rating': 'rating_average'}
+
+
+class PlaceQuery:
+    """min_price / max_price bound the price, amenity_ids keeps the places
+    having all of them (match_all) or any of them, sort is one of SORTS with
+    an optional '-' for descending. Places without reviews sort as rating 0.
+    """
+
+    def __init__(self, min_price=None, max_price=None, amenity_ids=None, match_all=True,
+                 owner_id=None, sort='created_at'):
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise ValueError("min_price must be lower than max_price")
+        self.sort_key = (sort or 'created_at').lstrip('-')
+        if self.sort_key not in SORTS:
+            raise ValueError("sort must be one of: " + ", ".join(SORTS + tuple('-' + s for s in SORTS)))
+        self.descending = bool(sort) and sort.startswith('-')
+        self.min_price = min_price
+        self.max_price = max_price
+        self.amenity_ids = list(dict.fromkeys(amenity_ids or []))
+        self.match_all = match_all
+        self.owner_id = owner_id
+
+    @property
+    def sort_column(self):
+        return SORT_COLUMNS.get(self.sort_key, self.sort_key)
+
+    def sort_value(self, place):
+        """Value of place for the sort key: the stored column of the SQL ORDER BY."""
+        return getattr(place, self.sort_column)
+
+    def columns(self, fields):
+        """Columns of a page restricted to fields: those plus the ones of the cursor."""
+        return {'id', self.sort_column} | set(fields)
+
+    def encode_cursor(self, place):
+        value = self.sort_value(place)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        raw = json.dumps([self.sort_key, value, place.id])
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor):
+        """Return the (sort value, id) position stored in a cursor of the same sort."""
+        try:
+            sort_key, value, obj_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            if sort_key != self.sort_key:
+                raise ValueError
+            if sort_key == 'created_at':
+                value = datetime.fromisoformat(value)
+            return value, obj_id
+        except (ValueError, TypeError, UnicodeError):
+            raise ValueError("Invalid cursor")
@@ -0,0 +1,264 @@
+import heapq
+from types import SimpleNamespace
+from sqlalchemy import and_, case, func, literal, or_, select, text
+from sqlalchemy.orm import joinedload, lazyload, load_only
+from app import db
+from app.models.place import Place, place_amenity
+from app.models.review import Review
+from app.persistence import geo, text_search, unit_of_work
+from app.persistence.replicas import replica_read
+from app.persistence.repository import InMemoryRepository, SQLAlchemyRepository
+
+
+def sort_expression(query):
+    # sort=rating lit rating_average, indexée avec id (ix_places_rating_average_id)
+    return getattr(Place, query.sort_column)
+
+
+def detail_statement(place_id):
+    """SELECT of a place with its owner and amenities joined (rows need .unique())."""
+    return (
+        select(Place)
+        .options(joinedload(Place.owner), joinedload(Place.amenities))
+        .where(Place.id == place_id)
+    )
+
+
+def search_statement(query, cursor=None, fields=None):
+    """SELECT of the places matching a PlaceQuery, in its sort order, without limit.
+
+    With fields, only those columns are loaded (plus the ones of the cursor).
+    """
+    statement = select(Place).options(lazyload('*'))
+    if fields:
+        statement = statement.options(load_only(*[getattr(Place, c) for c in query.columns(fields)]))
+    if query.min_price is not None:
+        statement = statement.where(Place.price >= query.min_price)
+    if query.max_price is not None:
+        statement = statement.where(Place.price <= query.max_price)
+    if query.owner_id is not None:
+        statement = statement.where(Place.owner_id == query.owner_id)
+    if query.amenity_ids:
+        matching = select(place_amenity.c.place_id).where(place_amenity.c.amenity_id.in_(query.amenity_ids))
+        if query.match_all:
+            matching = matching.group_by(place_amenity.c.place_id).having(
+                func.count() == len(query.amenity_ids))
+        statement = statement.where(Place.id.in_(matching))
+
+    key = sort_expression(query)
+    if cursor:
+        value, obj_id = query.decode_cursor(cursor)
+        if query.descending:
+            statement = statement.where(or_(key < value, and_(key == value, Place.id < obj_id)))
+        else:
+            statement = statement.where(or_(key > value, and_(key == value, Place.id > obj_id)))
+    if query.descending:
+        return statement.order_by(key.desc(), Place.id.desc())
+    return statement.order_by(key, Place.id)
+
+
+class PlaceRepository(SQLAlchemyRepository):
+    def __init__(self):
+        super().__init__(Place)
+
+    @replica_read
+    def exists(self, place_id):
+        return db.session.query(Place.id).filter_by(id=place_id).first() is not None
+
+    @replica_read
+    def get_detail(self, place_id):
+        """Load a place with its owner and amenities in one query.
+
+        Returns (place, review_count, average_rating) or None; the review
+        aggregates are stored on the place, the reviews are not read.
+        """
+        place = db.session.scalars(detail_statement(place_id)).unique().first()
+        if place is None:
+            return None
+        return place, place.review_count, place.average_rating
+
+    @replica_read
+    def search(self, query, limit=None, cursor=None, fields=None):
+        """Run a PlaceQuery in one SQL statement.
+
+        Returns (places, next_cursor); next_cursor is None on the last page
+        or without limit.
+        """
+        statement = search_statement(query, cursor, fields)
+        if limit is None:
+            return db.session.scalars(statement).all(), None
+        rows = db.session.scalars(statement.limit(limit + 1)).all()
+        page = rows[:limit]
+        return page, query.encode_cursor(page[-1]) if len(rows) > limit else None
+
+    def has_fts(self):
+        """True when the database has the places_fts full-text table (SQLite FTS5)."""
+        bind = db.session.get_bind()
+        if bind.dialect.name != 'sqlite':
+            return False
+        return db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'places_fts'")
+        ).first() is not None
+
+    @replica_read
+    def search_text(self, q, limit, cursor=None):
+        """Places matching the words of q, best first, as ([(place, score)], next_cursor).
+
+        Ranked with FTS5 bm25 when available; otherwise every word is looked
+        up with LIKE in the title and description and all scores are 0.
+        """
+        if self.has_fts():
+            score = 'bm25(places_fts, {}, {})'.format(*text_search.PLACE_WEIGHTS)
+            sql = ('SELECT places.id AS id, {score} AS score FROM places_fts '
+                   'JOIN places ON places.rowid = places_fts.rowid '
+                   'WHERE places_fts MATCH :match').format(score=score)
+            params = {'match': text_search.fts5_match(q), 'limit': limit + 1}
+            if cursor:
+                params['score'], params['id'] = text_search.decode_cursor(cursor)
+                sql += ' AND ({0} > :score OR ({0} = :score AND places.id > :id))'.format(score)
+            sql += ' ORDER BY score, places.id LIMIT :limit'
+            rows = db.session.execute(text(sql), params).all()
+        else:
+            terms, prefix = text_search.parse_query(q)
+            query = db.session.query(Place.id, literal(0.0))
+            for word in terms + [prefix]:
+                pattern = '%{}%'.format(word)
+                query = query.filter(or_(Place.title.ilike(pattern), Place.description.ilike(pattern)))
+            if cursor:
+                query = query.filter(Place.id > text_search.decode_cursor(cursor)[1])
+            rows = query.order_by(Place.id).limit(limit + 1).all()
+
+        page = rows[:limit]
+        places = {str(p.id): p for p in self.get_many([r[0] for r in page])[0]}
+        results = [(places[str(r[0])], r[1]) for r in page if str(r[0]) in places]
+        next_cursor = text_search.encode_cursor(page[-1][1], page[-1][0]) if len(rows) > limit else None
+        return results, next_cursor
+
+    def rebuild_text_index(self):
+        """Rebuild places_fts from the places table (e.g. after a VACUUM renumbered the rowids)."""
+        if self.has_fts():
+            db.session.execute(text("INSERT INTO places_fts(places_fts) VALUES ('rebuild')"))
+            unit_of_work.commit()
+
+    def rebuild_rating_aggregates(self):
+        """Recompute review_count / rating_sum / rating_average of every place from the reviews table."""
+        count = select(func.count(Review.id)).where(Review.place_id == Place.id).scalar_subquery()
+        total = select(func.coalesce(func.sum(Review.rating), 0)).where(Review.place_id == Place.id).scalar_subquery()
+        result = db.session.execute(db.update(Place).values(review_count=count, rating_sum=total))
+        db.session.execute(db.update(Place).values(rating_average=case(
+            (Place.review_count > 0, Place.rating_sum * 1.0 / Place.review_count), else_=0.0)))
+        unit_of_work.commit()
+        return result.rowcount
+
+    @replica_read
+    def get_in_bbox(self, bbox):
+        """Places inside bbox, found through the indexed geohash column."""
+        cells = or_(*[
+            and_(Place.geohash >= prefix, Place.geohash < geo.prefix_end(prefix))
+            for prefix in geo.covering_prefixes(bbox)
+        ])
+        query = self.model.query.options(lazyload('*')).filter(cells)
+        return [p for p in query if geo.in_bbox(p.latitude, p.longitude, bbox)]
+
+
+class InMemoryPlaceRepository(InMemoryRepository):
+    """In-memory place storage with a geohash spatial index.
+
+    price (ordered) and owner_id are indexed, as well as the amenity ids of
+    each place, so search() works on sets of ids instead of scanning.
+    """
+    def __init__(self):
+        super().__init__(indexes={'price': {'ordered': True}, 'owner_id': {}})
+        self._geo_index = geo.GeohashIndex()
+        self._text_index = text_search.InvertedIndex(text_search.PLACE_FIELDS, text_search.PLACE_WEIGHTS)
+        self._by_amenity = {}
+        self._amenities_of = {}
+
+    def _index_amenities(self, obj):
+        self._unindex_amenities(obj.id)
+        amenity_ids = {a.id for a in (getattr(obj, 'amenities', None) or [])}
+        for amenity_id in amenity_ids:
+            self._by_amenity.setdefault(amenity_id, set()).add(obj.id)
+        self._amenities_of[obj.id] = amenity_ids
+
+    def _unindex_amenities(self, obj_id):
+        for amenity_id in self._amenities_of.pop(obj_id, ()):
+            ids = self._by_amenity[amenity_id]
+            ids.discard(obj_id)
+            if not ids:
+                del self._by_amenity[amenity_id]
+
+    def add(self, obj):
+        super().add(obj)
+        self._geo_index.add(obj.id, obj.latitude, obj.longitude)
+        self._index_amenities(obj)
+        self._text_index.add(obj.id, obj)
+
+    def update(self, obj_id, data):
+        super().update(obj_id, data)
+        obj = self.get(obj_id)
+        if obj:
+            self._geo_index.add(obj.id, obj.latitude, obj.longitude)
+            self._index_amenities(obj)
+            self._text_index.add(obj.id, obj)
+
+    def delete(self, obj_id):
+        super().delete(obj_id)
+        self._geo_index.remove(obj_id)
+        self._unindex_amenities(obj_id)
+        self._text_index.remove(obj_id)
+
+    def get_in_bbox(self, bbox):
+        places = (self._storage[i] for i in self._geo_index.candidates(bbox))
+        return [p for p in places if geo.in_bbox(p.latitude, p.longitude, bbox)]
+
+    def search(self, query, limit=None, cursor=None, fields=None):
+        """Same results as PlaceRepository.search, from intersections of index sets.
+
+        With fields, the places are returned as projections holding the same
+        columns as the SQL load_only (plus their cursor columns).
+        """
+        ids = None
+        if query.min_price is not None or query.max_price is not None:
+            ids = set(self._indexes['price'].find_range(query.min_price, query.max_price))
+        if query.owner_id is not None:
+            owned = self._indexes['owner_id'].find(query.owner_id)
+            ids = set(owned) if ids is None else ids & owned
+        if query.amenity_ids:
+            sets = [self._by_amenity.get(a, set()) for a in query.amenity_ids]
+            matching = set.intersection(*sets) if query.match_all else set.union(*sets)
+            ids = matching if ids is None else ids & matching
+        places = self._storage.values() if ids is None else [self._storage[i] for i in ids]
+
+        rows = ((query.sort_value(p), p.id, p) for p in places)
+        if cursor:
+            position = query.decode_cursor(cursor)
+            if query.descending:
+                rows = (r for r in rows if r[:2] < position)
+            else:
+                rows = (r for r in rows if r[:2] > position)
+        key = lambda r: r[:2]
+        if limit is None:
+            return self._project([r[2] for r in sorted(rows, key=key, reverse=query.descending)],
+                                 query, fields), None
+        # only the page (and one more row) is kept sorted: O(n log limit)
+        select_top = heapq.nlargest if query.descending else heapq.nsmallest
+        rows = select_top(limit + 1, rows, key=key)
+        page = [r[2] for r in rows[:limit]]
+        next_cursor = query.encode_cursor(page[-1]) if len(rows) > limit else None
+        return self._project(page, query, fields), next_cursor
+
+    @staticmethod
+    def _project(places, query, fields):
+        if not fields:
+            return places
+        columns = query.columns(fields)
+        return [SimpleNamespace(**{c: getattr(p, c) for c in columns}) for p in places]
+
+    def search_text(self, q, limit, cursor=None):
+        """Same contract as PlaceRepository.search_text, from the inverted index."""
+        position = text_search.decode_cursor(cursor) if cursor else None
+        results = self._text_index.search(q, limit + 1, position)
+        page = results[:limit]
+        next_cursor = text_search.encode_cursor(*page[-1]) if len(results) > limit else None
+        return [(self._storage[doc_id], score) for score, doc_id in page], next_cursor
@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import db
+
+
+class QueryCounter:
+    """Collects the SQL statements and commits sent to the database."""
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries():
+    """Count the statements executed inside the block (needs an app context)."""
+    counter = QueryCounter()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    def on_commit(conn):
+        counter.commits += 1
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'commit', on_commit)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        event.remove(engine, 'commit', on_commit)
+
+
+@contextmanager
+def assert_max_queries(max_count):
+    """Fail when the block needs more than max_count round trips.
+
+    Usage in tests:
+        with app.app_context(), assert_max_queries(2):
+            client.get('/api/v1/places/<id>')
+    """
+    with count_queries() as counter:
+        yield counter
+    if counter.count > max_count:
+        raise AssertionError("Expected at most {} queries, got {}:\n{}".format(
+            max_count, counter.count, '\n'.join(counter.statements)))
@@ -0,0 +1,22 @@
+from app import db
+
+
+def explain(query):
+    """Return the SQLite EXPLAIN QUERY PLAN lines of an ORM query or a select()."""
+    statement = getattr(query, 'statement', query)
+    compiled = statement.compile(dialect=db.engine.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup or ())
+    with db.engine.connect() as conn:
+        rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def assert_uses_index(query, index_name):
+    """Fail when the plan of query does not go through index_name.
+
+    Usage in tests:
+        assert_uses_index(Review.query.filter_by(place_id=pid), 'ix_reviews_place_id')
+    """
+    plan = explain(query)
+    if not any(index_name in line for line in plan):
+        raise AssertionError("Query does not use {}:\n{}".format(index_name, '\n'.join(plan)))
@@ -0,0 +1,130 @@
+"""Read replicas: repository reads on a replica, everything else on the primary.
+
+READ_REPLICAS names binds of SQLALCHEMY_BINDS. The repository reads
+(methods decorated with @replica_read) of a request go to one replica,
+chosen round-robin among the healthy ones; writes and every other query
+go to the primary. After the first write of a request, and for the whole
+of a POST/PUT/PATCH/DELETE request, reads stay on the primary, which has
+the changes of the request: read-your-writes.
+
+A replica whose query fails is skipped for REPLICA_RETRY_AFTER seconds,
+then pinged before it gets traffic again; the failed read is retried on
+the primary.
+"""
+import logging
+import time
+from functools import wraps
+from itertools import count
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def wrote():
+    """True once this request (app context) has written: flush, DML or repository commit."""
+    return g.get('db_wrote') or g.get('uow_dirty')
+
+
+def reading_replica():
+    """True when the repository reads of this request are served by a replica."""
+    return has_app_context() and bool(g.get('read_replica')) and not wrote()
+
+
+class RoutingSession(Session):
+    """db.session: the replica of the request inside @replica_read, the primary otherwise."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            if self._flushing or isinstance(clause, UpdateBase):
+                g.db_wrote = True
+            elif g.get('replica_bind') and not wrote():
+                return self._db.engines[g.replica_bind]
+        return super().get_bind(mapper, clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """Round-robin over the replicas, skipping the ones that failed."""
+
+    def __init__(self):
+        self.replicas = []
+        self.retry_after = 30
+        self._down_until = {}
+        self._turn = count()
+
+    def init_app(self, app):
+        self.replicas = list(app.config.get('READ_REPLICAS', []))
+        self.retry_after = app.config.get('REPLICA_RETRY_AFTER', 30)
+        self._down_until = {}
+
+    def pick(self):
+        """Bind key of the replica for the reads of this request, None for the primary."""
+        if not self.replicas or not has_app_context() or wrote():
+            return None
+        if has_request_context() and request.method not in SAFE_METHODS:
+            return None
+        # Un seul replica par requête : lectures et ETag cohérents entre eux
+        if 'read_replica' not in g:
+            g.read_replica = self._next_healthy()
+        return g.read_replica
+
+    def _next_healthy(self):
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            key = self.replicas[next(self._turn) % len(self.replicas)]
+            down_until = self._down_until.get(key)
+            if down_until is None:
+                return key
+            if down_until > now:
+                continue
+            if self.ping(key):
+                self._down_until.pop(key, None)
+                logger.warning("Replica %s is back", key)
+                return key
+            self._down_until[key] = now + self.retry_after
+        return None
+
+    def ping(self, key):
+        try:
+            with current_app.extensions['sqlalchemy'].engines[key].connect() as connection:
+                connection.execute(text('SELECT 1'))
+            return True
+        except OperationalError:
+            return False
+
+    def mark_down(self, key):
+        logger.warning("Replica %s failed, reads go elsewhere for %ss", key, self.retry_after)
+        self._down_until[key] = time.monotonic() + self.retry_after
+
+
+replica_router = ReplicaRouter()
+
+
+def replica_read(method):
+    """Run a repository read on the replica of the request, if it has one."""
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        key = replica_router.pick()
+        if key is None or g.get('replica_bind'):
+            return method(*args, **kwargs)
+        g.replica_bind = key
+        try:
+            return method(*args, **kwargs)
+        except OperationalError:
+            session = current_app.extensions['sqlalchemy'].session
+            if session.new or session.dirty or session.deleted:
+                raise
+            replica_router.mark_down(key)
+            # Transaction sans écriture : on la recommence sur le primary
+            session.rollback()
+            g.read_replica = None
+            g.replica_bind = None
+            return method(*args, **kwargs)
+        finally:
+            g.replica_bind = None
+    return wrapper
@@ -1,5 +1,74 @@
 from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+import base64
+import json
+from sqlalchemy import and_, or_, select, text, update
+from sqlalchemy.orm import load_only, lazyload
 from app import db
+from app.persistence import unit_of_work
+from app.persistence.replicas import replica_read
+
+
+def encode_cursor(obj):
+    """Encode the (created_at, id) keyset position of obj as an opaque string."""
+    raw = json.dumps([obj.created_at.isoformat(), obj.id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor into (created_at, id)."""
+    try:
+        created_at, obj_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(created_at), obj_id
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+def page_statement(model, limit, cursor=None, fields=None):
+    """SELECT of the page after cursor, ordered by (created_at, id).
+
+    One extra row is fetched so that split_page() knows whether another
+    page exists. Shared by the sync and the async repositories.
+    """
+    statement = select(model).options(lazyload('*'))
+    if fields:
+        columns = {'id', 'created_at'} | set(fields)
+        statement = statement.options(load_only(*[getattr(model, f) for f in columns]))
+    if cursor:
+        created_at, obj_id = decode_cursor(cursor)
+        statement = statement.where(or_(
+            model.created_at > created_at,
+            and_(model.created_at == created_at, model.id > obj_id)
+        ))
+    return statement.order_by(model.created_at, model.id).limit(limit + 1)
+
+
+def split_page(rows, limit):
+    """(page, next_cursor) from the limit + 1 rows of page_statement()."""
+    page = rows[:limit]
+    return page, encode_cursor(page[-1]) if len(rows) > limit else None
+
+
+def collection_version_statement(model):
+    return text('SELECT version, updated_at FROM collection_versions WHERE name = :name').bindparams(
+        name=model.__tablename__)
+
+
+def version_from_row(row):
+    """(version, last_modified) from a collection_versions row, None if missing."""
+    if row is None:
+        return None
+    return row.version, datetime.fromisoformat(row.updated_at)
+
+
+def is_unique_violation(error):
+    """True if an IntegrityError comes from a UNIQUE constraint, not a NOT NULL or foreign key one."""
+    orig = error.orig
+    name = getattr(orig, 'sqlite_errorname', None)
+    if name is not None:
+        return name == 'SQLITE_CONSTRAINT_UNIQUE'
+    return getattr(orig, 'pgcode', None) == '23505' or 'unique' in str(orig).lower()
+
 
 class Repository(ABC):
     @abstractmethod
@@ -10,10 +79,24 @@ class Repository(ABC):
     def get(self, obj_id):
         pass
 
+    @abstractmethod
+    def get_many(self, obj_ids):
+        """Return (objects in the order of obj_ids, ids that were not found)."""
+        pass
+
     @abstractmethod
     def get_all(self):
         pass
 
+    def iter_all(self, batch_size=1000):
+        """Iterate over all objects; SQL repositories fetch them batch_size rows at a time."""
+        return iter(self.get_all())
+
+    @abstractmethod
+    def get_page(self, limit, cursor=None, fields=None):
+        """Return (objects, next_cursor) ordered by (created_at, id)."""
+        pass
+
     @abstractmethod
     def update(self, obj_id, data):
         pass
@@ -22,36 +105,236 @@ class Repository(ABC):
     def delete(self, obj_id):
         pass
 
+    @abstractmethod
+    def touch_if_unmodified(self, obj_id, updated_at):
+        """Bump updated_at of obj_id only if it still equals updated_at.
+
+        Returns False when the object was changed since it was read
+        (optimistic concurrency for If-Match).
+        """
+        pass
+
+    def collection_version(self):
+        """(version, last_modified) changing with every write, None if not tracked."""
+        return None
+
     @abstractmethod
     def get_by_attribute(self, attr_name, attr_value):
         pass
 
+    @abstractmethod
+    def find_all_by_attribute(self, attr_name, attr_value):
+        pass
+
+    @abstractmethod
+    def add_many(self, objs, batch_size=500):
+        pass
+
+    @abstractmethod
+    def update_many(self, updates, batch_size=500):
+        """updates maps obj_id -> dict of new values."""
+        pass
+
+    @abstractmethod
+    def delete_many(self, obj_ids, batch_size=500):
+        pass
+
+
+# Copiée telle quelle dans part2/hbnb (projet autonome), à modifier aux deux endroits
+class AttributeIndex:
+    """Secondary index on one attribute of the objects of an InMemoryRepository.
+
+    Values are hashed to the set of ids holding them. unique=True refuses a
+    second object with the same value, ordered=True also keeps the distinct
+    values sorted for range queries and key normalizes values (e.g. str.lower).
+    """
+    def __init__(self, attr_name, unique=False, ordered=False, key=None):
+        self.attr_name = attr_name
+        self.unique = unique
+        self.ordered = ordered
+        self.key = key
+        self._ids = {}
+        self._value_of = {}
+        self._sorted = []
+
+    def normalize(self, value):
+        if self.key is not None and value is not None:
+            return self.key(value)
+        return value
+
+    def check(self, obj_id, value):
+        """Raise ValueError if obj_id cannot take value in a unique index."""
+        value = self.normalize(value)
+        if not self.unique or value is None:
+            return
+        ids = self._ids.get(value)
+        if ids and ids != {obj_id}:
+            raise ValueError("{} '{}' already exists".format(self.attr_name, value))
+
+    def add(self, obj_id, value):
+        self.remove(obj_id)
+        value = self.normalize(value)
+        ids = self._ids.get(value)
+        if ids is None:
+            ids = self._ids[value] = set()
+            if self.ordered and value is not None:
+                insort(self._sorted, value)
+        ids.add(obj_id)
+        self._value_of[obj_id] = value
+
+    def remove(self, obj_id):
+        # Use the value recorded at indexing time: the object may have changed since
+        if obj_id not in self._value_of:
+            return
+        value = self._value_of.pop(obj_id)
+        ids = self._ids[value]
+        ids.discard(obj_id)
+        if not ids:
+            del self._ids[value]
+            if self.ordered and value is not None:
+                del self._sorted[bisect_left(self._sorted, value)]
+
+    def find(self, value):
+        return self._ids.get(self.normalize(value), ())
+
+    def find_range(self, low=None, high=None):
+        """Ids whose value is between low and high (inclusive), in value order."""
+        if not self.ordered:
+            raise ValueError("Index on '{}' is not ordered".format(self.attr_name))
+        start = 0 if low is None else bisect_left(self._sorted, self.normalize(low))
+        end = len(self._sorted) if high is None else bisect_right(self._sorted, self.normalize(high))
+        for value in self._sorted[start:end]:
+            yield from self._ids[value]
+
 
 class InMemoryRepository(Repository):
-    def __init__(self):
+    def __init__(self, indexes=None):
+        """indexes maps an attribute name to AttributeIndex options,
+        e.g. {'email': {'unique': True}, 'price': {'ordered': True}}."""
         self._storage = {}
+        self._indexes = {}
+        self._version = 0
+        self._modified_at = datetime.utcnow()
+        for attr_name, options in (indexes or {}).items():
+            self.add_index(attr_name, **options)
+
+    def add_index(self, attr_name, unique=False, ordered=False, key=None):
+        """Declare a secondary index, built from the objects already stored."""
+        index = AttributeIndex(attr_name, unique, ordered, key)
+        for obj in self._storage.values():
+            index.check(obj.id, getattr(obj, attr_name, None))
+            index.add(obj.id, getattr(obj, attr_name, None))
+        self._indexes[attr_name] = index
+        return index
+
+    def _reindex(self, obj):
+        for attr_name, index in self._indexes.items():
+            index.add(obj.id, getattr(obj, attr_name, None))
+
+    def _bump_version(self):
+        self._version += 1
+        self._modified_at = datetime.utcnow()
 
     def add(self, obj):
+        for attr_name, index in self._indexes.items():
+            index.check(obj.id, getattr(obj, attr_name, None))
         self._storage[obj.id] = obj
+        self._reindex(obj)
+        self._bump_version()
 
     def get(self, obj_id):
         return self._storage.get(obj_id)
 
+    def get_many(self, obj_ids):
+        objs, missing = [], []
+        for obj_id in obj_ids:
+            obj = self._storage.get(obj_id)
+            if obj is None:
+                missing.append(obj_id)
+            else:
+                objs.append(obj)
+        return objs, missing
+
     def get_all(self):
         return list(self._storage.values())
 
+    def get_page(self, limit, cursor=None, fields=None):
+        objs = sorted(self._storage.values(), key=lambda o: (o.created_at, o.id))
+        if cursor:
+            position = decode_cursor(cursor)
+            objs = [o for o in objs if (o.created_at, o.id) > position]
+        page = objs[:limit]
+        next_cursor = encode_cursor(page[-1]) if len(objs) > limit else None
+        return page, next_cursor
+
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
+            for attr_name, index in self._indexes.items():
+                index.check(obj.id, data.get(attr_name, getattr(obj, attr_name, None)))
             obj.update(data)
+            self._reindex(obj)
+            self._bump_version()
 
     def delete(self, obj_id):
         if obj_id in self._storage:
             del self._storage[obj_id]
+            for index in self._indexes.values():
+                index.remove(obj_id)
+            self._bump_version()
+
+    def touch_if_unmodified(self, obj_id, updated_at):
+        obj = self.get(obj_id)
+        if obj is None or obj.updated_at != updated_at:
+            return False
+        obj.updated_at = datetime.utcnow()
+        self._bump_version()
+        return True
+
+    def collection_version(self):
+        return self._version, self._modified_at
 
     def get_by_attribute(self, attr_name, attr_value):
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            return next((self._storage[i] for i in index.find(attr_value)), None)
         return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
 
+    def find_all_by_attribute(self, attr_name, attr_value):
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            return [self._storage[i] for i in index.find(attr_value)]
+        return [obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value]
+
+    def find_by_range(self, attr_name, low=None, high=None):
+        """Objects whose attribute is between low and high, needs an ordered index."""
+        index = self._indexes.get(attr_name)
+        if index is None:
+            raise ValueError("No index on '{}'".format(attr_name))
+        return [self._storage[i] for i in index.find_range(low, high)]
+
+    def add_many(self, objs, batch_size=500):
+        for obj in objs:
+            self.add(obj)
+        return objs
+
+    def update_many(self, updates, batch_size=500):
+        updated = []
+        for obj_id, data in updates.items():
+            obj = self.get(obj_id)
+            if obj:
+                self.update(obj_id, data)
+                updated.append(obj)
+        return updated
+
+    def delete_many(self, obj_ids, batch_size=500):
+        deleted = 0
+        for obj_id in obj_ids:
+            if obj_id in self._storage:
+                self.delete(obj_id)
+                deleted += 1
+        return deleted
+
 class SQLAlchemyRepository(Repository):
     """Generic SQLAlchemy repository for CRUD operations."""
     def __init__(self, model):
@@ -59,31 +342,125 @@ class SQLAlchemyRepository(Repository):
 
     def add(self, obj):
         db.session.add(obj)
-        db.session.commit()
+        unit_of_work.commit()
         return obj
 
+    @replica_read
     def get(self, obj_id):
-        return self.model.query.get(obj_id)
+        return db.session.get(self.model, obj_id)
 
+    @replica_read
+    def get_many(self, obj_ids):
+        """Load all obj_ids with a single WHERE id IN (...) query."""
+        obj_ids = list(obj_ids)
+        if not obj_ids:
+            return [], []
+        # Ids from JSON or URLs may be strings even for integer keys
+        found = {str(obj.id): obj for obj in self.model.query.filter(self.model.id.in_(set(obj_ids)))}
+        objs, missing = [], []
+        for obj_id in obj_ids:
+            obj = found.get(str(obj_id))
+            if obj is None:
+                missing.append(obj_id)
+            else:
+                objs.append(obj)
+        return objs, missing
+
+    @replica_read
     def get_all(self):
         return self.model.query.all()
 
+    def iter_all(self, batch_size=1000):
+        # yield_per : les lignes arrivent par lots et ne restent pas en mémoire.
+        # Générateur : la requête part à la première ligne lue, donc après le
+        # commit de fin de requête quand la réponse est streamée.
+        statement = select(self.model).options(lazyload('*')).execution_options(yield_per=batch_size)
+        yield from db.session.scalars(statement)
+
+    @replica_read
+    def get_page(self, limit, cursor=None, fields=None):
+        """Keyset pagination on (created_at, id), loading only the requested columns."""
+        rows = db.session.scalars(page_statement(self.model, limit, cursor, fields)).all()
+        return split_page(rows, limit)
+
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if not obj:
             return None
         for key, value in data.items():
             setattr(obj, key, value)
-        db.session.commit()
+        unit_of_work.commit()
         return obj
 
     def delete(self, obj_id):
         obj = self.get(obj_id)
         if obj:
             db.session.delete(obj)
-            db.session.commit()
+            unit_of_work.commit()
             return True
         return False
 
+    def touch_if_unmodified(self, obj_id, updated_at):
+        """Compare-and-set in one UPDATE ... WHERE updated_at = :read.
+
+        The row stays locked until the end of the transaction, so the write
+        that follows cannot overwrite a concurrent change.
+        """
+        model = self.model
+        result = db.session.execute(
+            update(model)
+            .where(model.id == obj_id, model.updated_at == updated_at)
+            .values(updated_at=datetime.utcnow())
+        )
+        unit_of_work.commit()
+        return result.rowcount == 1
+
+    @replica_read
+    def collection_version(self):
+        """Counter of the table kept by triggers (migration 0006), SQLite only."""
+        if db.session.get_bind().dialect.name != 'sqlite':
+            return None
+        return version_from_row(db.session.execute(collection_version_statement(self.model)).first())
+
+    @replica_read
     def get_by_attribute(self, attr_name, attr_value):
         return self.model.query.filter_by(**{attr_name: attr_value}).first()
+
+    @replica_read
+    def find_all_by_attribute(self, attr_name, attr_value):
+        return self.model.query.filter_by(**{attr_name: attr_value}).all()
+
+    # -----------------------
+    # Bulk operations: one commit per batch instead of one per object
+    # (inside a request each batch is flushed and the request commits once)
+    # -----------------------
+    def add_many(self, objs, batch_size=500):
+        for start in range(0, len(objs), batch_size):
+            # The session groups the INSERTs of a flush into executemany batches
+            db.session.add_all(objs[start:start + batch_size])
+            unit_of_work.commit()
+        return objs
+
+    def update_many(self, updates, batch_size=500):
+        obj_ids = list(updates)
+        updated = []
+        for start in range(0, len(obj_ids), batch_size):
+            chunk = obj_ids[start:start + batch_size]
+            for obj in self.model.query.filter(self.model.id.in_(chunk)):
+                for key, value in updates[obj.id].items():
+                    setattr(obj, key, value)
+                updated.append(obj)
+            unit_of_work.commit()
+        return updated
+
+    def delete_many(self, obj_ids, batch_size=500):
+        obj_ids = list(obj_ids)
+        deleted = 0
+        for start in range(0, len(obj_ids), batch_size):
+            chunk = obj_ids[start:start + batch_size]
+            # ORM deletes so that association rows (place_amenity) are removed too
+            for obj in self.model.query.filter(self.model.id.in_(chunk)):
+                db.session.delete(obj)
+                deleted += 1
+            unit_of_work.commit()
+        return deleted
@@ -0,0 +1,11 @@
+from app.models.review import Review
+from app.persistence.replicas import replica_read
+from app.persistence.repository import SQLAlchemyRepository
+
+class ReviewRepository(SQLAlchemyRepository):
+    def __init__(self):
+        super().__init__(Review)
+
+    @replica_read
+    def get_by_place(self, place_id):
+        return self.model.query.filter_by(place_id=place_id).all()
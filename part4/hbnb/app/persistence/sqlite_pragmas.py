@@ -0,0 +1,47 @@
+"""PRAGMAs run on every new SQLite connection (SQLITE_PRAGMAS).
+
+With journal_mode=WAL readers are no longer blocked by a commit, nor the
+writer by readers; synchronous=NORMAL only syncs at checkpoints instead of
+at every commit. busy_timeout makes a writer wait for the lock instead of
+failing at once with "database is locked".
+
+The sqlite3 module only opens a transaction before the first INSERT /
+UPDATE / DELETE, not before a SAVEPOINT: a SAVEPOINT taken earlier would
+open it instead, and its RELEASE would commit everything (see
+unit_of_work). enable_savepoints opens the transaction first.
+"""
+from sqlalchemy import event
+from app import db
+
+
+def apply_pragmas(engine, pragmas):
+    """Run pragmas on each connection opened by engine (a synchronous Engine)."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute('PRAGMA {} = {}'.format(name, value))
+        cursor.close()
+
+
+def enable_savepoints(engine):
+    """BEGIN IMMEDIATE before a SAVEPOINT run outside a transaction (sqlite3 driver)."""
+    if engine.dialect.name != 'sqlite' or engine.dialect.driver != 'pysqlite':
+        return
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def begin_before_savepoint(conn, cursor, statement, parameters, context, executemany):
+        # IMMEDIATE : le bloc va écrire, il prend le verrou d'écriture (busy_timeout) dès maintenant
+        if statement.startswith('SAVEPOINT') and not conn.connection.dbapi_connection.in_transaction:
+            cursor.execute('BEGIN IMMEDIATE')
+
+
+def init_app(app):
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    with app.app_context():
+        for engine in db.engines.values():
+            apply_pragmas(engine, pragmas)
+            enable_savepoints(engine)
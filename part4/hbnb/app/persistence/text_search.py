@@ -0,0 +1,155 @@
+"""Full-text search helpers: tokenizer, BM25 inverted index and cursors.
+
+SQLite databases use an FTS5 table (places_fts, see migrations); the
+InvertedIndex below is the pure Python equivalent for the in-memory
+repositories. Both tokenize the same way (lower case, accents removed,
+split on anything that is not a letter or digit), require every query term,
+match the last term as a prefix, and rank with FTS5's BM25 formula: scores
+are negative, lower is better.
+"""
+from bisect import bisect_left, insort
+import base64
+import heapq
+import json
+import math
+import re
+import unicodedata
+
+K1 = 1.2
+B = 0.75
+# Ranking weight of (title, description)
+PLACE_FIELDS = ('title', 'description')
+PLACE_WEIGHTS = (10.0, 1.0)
+_WORD = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    """Split text into lower case, accent free terms (as FTS5 unicode61)."""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _WORD.findall(text.lower())
+
+
+def parse_query(q):
+    """Return (terms, prefix): every term is required, prefix applies to the last one."""
+    terms = tokenize(q)
+    if not terms:
+        raise ValueError("'q' must contain at least one word")
+    return terms[:-1], terms[-1]
+
+
+def fts5_match(q):
+    """FTS5 MATCH expression of q; terms are quoted so q cannot inject operators."""
+    terms, prefix = parse_query(q)
+    return ' '.join('"{}"'.format(t) for t in terms) + ' "{}"*'.format(prefix)
+
+
+def encode_cursor(score, obj_id):
+    raw = json.dumps([score, obj_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Return the (score, id) position of a search cursor."""
+    try:
+        score, obj_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return float(score), obj_id
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+
+class InvertedIndex:
+    """term -> {doc id: term frequency per field}, plus sorted terms for prefixes.
+
+    weights gives the weight of each field in the ranking (title counts more
+    than description, like bm25(places_fts, 10.0, 1.0)).
+    """
+
+    def __init__(self, fields, weights=None):
+        self.fields = tuple(fields)
+        self.weights = tuple(weights or (1.0,) * len(self.fields))
+        self._postings = {}
+        self._terms = []
+        self._doc_len = {}
+        self._doc_terms = {}
+        self._total_len = 0
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def add(self, doc_id, obj):
+        """(Re)index the fields of obj under doc_id."""
+        self.remove(doc_id)
+        counts = {}
+        length = 0
+        for position, field in enumerate(self.fields):
+            for term in tokenize(getattr(obj, field, None)):
+                tf = counts.setdefault(term, [0] * len(self.fields))
+                tf[position] += 1
+                length += 1
+        for term, tf in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[doc_id] = tf
+        self._doc_len[doc_id] = length
+        self._doc_terms[doc_id] = list(counts)
+        self._total_len += length
+
+    def remove(self, doc_id):
+        if doc_id not in self._doc_len:
+            return
+        for term in self._doc_terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+        self._total_len -= self._doc_len.pop(doc_id)
+
+    def _expand(self, prefix):
+        start = bisect_left(self._terms, prefix)
+        end = bisect_left(self._terms, prefix + '\uffff', start)
+        return self._terms[start:end]
+
+    def _phrase(self, terms):
+        """Merge the postings of terms (one phrase): doc id -> weighted frequency."""
+        merged = {}
+        for term in terms:
+            for doc_id, tf in self._postings.get(term, {}).items():
+                merged[doc_id] = merged.get(doc_id, 0) + sum(w * f for w, f in zip(self.weights, tf))
+        return merged
+
+    def search(self, q, limit=None, after=None):
+        """Return [(score, doc id)] matching q, best (lowest) score first.
+
+        after is the (score, doc id) of the previous page's last row; with
+        limit only that many rows are selected, not the whole result sorted.
+        """
+        terms, prefix = parse_query(q)
+        phrases = [self._phrase([t]) for t in terms] + [self._phrase(self._expand(prefix))]
+        phrases.sort(key=len)
+        if not phrases[0]:
+            return []
+        doc_ids = set(phrases[0]).intersection(*phrases[1:])
+        count = len(self._doc_len)
+        avg_len = self._total_len / count
+        doc_len = self._doc_len
+        norms = {d: K1 * (1 - B + B * doc_len[d] / avg_len) if avg_len else K1 for d in doc_ids}
+        scores = dict.fromkeys(doc_ids, 0.0)
+        for phrase in phrases:
+            # FTS5 clamps negative idf values to a tiny positive one
+            idf = max(math.log((count - len(phrase) + 0.5) / (len(phrase) + 0.5)), 1e-6)
+            factor = idf * (K1 + 1)
+            for doc_id in doc_ids:
+                tf = phrase[doc_id]
+                scores[doc_id] -= factor * tf / (tf + norms[doc_id])
+        results = ((score, doc_id) for doc_id, score in scores.items())
+        if after is not None:
+            results = (r for r in results if r > after)
+        if limit is None:
+            return sorted(results)
+        return heapq.nsmallest(limit, results)
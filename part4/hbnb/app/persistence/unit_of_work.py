@@ -0,0 +1,82 @@
+"""Unit of work: group every repository write of a request in one commit.
+
+Repositories call commit() after a write. Inside a transaction() block (and
+inside every HTTP request, see create_app) this only flushes, so ids and
+defaults are available, and the real COMMIT happens once when the
+outermost block ends. A nested block runs in a SAVEPOINT: when it fails,
+only its own writes are undone and the enclosing block goes on.
+"""
+from contextlib import contextmanager
+from flask import g, has_app_context
+from app import db
+
+
+def in_transaction():
+    return has_app_context() and g.get('uow_depth', 0) > 0
+
+
+def has_pending_writes():
+    """True when the open unit of work has flushed changes not yet committed."""
+    return in_transaction() and g.get('uow_dirty', False)
+
+
+def commit():
+    """Commit now, or only flush when a unit of work is open."""
+    if in_transaction():
+        db.session.flush()
+        g.uow_dirty = True
+    else:
+        db.session.commit()
+
+
+def after_commit(callback):
+    """Run callback once the current unit of work is over (now if none is open)."""
+    if in_transaction():
+        g.uow_callbacks.append(callback)
+    else:
+        callback()
+
+
+def begin():
+    depth = g.get('uow_depth', 0)
+    if depth == 0:
+        g.uow_dirty = False
+        g.uow_callbacks = []
+        g.uow_savepoints = []
+    else:
+        g.uow_savepoints.append(db.session.begin_nested())
+    g.uow_depth = depth + 1
+
+
+def end(success=True):
+    """Close one level: a nested level releases or rolls back its savepoint,
+    the outermost level commits or rolls back."""
+    if g.get('uow_depth', 0) == 0:
+        return
+    g.uow_depth -= 1
+    if g.uow_depth > 0:
+        savepoint = g.uow_savepoints.pop()
+        if not success:
+            savepoint.rollback()
+        elif savepoint.is_active:
+            savepoint.commit()
+        return
+    if success:
+        db.session.commit()
+    else:
+        db.session.rollback()
+    callbacks, g.uow_callbacks = g.uow_callbacks, []
+    for callback in callbacks:
+        callback()
+
+
+@contextmanager
+def transaction():
+    """Run the block in a single transaction (needs an app context)."""
+    begin()
+    try:
+        yield db.session
+    except Exception:
+        end(success=False)
+        raise
+    end()
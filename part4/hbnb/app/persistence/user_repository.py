@@ -1,9 +1,11 @@
 from app.models.user import User
+from app.persistence.replicas import replica_read
 from app.persistence.repository import SQLAlchemyRepository
 
 class UserRepository(SQLAlchemyRepository):
     def __init__(self):
         super().__init__(User)
 
+    @replica_read
     def get_user_by_email(self, email):
         return self.model.query.filter_by(email=email).first()
@@ -0,0 +1,60 @@
+"""Token bucket rate limiting with an in-process store.
+
+Each named limit of RATE_LIMITS is (capacity, period_seconds): a key may
+spend `capacity` requests at once, then gets capacity/period tokens back
+per second. Used on the auth endpoints so that a credential stuffing burst
+is rejected before it reaches bcrypt.
+"""
+from collections import OrderedDict
+from threading import Lock
+import math
+import time
+
+
+class TokenBucketStore:
+    """Buckets per key, least recently used keys are dropped past max_keys."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = Lock()
+
+    def consume(self, key, capacity, period):
+        """Take one token; return 0 if allowed, else seconds until the next token."""
+        rate = capacity / period
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0
+            else:
+                retry_after = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+class RateLimiter:
+    def __init__(self, app=None):
+        self.enabled = False
+        self.limits = {}
+        self.store = TokenBucketStore()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', False)
+        self.limits = app.config.get('RATE_LIMITS', {})
+        self.store = TokenBucketStore(app.config.get('RATE_LIMIT_MAX_KEYS', 100000))
+
+    def check(self, name, key):
+        """Return the Retry-After delay (whole seconds) when name/key is over its limit, else 0."""
+        limit = self.limits.get(name)
+        if not self.enabled or not limit or key is None:
+            return 0
+        capacity, period = limit
+        retry_after = self.store.consume("{}:{}".format(name, key), capacity, period)
+        return math.ceil(retry_after) if retry_after else 0
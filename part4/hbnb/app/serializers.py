@@ -0,0 +1,143 @@
+"""Serializers compiled from the column metadata of the models.
+
+serializer_for(Model) generates once, per model and field list, a function
+building the dict of an object with the conversion each column type needs
+(datetimes to ISO 8601 strings, UUIDs to str) and no per-row lookup.
+dumps() turns the result into JSON bytes with orjson when it is installed
+(JSON_BACKEND), else with the json module.
+"""
+from datetime import date, datetime
+import json
+import uuid
+from flask import Response
+from sqlalchemy import inspect as sa_inspect
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle
+    orjson = None
+
+_serializers = {}
+_backend = 'orjson' if orjson is not None else 'json'
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _str(value):
+    return str(value) if value is not None else None
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError("{} is not JSON serializable".format(type(value).__name__))
+
+
+def _converter(column):
+    """Name of the function converting the values of column, or None."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return None
+    if issubclass(python_type, (date, datetime)):
+        return '_iso'
+    if issubclass(python_type, uuid.UUID):
+        return '_str'
+    return None
+
+
+class Serializer:
+    """Compiled to_dict for the given fields of a model.
+
+    computed maps extra field names to functions of the object, for values
+    that are not plain columns (e.g. a rounded average).
+    """
+
+    def __init__(self, model, fields, computed=None):
+        self.model = model
+        self.fields = tuple(fields)
+        self.computed = dict(computed or {})
+        self.to_dict = self._compile()
+
+    def _compile(self):
+        columns = sa_inspect(self.model).columns
+        fast, slow = [], []
+        for name in self.fields:
+            if not name.isidentifier():
+                raise ValueError("Invalid field: {}".format(name))
+            if name in self.computed:
+                fast.append('_computed[{!r}](obj)'.format(name))
+                slow.append(fast[-1])
+                continue
+            if name in columns:
+                converter = _converter(columns[name])
+            elif hasattr(self.model, name):
+                converter = None
+            else:
+                raise ValueError("{} has no field '{}'".format(self.model.__name__, name))
+            loaded = 'values[{!r}]'.format(name) if name in columns else 'obj.' + name
+            fast.append('{}({})'.format(converter, loaded) if converter else loaded)
+            slow.append('{}(obj.{})'.format(converter, name) if converter else 'obj.' + name)
+
+        def body(expressions):
+            return ''.join('            {!r}: {},\n'.format(n, e) for n, e in zip(self.fields, expressions))
+
+        # Les colonnes chargées sont lues dans __dict__ sans passer par les
+        # descripteurs de l'ORM ; une colonne expirée ou différée (KeyError)
+        # repasse par getattr, qui la charge.
+        source = (
+            'def to_dict(obj):\n'
+            '    values = obj.__dict__\n'
+            '    try:\n'
+            '        return {{\n{}        }}\n'
+            '    except KeyError:\n'
+            '        return {{\n{}        }}\n'
+        ).format(body(fast), body(slow))
+        namespace = {'_iso': _iso, '_str': _str, '_computed': self.computed}
+        exec(source, namespace)
+        return namespace['to_dict']
+
+    def many(self, objs):
+        to_dict = self.to_dict
+        return [to_dict(obj) for obj in objs]
+
+    def project(self, fields):
+        """Serializer restricted to fields (columns of the model)."""
+        return serializer_for(self.model, fields)
+
+
+def serializer_for(model, fields=None):
+    """Cached Serializer of model for fields (default: model.__serialize__)."""
+    fields = tuple(fields) if fields else model.__serialize__
+    key = (model, fields)
+    serializer = _serializers.get(key)
+    if serializer is None:
+        serializer = _serializers[key] = Serializer(model, fields)
+    return serializer
+
+
+def dumps(data):
+    """JSON bytes of data."""
+    if _backend == 'orjson':
+        return orjson.dumps(data, default=_json_default)
+    return json.dumps(data, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+
+def json_response(data, status=200, headers=None):
+    """Response with data already encoded, bypassing the flask-restx encoder."""
+    return Response(dumps(data), status=status, headers=headers, mimetype='application/json')
+
+
+def init_app(app, models=()):
+    """Choose the JSON backend and compile the default serializer of each model."""
+    global _backend
+    backend = app.config.get('JSON_BACKEND') or ('orjson' if orjson is not None else 'json')
+    if backend == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_BACKEND is 'orjson' but orjson is not installed")
+    _backend = backend
+    for model in models:
+        serializer_for(model)
@@ -0,0 +1,170 @@
+"""Production server: gunicorn, with the hooks below.
+
+    HBNB_CONFIG=production gunicorn -c gunicorn.conf.py run:app
+    HBNB_CONFIG=production flask --app run serve --workers 4   (same settings)
+
+The application is loaded once in the master (preload_app), warmed up
+(every list route once, the Swagger spec) and its heap frozen before the
+workers are forked: all of it is shared copy-on-write. Each worker then
+opens its own database connections (post_fork) and serves requests with
+SERVER_THREADS threads (gthread worker).
+
+gunicorn signals: TERM graceful stop, HUP new workers with the same code
+(preload_app), USR2 then TERM to the old master to deploy new code.
+
+Each worker has its own memory: with more than one worker the revoked
+tokens must be in the database (JWT_DENYLIST_STORE = 'sql'), otherwise the
+master refuses to start. The repository cache and the rate limit buckets
+stay per worker; the master logs what that means at startup.
+"""
+import gc
+import os
+import sys
+import traceback
+from sqlalchemy.pool import QueuePool
+from app.Extensions import db
+
+
+# -----------------------
+# Warm-up
+# -----------------------
+def warm_up(app):
+    """GET every route without URL parameters once, Swagger spec included.
+
+    Run in the master: the lazy imports, the compiled SQL statements and the
+    spec built here are inherited by every worker. A failing route (e.g.
+    database not migrated yet) is logged and skipped, the workers will
+    answer it themselves. Returns the count of routes warmed up.
+    """
+    client = app.test_client()
+    paths = [rule.rule for rule in app.url_map.iter_rules()
+             if 'GET' in rule.methods and not rule.arguments]
+    warmed = 0
+    for path in paths:
+        try:
+            # limit=1 : une page, pas toute la table
+            response = client.get(path, query_string={'limit': 1})
+            response.close()
+        except Exception:
+            log("Warm-up of {} failed:\n{}".format(path, traceback.format_exc()))
+            continue
+        if response.status_code >= 500:
+            log("Warm-up of {} answered {}".format(path, response.status_code))
+            continue
+        warmed += 1
+    return warmed
+
+
+def release_connections(app):
+    """Close the connections of the master, which must not be shared with the workers."""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def open_connections(app):
+    """Fill the connection pool of a worker before it accepts requests."""
+    with app.app_context():
+        engine = db.engine
+        size = engine.pool.size() if isinstance(engine.pool, QueuePool) else 1
+        connections = [engine.connect() for _ in range(size)]
+        for connection in connections:
+            connection.close()
+
+
+def log(message):
+    print("[hbnb {}] {}".format(os.getpid(), message), file=sys.stderr, flush=True)
+
+
+def check_workers(app, workers):
+    """Refuse a revocation store kept in one process when there are several workers.
+
+    Returns the warnings about the state that stays per worker (cache, rate limits).
+    """
+    if workers <= 1:
+        return []
+    config = app.config
+    if config.get('JWT_DENYLIST_STORE', 'memory') == 'memory':
+        raise ValueError("JWT_DENYLIST_STORE = 'memory' keeps the revoked tokens in one worker: "
+                         "set it to 'sql' to run {} workers".format(workers))
+    warnings = []
+    ttls = [options.get('ttl', 60) for options in (config.get('REPOSITORY_CACHE') or {}).values() if options]
+    if ttls:
+        warnings.append("repository cache per worker: an object written in another worker "
+                        "may be served for up to {} s".format(max(ttls)))
+    if config.get('RATE_LIMIT_ENABLED'):
+        warnings.append("rate limits per worker: up to {} times RATE_LIMITS in total".format(workers))
+    return warnings
+
+
+def prepare(app, workers):
+    """Checks and warm-up of the master, before any worker is forked.
+
+    Raises ValueError when the configuration cannot run that many workers.
+    """
+    for warning in check_workers(app, workers):
+        log("Warning: " + warning)
+    log("{} routes warmed up".format(warm_up(app)))
+    release_connections(app)
+    # Le ramasse-miettes ne touche plus les objets chargés : les pages restent partagées
+    gc.freeze()
+
+
+# -----------------------
+# gunicorn hooks (gunicorn.conf.py)
+# -----------------------
+def on_starting(arbiter):
+    # preload_app : l'application est déjà chargée dans le master
+    try:
+        prepare(arbiter.app.wsgi(), arbiter.num_workers)
+    except ValueError as e:
+        log(str(e))
+        sys.exit(1)
+
+
+def post_fork(arbiter, worker):
+    open_connections(arbiter.app.wsgi())
+
+
+def gunicorn_options(config, bind=None, workers=None):
+    """gunicorn settings from the SERVER_* keys of the Flask config."""
+    return {
+        'bind': bind or config['SERVER_BIND'],
+        'workers': workers or config['SERVER_WORKERS'],
+        'worker_class': 'gthread',
+        'threads': config['SERVER_THREADS'],
+        'graceful_timeout': config['SERVER_GRACEFUL_TIMEOUT'],
+        'keepalive': config['SERVER_KEEPALIVE'],
+        'preload_app': True,
+        'on_starting': on_starting,
+        'post_fork': post_fork,
+    }
+
+
+def serve(app, bind=None, workers=None, check=False):
+    """Run app under gunicorn; with check, only check the config and warm up.
+
+    Raises ValueError when the configuration cannot run several workers or
+    gunicorn is not installed.
+    """
+    options = gunicorn_options(app.config, bind, workers)
+    if check:
+        for warning in check_workers(app, options['workers']):
+            log("Warning: " + warning)
+        warm_up(app)
+        return
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:  # dépendance optionnelle
+        raise ValueError("flask serve needs gunicorn: pip install gunicorn")
+    check_workers(app, options['workers'])
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Application().run()
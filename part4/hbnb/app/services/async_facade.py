@@ -0,0 +1,101 @@
+"""Async HBnBFacade for the ASGI mode: the read operations and the login.
+
+Same methods and results as HBnBFacade, awaited. The repositories are the
+async ones of app/persistence/async_repository.py; they are not behind the
+read-through cache, whose entries are tied to the synchronous session.
+"""
+from app.Extensions import password_hasher
+from app.persistence.async_repository import (AsyncAmenityRepository, AsyncPlaceRepository,
+                                              AsyncReviewRepository, AsyncUserRepository, async_db)
+
+
+class AsyncHBnBFacade:
+    def __init__(self):
+        self.user_repo = AsyncUserRepository()
+        self.place_repo = AsyncPlaceRepository()
+        self.review_repo = AsyncReviewRepository()
+        self.amenity_repo = AsyncAmenityRepository()
+
+    def init_app(self, app):
+        async_db.init_app(app)
+
+    async def end_request(self, success=True):
+        """Commit or roll back the writes of the request (the unit of work of the ASGI mode)."""
+        await async_db.end(success)
+
+    async def dispose(self):
+        """Close the connections of the async engine (server shutdown)."""
+        await async_db.dispose()
+
+    async def collection_version(self, name):
+        return await getattr(self, name + '_repo').collection_version()
+
+    # =====================
+    # User facade
+    # =====================
+    async def authenticate(self, email, password):
+        """Return the user if the credentials are valid, else None.
+
+        bcrypt runs in the password_hasher pool; the event loop only awaits it.
+        """
+        user = await self.user_repo.get_user_by_email(email)
+        if not user or not await password_hasher.verify_async(user.password, password):
+            return None
+        if password_hasher.needs_rehash(user.password):
+            hashed = await password_hasher.hash_async(password)
+            await self.user_repo.update(user.id, {'password': hashed})
+        return user
+
+    async def get_all_users(self):
+        return await self.user_repo.get_all()
+
+    async def get_users_page(self, limit, cursor=None, fields=None):
+        return await self.user_repo.get_page(limit, cursor, fields)
+
+    # =====================
+    # Place facade
+    # =====================
+    async def get_place_detail(self, place_id):
+        return await self.place_repo.get_detail(place_id)
+
+    async def place_exists(self, place_id):
+        return await self.place_repo.exists(place_id)
+
+    async def get_all_places(self):
+        return await self.place_repo.get_all()
+
+    async def get_places_page(self, limit, cursor=None, fields=None):
+        return await self.place_repo.get_page(limit, cursor, fields)
+
+    async def search_places(self, query, limit=None, cursor=None, fields=None):
+        return await self.place_repo.search(query, limit, cursor, fields)
+
+    # =====================
+    # Review facade
+    # =====================
+    async def get_review(self, review_id):
+        return await self.review_repo.get(review_id)
+
+    async def get_all_reviews(self):
+        return await self.review_repo.get_all()
+
+    async def get_reviews_by_place(self, place_id):
+        return await self.review_repo.get_by_place(place_id)
+
+    async def get_reviews_page(self, limit, cursor=None, fields=None):
+        return await self.review_repo.get_page(limit, cursor, fields)
+
+    # =====================
+    # Amenity facade
+    # =====================
+    async def get_amenity(self, amenity_id):
+        return await self.amenity_repo.get(amenity_id)
+
+    async def get_all_amenities(self):
+        return await self.amenity_repo.get_all()
+
+    async def get_amenities_page(self, limit, cursor=None, fields=None):
+        return await self.amenity_repo.get_page(limit, cursor, fields)
+
+
+async_facade = AsyncHBnBFacade()
@@ -1,5 +1,14 @@
+from flask import current_app
+from sqlalchemy import case, func, inspect
+from sqlalchemy.exc import IntegrityError
 from app.persistence.user_repository import UserRepository
-from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.place_repository import PlaceRepository
+from app.persistence.review_repository import ReviewRepository
+from app.persistence.amenity_repository import AmenityRepository
+from app.persistence import geo, unit_of_work
+from app.persistence.cache import CachedRepository, FakeSharedCache, LocalCache
+from app.persistence.place_query import PlaceQuery
+from app.persistence.repository import is_unique_violation
 from app.models.user import User
 from app.models.place import Place
 from app.models.amenity import Amenity
@@ -8,19 +17,79 @@ from app.models.review import Review
 class HBnBFacade:
     def __init__(self):
         self.user_repo = UserRepository()
-        self.place_repo = SQLAlchemyRepository(Place)
-        self.review_repo = SQLAlchemyRepository(Review)
-        self.amenity_repo = SQLAlchemyRepository(Amenity)
+        self.place_repo = PlaceRepository()
+        self.review_repo = ReviewRepository()
+        self.amenity_repo = AmenityRepository()
+
+    def init_app(self, app):
+        """Wrap the repositories in a read-through cache as set in REPOSITORY_CACHE."""
+        repos = getattr(self, '_base_repos', None)
+        if repos is None:
+            repos = self._base_repos = {
+                'user': self.user_repo,
+                'place': self.place_repo,
+                'review': self.review_repo,
+                'amenity': self.amenity_repo,
+            }
+        settings = app.config.get('REPOSITORY_CACHE') or {}
+        for name, repo in repos.items():
+            options = settings.get(name)
+            if options:
+                if app.config.get('CACHE_BACKEND') == 'fake_shared':
+                    backend = FakeSharedCache()
+                else:
+                    backend = LocalCache(options.get('maxsize', 1024))
+                repo = CachedRepository(repo, backend, options.get('ttl', 60))
+            setattr(self, name + '_repo', repo)
+
+    def cache_stats(self):
+        """Hit/miss counters of the cached repositories (GET /api/v1/admin/metrics)."""
+        return {
+            name: getattr(self, name + '_repo').stats()
+            for name in ('user', 'place', 'review', 'amenity')
+            if isinstance(getattr(self, name + '_repo'), CachedRepository)
+        }
+
+    def collection_version(self, name):
+        """(version, last_modified) of the 'user', 'place', 'review' or 'amenity' collection, or None."""
+        return getattr(self, name + '_repo').collection_version()
+
+    def touch_if_unmodified(self, obj):
+        """Check-and-lock for If-Match: False if obj changed in the database since it was read."""
+        repo = {User: self.user_repo, Place: self.place_repo,
+                Review: self.review_repo, Amenity: self.amenity_repo}[type(obj)]
+        return repo.touch_if_unmodified(obj.id, obj.updated_at)
+
+    def transaction(self):
+        """Group the writes of several facade calls into one commit.
+
+        HTTP requests already run in one (see create_app); use this from
+        scripts and shells:  with facade.transaction(): ...
+        """
+        return unit_of_work.transaction()
 
     # =====================
     # User facade
     # =====================
     def create_user(self, user_data):
-        user = User(**user_data)
-        user.hash_password(user_data['password'])
+        user = User(**user_data)  # le mot de passe est haché une seule fois, dans User
         self.user_repo.add(user)
         return user
 
+    def authenticate(self, email, password):
+        """Return the user if the credentials are valid, else None.
+
+        A hash made with another cost than BCRYPT_LOG_ROUNDS is replaced,
+        since the clear password is known here.
+        """
+        user = self.get_user_by_email(email)
+        if not user or not user.verify_password(password):
+            return None
+        if user.password_needs_rehash():
+            user.hash_password(password)
+            self.user_repo.update(user.id, {'password': user.password})
+        return user
+
     def get_user(self, user_id):
         return self.user_repo.get(user_id)
 
@@ -30,19 +99,38 @@ class HBnBFacade:
     def get_all_users(self):
         return self.user_repo.get_all()
 
+    def iter_users(self):
+        return self.user_repo.iter_all(self._stream_batch_size())
+
+    def get_users_page(self, limit, cursor=None, fields=None):
+        return self.user_repo.get_page(limit, cursor, fields)
+
     def update_user(self, user_id, data):
         user = self.user_repo.get(user_id)
         if not user:
             raise ValueError("User not found")
         
-        data.pop("id", None)  # ne pas changer l'id
-        data.pop("password", None)  # password géré à part si besoin
-
-        for key, value in data.items():
-            setattr(user, key, value)
-
-        self.user_repo.update(user_id, data)
-        return user
+        # ni id ni mot de passe : seuls les champs de User.__editable__ sont écrits
+        changes = self._user_changes(user, data)
+        try:
+            return self.user_repo.update(user_id, changes)
+        except IntegrityError:
+            raise ValueError("Email already in use")
+
+    def _user_changes(self, user, data):
+        """Editable fields of data, validated with the current values of user.
+
+        The uniqueness of a new email is left to the caller.
+        """
+        changes = {k: v for k, v in data.items() if k in User.__editable__}
+        try:
+            User.validate(changes.get("first_name", user.first_name), changes.get("last_name", user.last_name),
+                          changes.get("email", user.email))
+        except TypeError:
+            raise ValueError("Invalid user values.")
+        if "is_admin" in changes:
+            changes["is_admin"] = bool(changes["is_admin"])
+        return changes
 
     def delete_user(self, user_id):
         user = self.user_repo.get(user_id)
@@ -61,8 +149,7 @@ class HBnBFacade:
         if not owner:
             raise ValueError("Owner not found")
 
-        amenities = place_data.get("amenities") or []
-        amenities_objs = [self.amenity_repo.get(a_id) for a_id in amenities]
+        amenities_objs = self._get_amenities_or_fail(place_data.get("amenities"))
 
         new_place = Place(
             place_data.get("title"),
@@ -79,20 +166,79 @@ class HBnBFacade:
     def get_place(self, place_id):
         return self.place_repo.get(place_id)
 
+    def get_place_detail(self, place_id):
+        """Return (place, review_count, average_rating) or None, owner and amenities preloaded."""
+        return self.place_repo.get_detail(place_id)
+
+    def place_exists(self, place_id):
+        return self.place_repo.exists(place_id)
+
     def get_all_places(self):
         return self.place_repo.get_all()
 
+    def iter_places(self):
+        return self.place_repo.iter_all(self._stream_batch_size())
+
+    def get_places_page(self, limit, cursor=None, fields=None):
+        return self.place_repo.get_page(limit, cursor, fields)
+
+    def place_query(self, **filters):
+        """Build a PlaceQuery (ValueError on invalid filters)."""
+        return PlaceQuery(**filters)
+
+    def search_places(self, query, limit=None, cursor=None, fields=None):
+        """Run a PlaceQuery, return (places, next_cursor); fields limits the columns loaded."""
+        return self.place_repo.search(query, limit, cursor, fields)
+
+    def rebuild_place_ratings(self):
+        """Recompute the stored review aggregates of all places, return the number of places."""
+        return self.place_repo.rebuild_rating_aggregates()
+
+    def search_places_text(self, q, limit, cursor=None):
+        """Full-text search on title / description: ([(place, score)], next_cursor)."""
+        return self.place_repo.search_text(q, limit, cursor)
+
+    def rebuild_place_text_index(self):
+        self.place_repo.rebuild_text_index()
+
+    def search_places_in_bbox(self, bbox):
+        """bbox is (min_lon, min_lat, max_lon, max_lat)."""
+        return self.place_repo.get_in_bbox(bbox)
+
+    def search_places_near(self, latitude, longitude, radius_km):
+        """Return [(place, distance_km)] within radius_km, nearest first."""
+        bbox = geo.radius_to_bbox(latitude, longitude, radius_km)
+        results = []
+        for place in self.place_repo.get_in_bbox(bbox):
+            distance = geo.haversine_km(latitude, longitude, place.latitude, place.longitude)
+            if distance <= radius_km:
+                results.append((place, distance))
+        results.sort(key=lambda r: r[1])
+        return results
+
     def update_place(self, place_id, data):
         place = self.place_repo.get(place_id)
         if not place:
             raise ValueError("Place not found")
 
-        data.pop("owner_id", None)
-        for key, value in data.items():
-            setattr(place, key, value)
-
-        self.place_repo.update(place_id, data)
-        return place
+        changes = self._place_changes(place, data, self._get_amenities_or_fail)
+        return self.place_repo.update(place_id, changes)
+
+    def _place_changes(self, place, data, amenity_objs):
+        """Editable fields of data, validated with the current values of place.
+
+        Other keys (owner_id, review_count, rating_sum, geohash, dates...) are
+        ignored; amenity_objs turns the list of amenity ids into objects.
+        """
+        changes = {k: v for k, v in data.items() if k in Place.__editable__}
+        try:
+            Place.validate(changes.get("title", place.title), changes.get("price", place.price),
+                           changes.get("latitude", place.latitude), changes.get("longitude", place.longitude))
+        except TypeError:
+            raise ValueError("Invalid place values.")
+        if "amenities" in changes:
+            changes["amenities"] = amenity_objs(changes["amenities"])
+        return changes
 
     def delete_place(self, place_id):
         place = self.place_repo.get(place_id)
@@ -112,16 +258,24 @@ class HBnBFacade:
         if not user_id or not place_id or rating is None:
             raise ValueError("user_id, place_id, and rating are required")
 
-        if not self.user_repo.get(user_id):
-            raise ValueError("User not found.")
-        if not self.place_repo.get(place_id):
-            raise ValueError("Place not found.")
-
         if not (1 <= rating <= 5):
             raise ValueError("Rating must be between 1 and 5")
 
-        review = Review(text=text, rating=rating, user_id=user_id, place_id=place_id)
-        self.review_repo.add(review)
+        with self.transaction():
+            if not self.user_repo.get(user_id):
+                raise ValueError("User not found.")
+            if not self.place_repo.exists(place_id):
+                raise ValueError("Place not found.")
+
+            review = Review(text=text, rating=rating, user_id=user_id, place_id=place_id)
+            try:
+                self.review_repo.add(review)
+            except IntegrityError as e:
+                # index unique (user_id, place_id) : pas de requête de vérification avant
+                if not is_unique_violation(e):
+                    raise
+                raise ValueError("You have already reviewed this place.")
+            self._adjust_place_rating(place_id, 1, rating)
         return review
 
     def get_review(self, review_id):
@@ -130,31 +284,98 @@ class HBnBFacade:
     def get_all_reviews(self):
         return self.review_repo.get_all()
 
+    def iter_reviews(self):
+        return self.review_repo.iter_all(self._stream_batch_size())
+
+    def get_reviews_by_place(self, place_id):
+        return self.review_repo.get_by_place(place_id)
+
+    def update_review(self, review_id, data):
+        review = self.review_repo.get(review_id)
+        if not review:
+            raise ValueError("Review not found")
+
+        # l'auteur et la place d'une review ne changent pas
+        data = {k: v for k, v in data.items() if k in ("text", "rating")}
+        if "rating" in data and (not isinstance(data["rating"], int) or not 1 <= data["rating"] <= 5):
+            raise ValueError("Rating must be an integer between 1 and 5.")
+        if "text" in data and (not data["text"] or not isinstance(data["text"], str)):
+            raise ValueError("Text cannot be empty and must be a string.")
+
+        with self.transaction():
+            old_rating = review.rating
+            review = self.review_repo.update(review_id, data)
+            if "rating" in data and data["rating"] != old_rating:
+                self._adjust_place_rating(review.place_id, 0, data["rating"] - old_rating)
+        return review
+
+    def delete_review(self, review_id):
+        review = self.review_repo.get(review_id)
+        if not review:
+            raise ValueError("Review not found")
+        with self.transaction():
+            place_id, rating = review.place_id, review.rating
+            self.review_repo.delete(review_id)
+            self._adjust_place_rating(place_id, -1, -rating)
+
+    def _adjust_place_rating(self, place_id, count_delta, rating_delta):
+        # incrément fait par la base (SET x = x + n) : pas de mise à jour perdue en concurrence
+        count = Place.review_count + count_delta
+        total = Place.rating_sum + rating_delta
+        self.place_repo.update(place_id, {
+            'review_count': count,
+            'rating_sum': total,
+            # la moyenne est calculée dans le même UPDATE, à partir des nouvelles valeurs
+            'rating_average': case((count > 0, total * 1.0 / count), else_=0.0),
+        })
+
+    def get_reviews_page(self, limit, cursor=None, fields=None):
+        return self.review_repo.get_page(limit, cursor, fields)
+
     # =====================
     # Amenity facade
     # =====================
     def create_amenity(self, amenity_data):
         amenity = Amenity(**amenity_data)
-        self.amenity_repo.add(amenity)
+        # l'index unique lower(name) protège aussi des créations concurrentes
+        try:
+            self.amenity_repo.add(amenity)
+        except IntegrityError:
+            raise ValueError(f"Amenity '{amenity.name}' already exists")
         return amenity
 
     def get_amenity(self, amenity_id):
         return self.amenity_repo.get(amenity_id)
 
+    def get_amenities(self, amenity_ids):
+        """Return (amenities, missing_ids) with one query for the whole list."""
+        return self.amenity_repo.get_many(amenity_ids)
+
+    def _get_amenities_or_fail(self, amenity_ids):
+        amenities, missing = self.get_amenities(dict.fromkeys(amenity_ids or []))
+        if missing:
+            raise ValueError(f"Amenity {missing[0]} does not exist")
+        return amenities
+
     def get_all_amenities(self):
         return self.amenity_repo.get_all()
 
+    def iter_amenities(self):
+        return self.amenity_repo.iter_all(self._stream_batch_size())
+
+    def get_amenities_page(self, limit, cursor=None, fields=None):
+        return self.amenity_repo.get_page(limit, cursor, fields)
+
     def update_amenity(self, amenity_id, data):
         amenity = self.amenity_repo.get(amenity_id)
         if not amenity:
             raise ValueError("Amenity not found")
 
         data.pop("id", None)
-        for key, value in data.items():
-            setattr(amenity, key, value)
-
-        self.amenity_repo.update(amenity_id, data)
-        return amenity
+        try:
+            return self.amenity_repo.update(amenity_id, data)
+        except IntegrityError:
+            raise ValueError(f"Amenity '{data.get('name')}' already exists")
 
     def delete_amenity(self, amenity_id):
         amenity = self.amenity_repo.get(amenity_id)
@@ -162,3 +383,191 @@ class HBnBFacade:
             raise ValueError("Amenity not found")
         self.amenity_repo.delete(amenity_id)
 
+    # =====================
+    # Bulk facade
+    # =====================
+    # Each bulk_* method validates every row first and returns (result, errors).
+    # Nothing is written when errors is not empty; otherwise rows are written
+    # with one commit per BULK_BATCH_SIZE rows.
+    def _batch_size(self):
+        return current_app.config.get('BULK_BATCH_SIZE', 500)
+
+    def _stream_batch_size(self):
+        return current_app.config.get('STREAM_BATCH_SIZE', 1000)
+
+    def _load_by_ids(self, repo, ids):
+        # Clés en str : les ids du JSON peuvent être "1" ou 1 pour une clé entière
+        objs, _ = repo.get_many(dict.fromkeys(i for i in ids if i is not None))
+        return {str(obj.id): obj for obj in objs}
+
+    def _write_bulk(self, repo, to_create, to_update, to_delete):
+        batch_size = self._batch_size()
+        repo.add_many(to_create, batch_size)
+        repo.update_many(to_update, batch_size)
+        deleted = repo.delete_many(to_delete, batch_size)
+        # Read ids from the identity key: obj.id would reload each expired row
+        created = []
+        for obj in to_create:
+            identity = inspect(obj).identity
+            created.append(identity[0] if identity else obj.id)
+        return {
+            'created': created,
+            'updated': list(to_update),
+            'deleted': deleted
+        }
+
+    def bulk_places(self, ops, user_id, is_admin=False):
+        errors = []
+        creates = ops.get('create') or []
+        updates = ops.get('update') or []
+        deletes = ops.get('delete') or []
+
+        amenity_ids = {a_id for row in creates + updates for a_id in (row.get('amenities') or [])}
+        amenities = self._load_by_ids(self.amenity_repo, list(amenity_ids))
+        places = self._load_by_ids(self.place_repo, [row.get('id') for row in updates] + list(deletes))
+
+        def amenity_objs(amenity_ids):
+            ids = list(dict.fromkeys(amenity_ids or []))
+            missing = [a_id for a_id in ids if str(a_id) not in amenities]
+            if missing:
+                raise ValueError("Amenities not found: {}".format(missing))
+            return list({str(a_id): amenities[str(a_id)] for a_id in ids}.values())
+
+        def owned_place(place_id):
+            place = places.get(str(place_id))
+            if not place:
+                raise ValueError("Place not found")
+            if place.owner_id != user_id and not is_admin:
+                raise ValueError("Unauthorized action")
+            return place
+
+        to_create = []
+        for i, row in enumerate(creates):
+            try:
+                to_create.append(Place(row.get('title'), row.get('description'), row.get('price'),
+                                       row.get('latitude'), row.get('longitude'), user_id,
+                                       amenity_objs(row.get('amenities'))))
+            except (ValueError, TypeError) as e:
+                errors.append({'op': 'create', 'index': i, 'error': str(e)})
+
+        to_update = {}
+        for i, row in enumerate(updates):
+            try:
+                place = owned_place(row.get('id'))
+                to_update[place.id] = self._place_changes(place, row, amenity_objs)
+            except (ValueError, TypeError) as e:
+                errors.append({'op': 'update', 'index': i, 'error': str(e)})
+
+        to_delete = []
+        for i, place_id in enumerate(deletes):
+            try:
+                to_delete.append(owned_place(place_id).id)
+            except ValueError as e:
+                errors.append({'op': 'delete', 'index': i, 'error': str(e)})
+
+        if errors:
+            return None, errors
+        return self._write_bulk(self.place_repo, to_create, to_update, to_delete), []
+
+    def bulk_amenities(self, ops):
+        errors = []
+        creates = ops.get('create') or []
+        updates = ops.get('update') or []
+        deletes = ops.get('delete') or []
+
+        names = [row.get('name') for row in creates + updates if isinstance(row.get('name'), str)]
+        taken = {name.lower() for (name,) in self.amenity_repo.model.query
+                 .with_entities(Amenity.name)
+                 .filter(func.lower(Amenity.name).in_([n.lower() for n in names]))}
+        existing = self._load_by_ids(self.amenity_repo, [row.get('id') for row in updates] + list(deletes))
+
+        def claim_name(name):
+            if not isinstance(name, str):
+                raise ValueError("Amenity name is required.")
+            if name.lower() in taken:
+                raise ValueError("Amenity '{}' already exists".format(name))
+            taken.add(name.lower())
+
+        to_create = []
+        for i, row in enumerate(creates):
+            try:
+                amenity = Amenity(row.get('name'))
+                claim_name(amenity.name)
+                to_create.append(amenity)
+            except ValueError as e:
+                errors.append({'op': 'create', 'index': i, 'error': str(e)})
+
+        to_update = {}
+        for i, row in enumerate(updates):
+            try:
+                amenity = existing.get(str(row.get('id')))
+                if not amenity:
+                    raise ValueError("Amenity not found")
+                name = row.get('name')
+                if not isinstance(name, str) or not name or len(name) > 50:
+                    raise ValueError("Amenity name must be 1 to 50 characters.")
+                if amenity.name.lower() != name.lower():
+                    claim_name(name)
+                to_update[amenity.id] = {'name': name}
+            except ValueError as e:
+                errors.append({'op': 'update', 'index': i, 'error': str(e)})
+
+        to_delete = []
+        for i, amenity_id in enumerate(deletes):
+            if str(amenity_id) in existing:
+                to_delete.append(existing[str(amenity_id)].id)
+            else:
+                errors.append({'op': 'delete', 'index': i, 'error': "Amenity not found"})
+
+        if errors:
+            return None, errors
+        return self._write_bulk(self.amenity_repo, to_create, to_update, to_delete), []
+
+    def bulk_users(self, ops):
+        errors = []
+        creates = ops.get('create') or []
+        updates = ops.get('update') or []
+        deletes = ops.get('delete') or []
+
+        emails = [row.get('email') for row in creates + updates if row.get('email')]
+        taken = {email for (email,) in self.user_repo.model.query
+                 .with_entities(User.email).filter(User.email.in_(emails))}
+        existing = self._load_by_ids(self.user_repo, [row.get('id') for row in updates] + list(deletes))
+
+        to_create = []
+        for i, row in enumerate(creates):
+            try:
+                if row.get('email') in taken:
+                    raise ValueError("Email already registered")
+                to_create.append(User(row.get('first_name'), row.get('last_name'), row.get('email'),
+                                      row.get('password'), bool(row.get('is_admin', False))))
+                taken.add(row.get('email'))
+            except (ValueError, TypeError) as e:
+                errors.append({'op': 'create', 'index': i, 'error': str(e)})
+
+        to_update = {}
+        for i, row in enumerate(updates):
+            try:
+                user = existing.get(str(row.get('id')))
+                if not user:
+                    raise ValueError("User not found")
+                data = self._user_changes(user, row)
+                email = data.get('email')
+                if email and email != user.email:
+                    if email in taken:
+                        raise ValueError("Email already in use")
+                    taken.add(email)
+                to_update[user.id] = data
+            except ValueError as e:
+                errors.append({'op': 'update', 'index': i, 'error': str(e)})
+
+        to_delete = []
+        for i, user_id in enumerate(deletes):
+            if str(user_id) in existing:
+                to_delete.append(existing[str(user_id)].id)
+            else:
+                errors.append({'op': 'delete', 'index': i, 'error': "User not found"})
+
+        if errors:
+            return None, errors
+        return self._write_bulk(self.user_repo, to_create, to_update, to_delete), []
@@ -0,0 +1,6 @@
+import os
+from app.asgi import create_asgi_app
+from config import config
+
+# HBNB_CONFIG=production uvicorn asgi:app --workers 4
+app = create_asgi_app(config[os.getenv('HBNB_CONFIG', 'default')])
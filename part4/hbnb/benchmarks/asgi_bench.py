@@ -0,0 +1,203 @@
+"""Load benchmark of the two server modes on a local SQLite database.
+
+    pip install uvicorn a2wsgi aiosqlite "sqlalchemy[asyncio]"
+    python -m benchmarks.asgi_bench --requests 2000 --concurrency 50
+
+Starts the API twice on the same seeded database, as the threaded WSGI
+server (what run.py starts) and as the ASGI app under uvicorn (asgi.py),
+then sends the same mix of reads and logins from --concurrency concurrent
+connections and prints p50/p99 latency and requests/sec for each mode.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.Extensions import password_hasher  # noqa: E402
+from app.models.amenity import Amenity  # noqa: E402
+from app.models.place import Place, place_amenity  # noqa: E402
+from app.models.review import Review  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+PASSWORD = 'benchmark-password'
+
+
+def make_config(db_path, rounds):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        JWT_SECRET_KEY = 'benchmark-secret-key-0123456789abcdef'
+        BCRYPT_LOG_ROUNDS = rounds
+        RATE_LIMIT_ENABLED = False
+    return BenchConfig
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+# -----------------------
+# Données
+# -----------------------
+def seed(app, users, places):
+    """Users sharing one hash, places with amenities and a few reviews each; returns the place ids."""
+    rng = random.Random(42)
+    user_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(users)]
+    place_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(places)]
+    with app.app_context():
+        hashed = password_hasher.hash(PASSWORD)
+        db.session.execute(db.insert(User), [
+            {'id': user_id, 'first_name': 'Bench', 'last_name': str(i),
+             'email': 'bench{}@example.com'.format(i), 'password': hashed, 'is_admin': False}
+            for i, user_id in enumerate(user_ids)
+        ])
+        db.session.execute(db.insert(Amenity), [{'name': 'amenity {}'.format(i)} for i in range(10)])
+        db.session.execute(db.insert(Place), [
+            {'id': place_id, 'title': 'Place {}'.format(i), 'description': 'A place',
+             'price': rng.uniform(10, 500), 'latitude': rng.uniform(-60, 60),
+             'longitude': rng.uniform(-180, 180), 'owner_id': rng.choice(user_ids)}
+            for i, place_id in enumerate(place_ids)
+        ])
+        db.session.execute(place_amenity.insert(), [
+            {'place_id': place_id, 'amenity_id': amenity_id}
+            for place_id in place_ids for amenity_id in rng.sample(range(1, 11), 3)
+        ])
+        db.session.execute(db.insert(Review), [
+            {'text': 'Nice', 'rating': rng.randint(1, 5), 'user_id': user_id, 'place_id': place_id}
+            for place_id in place_ids for user_id in rng.sample(user_ids, rng.randint(0, 3))
+        ])
+        db.session.commit()
+    return place_ids
+
+
+# -----------------------
+# Serveurs
+# -----------------------
+def serve(mode, db_path, port, rounds):
+    """Run one server in this process (called in a subprocess by main)."""
+    config = make_config(db_path, rounds)
+    if mode == 'asgi':
+        import uvicorn
+        from app.asgi import create_asgi_app
+        uvicorn.run(create_asgi_app(config), host='127.0.0.1', port=port, log_level='warning')
+    else:
+        from werkzeug.serving import run_simple
+        run_simple('127.0.0.1', port, create_app(config), threaded=True)
+
+
+def start_server(mode, db_path, port, rounds):
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.asgi_bench', '--serve', mode, '--db', db_path,
+         '--port', str(port), '--rounds', str(rounds)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            asyncio.run(request(port, 'GET', '/api/v1/amenities/'))
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("{} server did not start".format(mode))
+
+
+# -----------------------
+# Client
+# -----------------------
+async def request(port, method, path, body=b''):
+    """One HTTP/1.1 request on a new connection; returns the status code."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    head = '{} {} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n'.format(method, path)
+    if body:
+        head += 'Content-Type: application/json\r\nContent-Length: {}\r\n'.format(len(body))
+    writer.write(head.encode('latin-1') + b'\r\n' + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+def workload(count, users, place_ids, logins):
+    """(method, path, body) of each request: reads, with a share of logins."""
+    rng = random.Random(7)
+    reads = [
+        lambda: '/api/v1/places/?limit=20',
+        lambda: '/api/v1/places/{}'.format(rng.choice(place_ids)),
+        lambda: '/api/v1/reviews/places/{}/reviews'.format(rng.choice(place_ids)),
+        lambda: '/api/v1/amenities/',
+        lambda: '/api/v1/reviews/?limit=20',
+    ]
+    for _ in range(count):
+        if rng.random() < logins:
+            body = '{{"email": "bench{}@example.com", "password": "{}"}}'.format(rng.randrange(users), PASSWORD)
+            yield 'POST', '/api/v1/auth/login', body.encode()
+        else:
+            yield 'GET', rng.choice(reads)(), b''
+
+
+async def load(port, requests, concurrency):
+    latencies = []
+    statuses = {}
+    queue = iter(requests)
+
+    async def worker():
+        for method, path, body in queue:
+            start = time.perf_counter()
+            status = await request(port, method, path, body)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--places', type=int, default=2000)
+    parser.add_argument('--logins', type=float, default=0.05, help='share of POST /auth/login')
+    parser.add_argument('--rounds', type=int, default=Config.BCRYPT_LOG_ROUNDS)
+    parser.add_argument('--modes', default='wsgi,asgi')
+    parser.add_argument('--serve', choices=('wsgi', 'asgi'), help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=8750, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.serve, args.db, args.port, args.rounds)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        place_ids = seed(create_app(make_config(db_path, args.rounds)), args.users, args.places)
+        requests = list(workload(args.requests, args.users, place_ids, args.logins))
+
+        print("{} requests, {} concurrent connections, {:.0%} logins, bcrypt rounds {}".format(
+            args.requests, args.concurrency, args.logins, args.rounds))
+        for i, mode in enumerate(args.modes.split(',')):
+            port = args.port + i
+            process = start_server(mode, db_path, port, args.rounds)
+            try:
+                latencies, statuses, elapsed = asyncio.run(load(port, requests, args.concurrency))
+            finally:
+                process.terminate()
+                process.wait()
+            print("{:<5} p50 {:8.2f} ms  p99 {:8.2f} ms  {:8.1f} req/s  status {}".format(
+                mode, percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000,
+                len(latencies) / elapsed, statuses))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Auth path benchmark on a local SQLite database with synthetic users.
+
+    python -m benchmarks.auth_bench --users 200 --requests 200 --threads 4
+
+Prints p50/p99 latency and requests/sec for /auth/login, /auth/register and
+an authenticated endpoint (POST /places/), then the share of a login spent in the email
+query, the bcrypt check and the JWT encoding.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.Extensions import password_hasher  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import facade  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+PASSWORD = 'benchmark-password'
+
+
+def make_config(db_path, rounds, rate_limit):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        JWT_SECRET_KEY = 'benchmark-secret-key-0123456789abcdef'
+        BCRYPT_LOG_ROUNDS = rounds
+        RATE_LIMIT_ENABLED = rate_limit
+    return BenchConfig
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run(name, app, count, threads, call):
+    """Call call(client, i) count times over threads clients and print the stats."""
+    latencies = []
+    statuses = {}
+
+    def worker(offset):
+        client = app.test_client()
+        for i in range(offset, count, threads):
+            start = time.perf_counter()
+            status = call(client, i)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(worker, range(threads)))
+    elapsed = time.perf_counter() - start
+    print("{:<14} p50 {:8.2f} ms  p99 {:8.2f} ms  {:8.1f} req/s  status {}".format(
+        name, percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000,
+        count / elapsed, statuses))
+
+
+def seed_users(app, count):
+    """Insert users sharing one precomputed hash, so seeding is not a bcrypt benchmark."""
+    with app.app_context():
+        hashed = password_hasher.hash(PASSWORD)
+        db.session.execute(insert(User), [
+            {'first_name': 'Bench', 'last_name': str(i), 'email': 'bench{}@example.com'.format(i),
+             'password': hashed, 'is_admin': False}
+            for i in range(count)
+        ])
+        db.session.commit()
+
+
+def login_breakdown(app, count):
+    """Time the three steps of a login outside of the HTTP stack."""
+    steps = {'query': [], 'bcrypt': [], 'jwt': []}
+    with app.app_context():
+        for i in range(count):
+            t0 = time.perf_counter()
+            user = facade.get_user_by_email('bench{}@example.com'.format(i))
+            t1 = time.perf_counter()
+            user.verify_password(PASSWORD)
+            t2 = time.perf_counter()
+            create_access_token(identity=str(user.id), additional_claims={'is_admin': user.is_admin})
+            t3 = time.perf_counter()
+            steps['query'].append(t1 - t0)
+            steps['bcrypt'].append(t2 - t1)
+            steps['jwt'].append(t3 - t2)
+            db.session.remove()
+    total = sum(statistics.mean(v) for v in steps.values())
+    for step, values in steps.items():
+        mean = statistics.mean(values)
+        print("  {:<7} {:8.3f} ms  {:5.1f}%".format(step, mean * 1000, 100 * mean / total))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=Config.BCRYPT_LOG_ROUNDS)
+    parser.add_argument('--rate-limit', action='store_true', help='enable RATE_LIMITS during the run')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(make_config(os.path.join(tmp, 'bench.db'), args.rounds, args.rate_limit))
+        seed_users(app, args.users)
+        with app.app_context():
+            token = create_access_token(identity=str(facade.get_user_by_email('bench0@example.com').id))
+        headers = {'Authorization': 'Bearer ' + token}
+
+        print("{} users, {} requests, {} threads, bcrypt rounds {}".format(
+            args.users, args.requests, args.threads, args.rounds))
+        run('login', app, args.requests, args.threads, lambda c, i: c.post('/api/v1/auth/login', json={
+            'email': 'bench{}@example.com'.format(i % args.users), 'password': PASSWORD}).status_code)
+        run('login (bad)', app, args.requests, args.threads, lambda c, i: c.post('/api/v1/auth/login', json={
+            'email': 'bench{}@example.com'.format(i % args.users), 'password': 'wrong'}).status_code)
+        run('register', app, args.requests, args.threads, lambda c, i: c.post('/api/v1/auth/register', json={
+            'first_name': 'New', 'last_name': 'User', 'email': 'new{}@example.com'.format(i),
+            'password': PASSWORD}).status_code)
+        run('create place', app, args.requests, args.threads, lambda c, i: c.post('/api/v1/places/', headers=headers, json={
+            'title': 'Bench {}'.format(i), 'price': 50, 'latitude': 45.0, 'longitude': 5.0}).status_code)
+
+        print("login breakdown:")
+        login_breakdown(app, min(args.users, 50))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Secondary indexes of InMemoryRepository against linear scans.
+
+    python -m benchmarks.inmemory_index_bench --sizes 10000,100000,1000000
+
+For each size, fills an InMemoryRepository with synthetic users (unique
+email index, non-unique city index, ordered score index) and times
+get_by_attribute on the email, find_all_by_attribute on the city and
+find_by_range on the score, then the same lookups as linear scans over the
+stored objects. Cities and score ranges hold about MATCHES objects at every
+size, so the indexed lookups should not grow with the size.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.persistence.repository import InMemoryRepository  # noqa: E402
+
+MATCHES = 10
+
+
+class Record:
+    __slots__ = ('id', 'email', 'city', 'score', 'updated_at')
+
+    def __init__(self, i, cities, rng):
+        self.id = str(uuid.UUID(int=rng.getrandbits(128)))
+        self.email = 'user{}@example.com'.format(i)
+        self.city = 'city{}'.format(i % cities)
+        self.score = rng.random()
+        self.updated_at = None
+
+
+def timed(lookup, args_list):
+    """Median seconds of one lookup call over args_list."""
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        lookup(*args)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def scan_one(repo, attr_name, value):
+    return next((obj for obj in repo._storage.values() if getattr(obj, attr_name) == value), None)
+
+
+def scan_all(repo, attr_name, value):
+    return [obj for obj in repo._storage.values() if getattr(obj, attr_name) == value]
+
+
+def scan_range(repo, attr_name, low, high):
+    return [obj for obj in repo._storage.values() if low <= getattr(obj, attr_name) <= high]
+
+
+def run(size, args):
+    rng = random.Random(size)
+    repo = InMemoryRepository(indexes={
+        'email': {'unique': True},
+        'city': {},
+        'score': {'ordered': True},
+    })
+    cities = max(1, size // MATCHES)
+    start = time.perf_counter()
+    for i in range(size):
+        repo.add(Record(i, cities, rng))
+    build = time.perf_counter() - start
+
+    emails = [('email', 'user{}@example.com'.format(rng.randrange(size))) for _ in range(args.lookups)]
+    cities = [('city', 'city{}'.format(rng.randrange(cities))) for _ in range(args.lookups)]
+    width = MATCHES / size
+    scores = [('score', low, low + width) for low in (rng.random() for _ in range(args.lookups))]
+    # mêmes réponses que les parcours linéaires
+    for (_, email), (_, city), (_, low, high) in zip(emails, cities, scores[:args.scans]):
+        assert repo.get_by_attribute('email', email) is scan_one(repo, 'email', email)
+        assert {o.id for o in repo.find_all_by_attribute('city', city)} == {o.id for o in scan_all(repo, 'city', city)}
+        assert {o.id for o in repo.find_by_range('score', low, high)} == \
+            {o.id for o in scan_range(repo, 'score', low, high)}
+
+    results = {
+        'email (unique)': (timed(repo.get_by_attribute, emails),
+                           timed(lambda a, v: scan_one(repo, a, v), emails[:args.scans])),
+        'city (all matches)': (timed(repo.find_all_by_attribute, cities),
+                               timed(lambda a, v: scan_all(repo, a, v), cities[:args.scans])),
+        'score (range)': (timed(repo.find_by_range, scores),
+                          timed(lambda a, lo, hi: scan_range(repo, a, lo, hi), scores[:args.scans])),
+    }
+    print("{:,} objects, built in {:.1f} s".format(size, build))
+    for name, (indexed, scan) in results.items():
+        print("  {:<20} indexed {:9.2f} us   scan {:10.2f} ms   x{:,.0f}".format(
+            name, indexed * 1e6, scan * 1e3, scan / indexed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--lookups', type=int, default=1000, help='indexed lookups timed per size')
+    parser.add_argument('--scans', type=int, default=5, help='linear scans timed per size')
+    args = parser.parse_args()
+    for size in args.sizes.split(','):
+        run(int(size), args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Filtered / sorted place listing benchmark, SQL and in-memory paths.
+
+    python -m benchmarks.place_query_bench --places 1000000
+
+Fills a temporary SQLite database with synthetic places (owners, amenities,
+rating aggregates) and times PlaceRepository.search and
+InMemoryPlaceRepository.search for the first page of a few typical queries.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models.amenity import Amenity  # noqa: E402
+from app.models.place import Place, place_amenity  # noqa: E402
+from app.persistence.place_query import PlaceQuery  # noqa: E402
+from app.persistence.place_repository import InMemoryPlaceRepository, PlaceRepository  # noqa: E402
+
+QUERIES = {
+    'no filter': {},
+    'price range': {'min_price': 50, 'max_price': 80},
+    'price, -price': {'min_price': 50, 'max_price': 80, 'sort': '-price'},
+    'owner': {'owner_id': 'owner-7', 'sort': '-created_at'},
+    'amenities all': {'amenity_ids': [1, 2], 'sort': 'price'},
+    'amenities any': {'amenity_ids': [3, 4], 'match_all': False},
+    'top rated': {'sort': '-rating'},
+    'combined': {'min_price': 20, 'max_price': 120, 'amenity_ids': [5], 'sort': '-rating'},
+}
+
+
+class MemoryPlace:
+    """Lightweight place for the in-memory path (what search() reads)."""
+    __slots__ = ('id', 'price', 'owner_id', 'created_at', 'review_count', 'rating_sum',
+                 'rating_average', 'amenities', 'latitude', 'longitude')
+
+
+class AmenityRef:
+    __slots__ = ('id',)
+
+    def __init__(self, amenity_id):
+        self.id = amenity_id
+
+
+def synthetic_rows(count, owners, amenities, seed=42):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        reviews = rng.choice((0, 0, 1, 3, 10, 40))
+        rating_sum = sum(rng.randint(1, 5) for _ in range(reviews))
+        yield {
+            'id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'title': 'Place {}'.format(i),
+            'price': round(rng.uniform(10, 500), 2),
+            'latitude': rng.uniform(-60, 60),
+            'longitude': rng.uniform(-180, 180),
+            'owner_id': 'owner-{}'.format(rng.randrange(owners)),
+            'review_count': reviews,
+            'rating_sum': rating_sum,
+            'rating_average': rating_sum / reviews if reviews else 0.0,
+            'created_at': start + timedelta(seconds=i),
+            'updated_at': start + timedelta(seconds=i),
+        }, rng.sample(range(1, amenities + 1), rng.randint(0, 4))
+
+
+def fill(count, owners, amenities, chunk=20000):
+    db.session.execute(db.insert(Amenity), [{'name': 'amenity {}'.format(i)} for i in range(amenities)])
+    memory = InMemoryPlaceRepository()
+    places, links = [], []
+    for row, amenity_ids in synthetic_rows(count, owners, amenities):
+        places.append(row)
+        links.extend({'place_id': row['id'], 'amenity_id': a} for a in amenity_ids)
+        obj = MemoryPlace()
+        for key in MemoryPlace.__slots__[:-3]:
+            setattr(obj, key, row[key])
+        obj.latitude, obj.longitude = row['latitude'], row['longitude']
+        obj.amenities = [AmenityRef(a) for a in amenity_ids]
+        memory.add(obj)
+        if len(places) >= chunk:
+            db.session.execute(db.insert(Place), places)
+            db.session.execute(place_amenity.insert(), links)
+            places, links = [], []
+    if places:
+        db.session.execute(db.insert(Place), places)
+        db.session.execute(place_amenity.insert(), links)
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+    return memory
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+        db.session.expunge_all()
+    return statistics.median(timings) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--places', type=int, default=1000000)
+    parser.add_argument('--owners', type=int, default=10000)
+    parser.add_argument('--amenities', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+        app = create_app(BenchConfig)
+        with app.app_context():
+            start = time.perf_counter()
+            memory = fill(args.places, args.owners, args.amenities)
+            print("{} places loaded in {:.1f}s".format(args.places, time.perf_counter() - start))
+            sql = PlaceRepository()
+            print("{:<16} {:>10} {:>12}  rows".format('query', 'sql ms', 'memory ms'))
+            for name, filters in QUERIES.items():
+                query = PlaceQuery(**filters)
+                sql_ms, (sql_page, _) = timed(lambda: sql.search(query, args.limit), args.repeat)
+                mem_ms, (mem_page, _) = timed(lambda: memory.search(query, args.limit), args.repeat)
+                same = [p.id for p in sql_page] == [p.id for p in mem_page]
+                print("{:<16} {:>10.2f} {:>12.2f}  {}{}".format(
+                    name, sql_ms, mem_ms, len(sql_page), '' if same else '  (results differ!)'))
+
+
+if __name__ == '__main__':
+    main()
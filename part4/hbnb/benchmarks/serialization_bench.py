@@ -0,0 +1,99 @@
+"""Serialization cost per 10k rows, hand-written to_dict vs compiled serializers.
+
+    python -m benchmarks.serialization_bench --rows 10000
+
+"before" is the per-model to_dict the models used to have plus json.dumps
+(what flask-restx does with the returned list); "after" is the compiled
+Serializer plus serializers.dumps, with each available JSON backend.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime
+from sqlalchemy.orm import configure_mappers
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, serializers  # noqa: E402
+from app.models.amenity import Amenity  # noqa: E402
+from app.models.place import Place  # noqa: E402
+from app.models.review import Review  # noqa: E402
+from app.models.user import User  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def legacy_user(u):
+    return {"id": str(u.id), "first_name": u.first_name, "last_name": u.last_name, "email": u.email,
+            "is_admin": u.is_admin,
+            "created_at": u.created_at.isoformat() if hasattr(u, 'created_at') else None,
+            "updated_at": u.updated_at.isoformat() if hasattr(u, 'updated_at') else None}
+
+
+def legacy_place(p):
+    # datetimes were left to the JSON encoder
+    return {'id': p.id, 'title': p.title, 'description': p.description, 'price': p.price,
+            'latitude': p.latitude, 'longitude': p.longitude, 'owner_id': p.owner_id,
+            'created_at': p.created_at, 'updated_at': p.updated_at}
+
+
+def legacy_review(r):
+    return {"id": r.id, "user_id": r.user_id, "place_id": r.place_id, "text": r.text, "rating": r.rating}
+
+
+def legacy_amenity(a):
+    return {'id': a.id, 'name': a.name}
+
+
+def make(model, count, **values):
+    """Detached instances built without __init__ (no validation, no query)."""
+    now = datetime(2024, 5, 1, 12, 30)
+    objs = []
+    for i in range(count):
+        obj = model.__mapper__.class_manager.new_instance()
+        obj.id = i if model is Amenity else str(uuid.uuid4())
+        obj.created_at = obj.updated_at = now
+        for key, value in values.items():
+            setattr(obj, key, value(i) if callable(value) else value)
+        objs.append(obj)
+    return objs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    create_app(BenchConfig)
+    configure_mappers()
+    n = args.rows
+    cases = {
+        'User': (legacy_user, make(User, n, first_name='Ada', last_name='Lovelace',
+                                   email=lambda i: 'user{}@example.com'.format(i), is_admin=False)),
+        'Place': (legacy_place, make(Place, n, title=lambda i: 'Place {}'.format(i), description='Cozy loft',
+                                     price=80.0, latitude=48.85, longitude=2.35, owner_id='owner')),
+        'Review': (legacy_review, make(Review, n, user_id='u', place_id='p', text='Great stay', rating=5)),
+        'Amenity': (legacy_amenity, make(Amenity, n, name=lambda i: 'amenity {}'.format(i))),
+    }
+    backends = ['json'] + (['orjson'] if serializers.orjson is not None else [])
+    print("ms per {} rows (best of {})".format(n, args.repeat))
+    print("{:<8} {:>8} ".format('model', 'before') + ''.join('{:>14}'.format('after/' + b) for b in backends))
+    for name, (legacy, objs) in cases.items():
+        before = min(timeit.repeat(lambda: json.dumps([legacy(o) for o in objs], default=str),
+                                   number=1, repeat=args.repeat))
+        serializer = serializers.serializer_for(type(objs[0]))
+        after = []
+        for backend in backends:
+            serializers._backend = backend
+            after.append(min(timeit.repeat(lambda: serializers.dumps(serializer.many(objs)),
+                                           number=1, repeat=args.repeat)))
+        print("{:<8} {:>8.2f} ".format(name, before * 1000) + ''.join('{:>14.2f}'.format(t * 1000) for t in after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Read/write throughput of SQLite with several worker processes.
+
+    python -m benchmarks.sqlite_concurrency_bench --workers 4 --threads 4 --writes 0.2
+
+For each configuration (Config defaults, ProductionConfig pool + PRAGMAs),
+seeds a fresh database, forks --workers processes like `flask serve` and
+runs --threads clients in each for --duration seconds: reads of a place
+(detail or a page of the list) and, for a --writes share, place creations.
+Prints reads/s, writes/s, p50/p99 latencies and the failed requests.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config, ProductionConfig  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.server import release_connections  # noqa: E402
+from benchmarks.asgi_bench import percentile, seed  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+CONFIGS = {'default': Config, 'production': ProductionConfig}
+
+
+def make_config(name, db_path):
+    class BenchConfig(CONFIGS[name]):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        JWT_SECRET_KEY = 'benchmark-secret-key-0123456789abcdef'
+        BCRYPT_LOG_ROUNDS = 4
+        AUTO_MIGRATE = True  # base neuve : ProductionConfig ne crée pas les tables
+    return BenchConfig
+
+
+def client_loop(app, token, place_ids, deadline, write_share, rng, stats):
+    client = app.test_client()
+    headers = {'Authorization': 'Bearer ' + token}
+    while time.monotonic() < deadline:
+        write = rng.random() < write_share
+        start = time.perf_counter()
+        try:
+            if write:
+                status = client.post('/api/v1/places/', headers=headers, json={
+                    'title': 'New place', 'price': rng.uniform(10, 500),
+                    'latitude': 45.0, 'longitude': 5.0}).status_code
+            elif rng.random() < 0.5:
+                status = client.get('/api/v1/places/' + rng.choice(place_ids)).status_code
+            else:
+                status = client.get('/api/v1/places/?limit=20').status_code
+        except Exception:
+            status = 500
+        elapsed = time.perf_counter() - start
+        if status >= 400:
+            stats['errors'] += 1
+        else:
+            stats['write' if write else 'read'].append(elapsed)
+
+
+def worker(app, token, place_ids, threads, duration, write_share, number, results):
+    """One forked process: threads clients until the deadline, stats sent back in results."""
+    stats = {'read': [], 'write': [], 'errors': 0}
+    deadline = time.monotonic() + duration
+    clients = [threading.Thread(target=client_loop, args=(
+        app, token, place_ids, deadline, write_share, random.Random(number * 1000 + i), stats))
+        for i in range(threads)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    results.put(stats)
+
+
+def run(name, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(make_config(name, os.path.join(tmp, 'bench.db')))
+        # "database is locked" : compté comme erreur, sans trace dans la sortie
+        app.logger.disabled = True
+        place_ids = seed(app, 50, args.places)
+        with app.app_context():
+            token = create_access_token(identity=db.session.scalars(db.select(User.id)).first())
+        release_connections(app)
+
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [context.Process(target=worker, args=(
+            app, token, place_ids, args.threads, args.duration, args.writes, i, results))
+            for i in range(args.workers)]
+        for process in processes:
+            process.start()
+        stats = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    reads = [t for s in stats for t in s['read']]
+    writes = [t for s in stats for t in s['write']]
+    errors = sum(s['errors'] for s in stats)
+    print("{:<10} reads {:7.1f}/s  p50 {:6.1f} ms  p99 {:7.1f} ms | writes {:6.1f}/s  p50 {:6.1f} ms  "
+          "p99 {:7.1f} ms | errors {}".format(
+              name, len(reads) / args.duration, percentile(reads, 50) * 1000 if reads else 0,
+              percentile(reads, 99) * 1000 if reads else 0, len(writes) / args.duration,
+              percentile(writes, 50) * 1000 if writes else 0, percentile(writes, 99) * 1000 if writes else 0,
+              errors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--writes', type=float, default=0.2, help='share of place creations')
+    parser.add_argument('--places', type=int, default=2000)
+    parser.add_argument('--configs', default='default,production')
+    args = parser.parse_args()
+
+    print("{} workers x {} threads, {:.0%} writes, {} s per configuration".format(
+        args.workers, args.threads, args.writes, args.duration))
+    for name in args.configs.split(','):
+        run(name, args)
+
+
+if __name__ == '__main__':
+    main()
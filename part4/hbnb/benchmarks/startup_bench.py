@@ -0,0 +1,122 @@
+"""Startup time of the application, in fresh interpreters.
+
+    python -m benchmarks.startup_bench --runs 5
+
+For each configuration (Config: tables, migrations and Swagger at
+create_app; ProductionConfig: database migrated beforehand, no DDL and no
+Swagger), starts --runs new Python processes that each time `import app`,
+create_app() and the first request, and prints the median of each step.
+Then prints the modules whose import costs the most (python -X importtime),
+grouped by top-level package.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STEPS = ('import', 'create_app', 'first_request')
+
+
+def child(name, db_path, migrate_only):
+    """Measure one startup in this process (called in a subprocess by main)."""
+    sys.path.insert(0, ROOT)
+    start = time.perf_counter()
+    import app
+    from config import Config, ProductionConfig
+    imported = time.perf_counter()
+
+    class BenchConfig(ProductionConfig if name == 'production' else Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        JWT_SECRET_KEY = 'benchmark-secret-key-0123456789abcdef'
+
+    if migrate_only:
+        BenchConfig.AUTO_MIGRATE = True
+    application = app.create_app(BenchConfig)
+    created = time.perf_counter()
+    if migrate_only:
+        return
+    application.test_client().get('/api/v1/amenities/').close()
+    served = time.perf_counter()
+    print(json.dumps({'import': imported - start, 'create_app': created - imported,
+                      'first_request': served - created}))
+
+
+def run_child(name, db_path, migrate_only=False):
+    argv = [sys.executable, '-m', 'benchmarks.startup_bench', '--child', name, '--db', db_path]
+    if migrate_only:
+        argv.append('--migrate-only')
+    output = subprocess.run(argv, cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    return None if migrate_only else json.loads(output)
+
+
+def measure(name, runs):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'startup.db')
+        if name == 'production':
+            # Comme un déploiement : `flask migrate` avant le démarrage
+            run_child(name, db_path, migrate_only=True)
+        samples = [run_child(name, db_path) for _ in range(runs)]
+    return {step: statistics.median(s[step] for s in samples) for step in STEPS}
+
+
+def import_profile(top):
+    """Self import time (s) per top-level package, and the slowest app.* modules."""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=ROOT, check=True, capture_output=True, text=True).stderr
+    packages = defaultdict(int)
+    ours = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, module = line[len('import time:'):].split('|')
+        module = module.strip()
+        packages[module.split('.')[0]] += int(own)
+        if module == 'app' or module.startswith('app.'):
+            ours.append((int(cumulative), module))
+    packages = sorted(packages.items(), key=lambda item: -item[1])[:top]
+    ours = sorted(ours, reverse=True)[:top]
+    return ([(package, us / 1e6) for package, us in packages],
+            [(module, us / 1e6) for us, module in ours])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--configs', default='default,production')
+    parser.add_argument('--top', type=int, default=8, help='packages and modules listed')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--migrate-only', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child, args.db, args.migrate_only)
+
+    results = {name: measure(name, args.runs) for name in args.configs.split(',')}
+    packages, modules = import_profile(args.top)
+    if args.json:
+        print(json.dumps({'startup': results, 'import_packages': dict(packages),
+                          'import_app_modules': dict(modules)}, indent=2))
+        return
+
+    print("median of {} fresh processes".format(args.runs))
+    for name, result in results.items():
+        print("{:<10} import {:6.1f} ms  create_app {:6.1f} ms  first request {:6.1f} ms  total {:6.1f} ms".format(
+            name, *(result[step] * 1000 for step in STEPS), sum(result.values()) * 1000))
+    print("\nimport time by package (self):")
+    for package, seconds in packages:
+        print("  {:<24} {:6.1f} ms".format(package, seconds * 1000))
+    print("\nslowest app modules (cumulative):")
+    for module, seconds in modules:
+        print("  {:<40} {:6.1f} ms".format(module, seconds * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Full-text search benchmark: indexing throughput and query latency.
+
+    python -m benchmarks.text_search_bench --places 500000
+
+Inserts synthetic places into a temporary SQLite database (the FTS5 index
+is filled by its triggers) and into the in-memory InvertedIndex, then
+times a few searches of the first page on both.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models.place import Place  # noqa: E402
+from app.persistence import text_search  # noqa: E402
+from app.persistence.place_repository import PlaceRepository  # noqa: E402
+
+QUERIES = ('loft', 'cozy studio', 'mountain chalet pool', 'sea', 'b', 'chateau jardin', 'rareword')
+
+
+class Doc:
+    __slots__ = ('title', 'description')
+
+
+def vocabulary(size, rng):
+    common = ['cozy', 'loft', 'studio', 'sea', 'view', 'mountain', 'chalet', 'pool', 'garden',
+              'jardin', 'château', 'beach', 'bright', 'quiet', 'central', 'house', 'room']
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return common + [''.join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size)]
+
+
+def synthetic_rows(count, seed=7):
+    rng = random.Random(seed)
+    words = vocabulary(5000, rng)
+    # Zipf-like: the first words are much more frequent
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    now = datetime(2024, 1, 1)
+    for i in range(count):
+        yield {
+            'id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'title': ' '.join(rng.choices(words, weights, k=rng.randint(2, 6))).capitalize(),
+            'description': ' '.join(rng.choices(words, weights, k=rng.randint(0, 40))),
+            'price': 50.0, 'latitude': 0.0, 'longitude': 0.0, 'owner_id': 'owner',
+            'review_count': 0, 'rating_sum': 0, 'created_at': now, 'updated_at': now,
+        }
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+        db.session.expunge_all()
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--places', type=int, default=500000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+        app = create_app(BenchConfig)
+        with app.app_context():
+            rows = list(synthetic_rows(args.places))
+
+            start = time.perf_counter()
+            for i in range(0, len(rows), 10000):
+                db.session.execute(db.insert(Place), rows[i:i + 10000])
+            db.session.commit()
+            sql_seconds = time.perf_counter() - start
+
+            index = text_search.InvertedIndex(text_search.PLACE_FIELDS, text_search.PLACE_WEIGHTS)
+            start = time.perf_counter()
+            for row in rows:
+                doc = Doc()
+                doc.title, doc.description = row['title'], row['description']
+                index.add(row['id'], doc)
+            memory_seconds = time.perf_counter() - start
+
+            print("indexing {} places: sqlite+fts5 {:.0f} places/s, python index {:.0f} places/s".format(
+                args.places, args.places / sql_seconds, args.places / memory_seconds))
+
+            repo = PlaceRepository()
+            print("{:<22} {:>9} {:>12} {:>9}".format('query', 'fts5 ms', 'python ms', 'matches'))
+            for q in QUERIES:
+                fts_ms = timed(lambda: repo.search_text(q, args.limit), args.repeat)
+                py_ms = timed(lambda: index.search(q, args.limit), args.repeat)
+                print("{:<22} {:>9.2f} {:>12.2f} {:>9}".format(q, fts_ms, py_ms, len(index.search(q))))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,83 @@ class Config:
     DEBUG = False
     
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'super-secret-jwt-key')
-    JWT_ACCESS_TOKEN_EXPIRES = 3600
+    # Short-lived access tokens, renewed with the refresh token at /auth/refresh
+    JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 900))
+    JWT_REFRESH_TOKEN_EXPIRES = int(os.getenv('JWT_REFRESH_TOKEN_EXPIRES', 30 * 24 * 3600))
+
+    # Password hashing: bcrypt cost and the dedicated worker pool.
+    # Hashes made with another cost are redone at the next successful login.
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv('PASSWORD_HASH_QUEUE_SIZE', 64))
+
+    # Revoked token ids: 'memory' (one process) or 'sql' (revoked_tokens table),
+    # answers cached in a per-process LRU for JWT_DENYLIST_CACHE_TTL seconds
+    JWT_DENYLIST_STORE = os.getenv('JWT_DENYLIST_STORE', 'memory')
+    JWT_DENYLIST_SIZE = 10000
+    JWT_DENYLIST_CACHE_TTL = 5
+    # Expired entries dropped at most this often (seconds), on revocation;
+    # also `flask purge-revoked-tokens`, e.g. from cron
+    JWT_DENYLIST_SWEEP_INTERVAL = 60
+
+    # Token buckets on the auth endpoints: name -> (burst capacity, refill period in seconds).
+    # The buckets live in each process: with N workers a client may get up to N times these limits
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '0') == '1'
+    RATE_LIMITS = {
+        'login_ip': (20, 60),
+        'login_account': (5, 60),
+        'register_ip': (10, 60),
+    }
+
+    # Rows written per flush/commit by the bulk operations
+    BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', 500))
+    # JSON encoder of the list responses: 'orjson' (if installed) or 'json'
+    JSON_BACKEND = os.getenv('JSON_BACKEND')
+
+    # Rows fetched per round trip by the streamed list responses
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 1000))
+
+    # ASGI mode (asgi.py): async engine, by default on the same database with an async driver,
+    # and threads running the routes that have no async view
+    ASYNC_DATABASE_URI = os.getenv('ASYNC_DATABASE_URI')
+    ASYNC_ENGINE_OPTIONS = {}
+    ASGI_WSGI_WORKERS = int(os.getenv('ASGI_WSGI_WORKERS', 10))
+
+    # Schema: tables created and migrations applied by create_app (development, tests).
+    # When False the database is migrated beforehand with `flask --app run migrate`.
+    AUTO_MIGRATE = True
+    # Swagger UI (/api/v1/) and spec (/swagger.json)
+    SWAGGER_ENABLED = os.getenv('SWAGGER_ENABLED', '1') == '1'
+
+    # PRAGMAs run on each new SQLite connection (app/persistence/sqlite_pragmas.py)
+    SQLITE_PRAGMAS = {}
+
+    # Read replicas: bind keys of SQLALCHEMY_BINDS serving the repository reads,
+    # e.g. SQLALCHEMY_BINDS = {'replica_1': 'sqlite:///replica_1.db'}, READ_REPLICAS = ['replica_1'].
+    # A replica that fails is left aside for REPLICA_RETRY_AFTER seconds.
+    READ_REPLICAS = []
+    REPLICA_RETRY_AFTER = 30
+
+    # Serveur gunicorn (flask serve, gunicorn.conf.py) : adresse, processus workers,
+    # threads par worker, secondes laissées aux requêtes en cours à l'arrêt,
+    # délai d'un keep-alive inactif
+    SERVER_BIND = os.getenv('SERVER_BIND', '127.0.0.1:5000')
+    SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', os.cpu_count() or 1))
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', 8))
+    SERVER_GRACEFUL_TIMEOUT = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', 30))
+    SERVER_KEEPALIVE = int(os.getenv('SERVER_KEEPALIVE', 5))
+
+    # Read-through cache of Repository.get, per model ('local' or 'fake_shared').
+    # Set a model to None to disable its cache. Both backends are in-process: a write
+    # invalidates the cache of its own worker only, the others may serve the old
+    # object until its ttl (seconds) runs out.
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'local')
+    REPOSITORY_CACHE = {
+        'user': {'maxsize': 1024, 'ttl': 60},
+        'place': {'maxsize': 2048, 'ttl': 60},
+        'amenity': {'maxsize': 512, 'ttl': 300},
+        'review': None,
+    }
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -13,7 +89,39 @@ class DevelopmentConfig(Config):
     SQLALCHEMY_DATABASE_URI = 'sqlite:///developement.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+class ProductionConfig(Config):
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///production.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Démarrage sans DDL ni Swagger : `flask migrate` au déploiement
+    AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', '0') == '1'
+    SWAGGER_ENABLED = os.getenv('SWAGGER_ENABLED', '0') == '1'
+    # Révocations partagées par les workers de `flask serve` : avec 'memory', un logout
+    # ne vaudrait que dans un worker (serve refuse alors plus d'un worker)
+    JWT_DENYLIST_STORE = os.getenv('JWT_DENYLIST_STORE', 'sql')
+    # Per process: pool_size connections kept open, up to max_overflow more under load,
+    # then pool_timeout seconds of wait. pre_ping replaces a connection that was
+    # closed under us, recycle renews the old ones.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 5)),
+        'pool_timeout': 10,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+    }
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,  # en Kio : 64 Mo par connexion
+        'busy_timeout': 5000,  # ms
+    }
+    # READ_REPLICA_URIS=sqlite:///replica_1.db,sqlite:///replica_2.db
+    SQLALCHEMY_BINDS = {'replica_{}'.format(i): uri
+                        for i, uri in enumerate(os.getenv('READ_REPLICA_URIS', '').split(','), 1) if uri}
+    READ_REPLICAS = sorted(SQLALCHEMY_BINDS)
+
 config = {
     'development': DevelopmentConfig,
+    'production': ProductionConfig,
     'default': DevelopmentConfig
 }
@@ -0,0 +1,23 @@
+"""gunicorn settings of the API, hooks in app/server.py.
+
+    HBNB_CONFIG=production gunicorn -c gunicorn.conf.py run:app
+
+Same settings as flask serve: the SERVER_* keys of the config. Options given
+on the command line (--bind, --workers...) override them.
+"""
+import os
+from app import server
+from config import config as configs
+
+_config = configs[os.getenv('HBNB_CONFIG', 'default')]
+_options = server.gunicorn_options({key: getattr(_config, key) for key in dir(_config) if key.startswith('SERVER_')})
+
+bind = _options['bind']
+workers = _options['workers']
+worker_class = _options['worker_class']
+threads = _options['threads']
+graceful_timeout = _options['graceful_timeout']
+keepalive = _options['keepalive']
+preload_app = _options['preload_app']
+on_starting = _options['on_starting']
+post_fork = _options['post_fork']
@@ -1,6 +1,9 @@
+import os
 from app import create_app
+from config import config
 
-app = create_app()
+# HBNB_CONFIG=production flask --app run serve
+app = create_app(config[os.getenv('HBNB_CONFIG', 'default')])
 
 if __name__ == '__main__':
     app.run(debug=True)
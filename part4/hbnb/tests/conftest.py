@@ -0,0 +1,40 @@
+import pytest
+from config import Config
+from app import create_app, db
+from app.models.user import User
+
+
+class TestConfig(Config):
+    TESTING = True
+    JWT_SECRET_KEY = 'test-secret-key-0123456789abcdef'
+    BCRYPT_LOG_ROUNDS = 4
+
+
+@pytest.fixture
+def app(tmp_path):
+    class AppConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
+    app = create_app(AppConfig)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth(app, client):
+    """auth(email, admin=False) registers a user and returns its Authorization header."""
+    def login(email='user@example.com', admin=False):
+        client.post('/api/v1/auth/register', json={
+            'first_name': 'Test', 'last_name': 'User', 'email': email, 'password': 'password'})
+        if admin:
+            with app.app_context():
+                User.query.filter_by(email=email).one().is_admin = True
+                db.session.commit()
+        response = client.post('/api/v1/auth/login', json={'email': email, 'password': 'password'})
+        return {'Authorization': 'Bearer ' + response.json['access_token']}
+    return login
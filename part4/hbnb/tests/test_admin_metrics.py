@@ -0,0 +1,26 @@
+from threading import BoundedSemaphore
+from app.Extensions import password_hasher
+
+
+def test_metrics_are_for_admins_only(client, auth):
+    assert client.get('/api/v1/admin/metrics').status_code == 401
+    assert client.get('/api/v1/admin/metrics', headers=auth()).status_code == 403
+
+
+def test_password_hasher_counters(client, auth, monkeypatch):
+    admin = auth('admin@example.com', admin=True)
+    before = client.get('/api/v1/admin/metrics', headers=admin).json['password_hasher']
+    assert before['running'] == 0 and before['queue_depth'] == 0
+
+    # file pleine : aucune place libre dans le pool
+    full = BoundedSemaphore(1)
+    full.acquire()
+    monkeypatch.setattr(password_hasher, '_slots', full)
+    response = client.post('/api/v1/auth/login', json={'email': 'admin@example.com', 'password': 'password'})
+    assert response.status_code == 503
+    monkeypatch.undo()
+
+    client.post('/api/v1/auth/login', json={'email': 'admin@example.com', 'password': 'password'})
+    after = client.get('/api/v1/admin/metrics', headers=admin).json['password_hasher']
+    assert after['completed'] == before['completed'] + 1
+    assert after['rejected'] == before['rejected'] + 1
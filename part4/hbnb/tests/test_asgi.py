@@ -0,0 +1,58 @@
+import asyncio
+import json
+import pytest
+
+pytest.importorskip('a2wsgi')
+pytest.importorskip('aiosqlite')
+
+from app.asgi import HBnBAsgi, build_environ  # noqa: E402
+from app.services.async_facade import async_facade  # noqa: E402
+
+
+def scope_without_length(path, chunked):
+    """http scope of a POST with no content-length header."""
+    headers = [(b'content-type', b'application/json')]
+    if chunked:
+        headers.append((b'transfer-encoding', b'chunked'))
+    return {'type': 'http', 'method': 'POST', 'path': path, 'query_string': b'',
+            'http_version': '1.1', 'headers': headers}
+
+
+def call(application, scope, chunks):
+    """Run one ASGI request, the body sent in chunks; returns (status, body)."""
+    messages = [{'type': 'http.request', 'body': c, 'more_body': i < len(chunks) - 1}
+                for i, c in enumerate(chunks)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        try:
+            await application(scope, receive, send)
+        finally:
+            await async_facade.dispose()
+    asyncio.run(run())
+    status = next(m['status'] for m in sent if m['type'] == 'http.response.start')
+    return status, b''.join(m.get('body', b'') for m in sent if m['type'] == 'http.response.body')
+
+
+def test_content_length_is_the_size_of_the_body_read():
+    environ = build_environ(scope_without_length('/api/v1/auth/login', chunked=True), b'{"a": 1}')
+    assert environ['CONTENT_LENGTH'] == '8'
+    assert 'HTTP_TRANSFER_ENCODING' not in environ
+
+
+@pytest.mark.parametrize('chunked', [True, False])
+def test_login_without_content_length_on_the_async_path(app, client, chunked):
+    client.post('/api/v1/auth/register', json={
+        'first_name': 'Test', 'last_name': 'User', 'email': 'user@example.com', 'password': 'password'})
+    body = json.dumps({'email': 'user@example.com', 'password': 'password'}).encode()
+
+    status, response = call(HBnBAsgi(app), scope_without_length('/api/v1/auth/login', chunked),
+                            [body[:10], body[10:]])
+    assert status == 200, response
+    assert 'access_token' in json.loads(response)
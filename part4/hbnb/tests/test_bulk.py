@@ -0,0 +1,91 @@
+from app import db
+from app.models.user import User
+
+
+def create_amenity(client, admin, name):
+    response = client.post('/api/v1/amenities/', headers=admin, json={'name': name})
+    assert response.status_code == 201, response.json
+    return response.json['id']
+
+
+def create_place(client, headers, amenities=()):
+    response = client.post('/api/v1/places/', headers=headers, json={
+        'title': 'Flat', 'price': 80, 'latitude': 48.85, 'longitude': 2.35, 'amenities': list(amenities)})
+    assert response.status_code == 201, response.json
+    return response.json['id']
+
+
+def test_bulk_places_accept_string_and_integer_amenity_ids(client, auth):
+    admin = auth('admin@example.com', admin=True)
+    wifi, pool = create_amenity(client, admin, 'Wifi'), create_amenity(client, admin, 'Pool')
+    owner = auth()
+    place_id = create_place(client, owner, [str(wifi)])
+
+    response = client.post('/api/v1/places/bulk', headers=owner, json={
+        'create': [{'title': 'Loft', 'price': 120, 'latitude': 45.76, 'longitude': 4.83,
+                    'amenities': [wifi, str(pool)]}],
+        'update': [{'id': place_id, 'amenities': [str(pool)], 'price': 95}],
+    })
+    assert response.status_code == 200, response.json
+    assert response.json['updated'] == [place_id]
+    detail = client.get(f'/api/v1/places/{place_id}').json
+    assert detail['price'] == 95 and [a['name'] for a in detail['amenities']] == ['Pool']
+
+
+def test_bulk_places_write_nothing_when_a_row_is_invalid(client, auth):
+    owner = auth()
+    place_id = create_place(client, owner)
+    other = create_place(client, auth('other@example.com'))
+
+    response = client.post('/api/v1/places/bulk', headers=owner, json={
+        'update': [{'id': place_id, 'price': 50}, {'id': place_id, 'price': -1}],
+        'delete': [other],
+    })
+    assert response.status_code == 400
+    assert [(e['op'], e['index']) for e in response.json['errors']] == [('update', 1), ('delete', 0)]
+    assert client.get(f'/api/v1/places/{place_id}').json['price'] == 80
+    # champs tenus par l'application : ignorés
+    client.post('/api/v1/places/bulk', headers=owner, json={'update': [{'id': place_id, 'review_count': 9}]})
+    assert client.get(f'/api/v1/places/{place_id}').json['review_count'] == 0
+
+
+def test_bulk_amenities_accept_string_ids(client, auth):
+    admin = auth('admin@example.com', admin=True)
+    wifi, pool = create_amenity(client, admin, 'Wifi'), create_amenity(client, admin, 'Pool')
+
+    response = client.post('/api/v1/amenities/bulk', headers=admin, json={
+        'update': [{'id': str(wifi), 'name': 'Fast wifi'}], 'delete': [str(pool)]})
+    assert response.status_code == 200, response.json
+    assert response.json['deleted'] == 1
+    assert client.get(f'/api/v1/amenities/{wifi}').json['name'] == 'Fast wifi'
+    assert client.get(f'/api/v1/amenities/{pool}').status_code == 404
+
+    response = client.post('/api/v1/amenities/bulk', headers=admin, json={
+        'create': [{'name': 'fast WIFI'}], 'delete': ['999']})
+    assert response.status_code == 400
+    assert [e['error'] for e in response.json['errors']] == ["Amenity 'fast WIFI' already exists",
+                                                            "Amenity not found"]
+
+
+def test_bulk_users(app, client, auth):
+    admin = auth('admin@example.com', admin=True)
+    auth('a@example.com')
+    auth('b@example.com')
+    with app.app_context():
+        a_id, b_id = (User.query.filter_by(email=e).one().id for e in ('a@example.com', 'b@example.com'))
+
+    response = client.post('/api/v1/users/bulk', headers=admin, json={
+        'create': [{'first_name': 'C', 'last_name': 'User', 'email': 'c@example.com', 'password': 'password'}],
+        'update': [{'id': a_id, 'first_name': 'Alice', 'password': 'ignored'}],
+        'delete': [b_id],
+    })
+    assert response.status_code == 200, response.json
+    assert len(response.json['created']) == 1 and response.json['deleted'] == 1
+    with app.app_context():
+        assert db.session.get(User, a_id).first_name == 'Alice'
+        assert User.query.filter_by(email='b@example.com').first() is None
+
+    response = client.post('/api/v1/users/bulk', headers=admin, json={
+        'update': [{'id': a_id, 'email': 'admin@example.com'}, {'id': 'missing'}]})
+    assert response.status_code == 400
+    assert [e['error'] for e in response.json['errors']] == ["Email already in use", "User not found"]
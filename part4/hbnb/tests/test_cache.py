@@ -0,0 +1,86 @@
+import pytest
+from app import db
+from app.models.user import User
+from app.persistence import cache as cache_module
+from app.persistence.cache import CachedRepository, FakeSharedCache, LocalCache
+from app.persistence.query_counter import count_queries
+from app.services import facade
+
+
+@pytest.fixture
+def user_id(app):
+    with app.app_context():
+        user = facade.create_user({'first_name': 'Ada', 'last_name': 'Lovelace',
+                                   'email': 'ada@example.com', 'password': 'password'})
+        return user.id
+
+
+def test_local_cache_expires_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    cache = LocalCache(maxsize=2)
+    cache.set('a', 1, ttl=10)
+    cache.set('b', 2, ttl=10)
+    assert cache.get('a') == 1  # 'a' devient le plus récent
+    cache.set('c', 3, ttl=10)
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+    now[0] += 11
+    assert cache.get('a') is None and len(cache) == 1
+
+
+def test_second_get_is_a_hit_without_query(app, user_id):
+    with app.app_context():
+        facade.get_user(user_id)
+    with app.app_context(), count_queries() as counter:
+        user = facade.get_user(user_id)
+        assert user.first_name == 'Ada' and user in db.session
+    assert counter.count == 0
+    assert facade.cache_stats()['user'] == {'hits': 1, 'misses': 1}
+
+
+def test_update_and_delete_invalidate(app, user_id):
+    with app.app_context():
+        facade.get_user(user_id)
+        facade.update_user(user_id, {'first_name': 'Augusta'})
+    with app.app_context():
+        assert facade.get_user(user_id).first_name == 'Augusta'
+        facade.delete_user(user_id)
+    with app.app_context():
+        assert facade.get_user(user_id) is None
+
+
+def test_rolled_back_writes_are_not_cached(app, user_id):
+    repo = facade.user_repo
+    key = repo._key(user_id)
+    with app.app_context():
+        facade.get_user(user_id)
+        with pytest.raises(RuntimeError):
+            with facade.transaction():
+                facade.update_user(user_id, {'first_name': 'Uncommitted'})
+                # relu dans la transaction : valeur non commitée, pas mise en cache
+                assert facade.get_user(user_id).first_name == 'Uncommitted'
+                assert repo.backend.get(key) is None
+                raise RuntimeError
+    with app.app_context():
+        assert facade.get_user(user_id).first_name == 'Ada'
+        assert repo.backend.get(key)['first_name'] == 'Ada'
+
+
+def test_shared_backend_round_trip(app, user_id):
+    with app.app_context():
+        repo = CachedRepository(facade.user_repo.repo, FakeSharedCache())
+        repo.get(user_id)
+    with app.app_context():
+        user = repo.get(user_id)
+        assert repo.stats() == {'hits': 1, 'misses': 1}
+        assert (user.email, user.first_name) == ('ada@example.com', 'Ada')
+        # l'instance rattachée à la session peut être modifiée et commitée
+        user.first_name = 'Countess'
+        db.session.commit()
+        assert db.session.get(User, user_id).first_name == 'Countess'
+
+
+def test_metrics_show_the_cache_counters(client, auth):
+    admin = auth('admin@example.com', admin=True)
+    metrics = client.get('/api/v1/admin/metrics', headers=admin).json
+    assert set(metrics['cache']) == {'user', 'place', 'amenity'}
@@ -0,0 +1,78 @@
+import pytest
+
+
+def create_place(client, headers, title='Flat'):
+    response = client.post('/api/v1/places/', headers=headers, json={
+        'title': title, 'price': 80, 'latitude': 48.85, 'longitude': 2.35, 'amenities': []})
+    assert response.status_code == 201
+    return response.json['id']
+
+
+@pytest.mark.parametrize('path', ['/api/v1/places/', '/api/v1/places/?limit=1', '/api/v1/amenities/',
+                                  '/api/v1/places/?sort=-price&limit=1'])
+def test_unchanged_list_is_304_until_a_write(client, auth, path):
+    headers = auth()
+    create_place(client, headers)
+    first = client.get(path)
+    assert first.status_code == 200 and first.headers['ETag']
+
+    again = client.get(path, headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304 and again.data == b''
+
+    create_place(client, headers, 'Loft')
+    admin = auth('admin@example.com', admin=True)
+    client.post('/api/v1/amenities/', headers=admin, json={'name': 'Wifi'})
+    changed = client.get(path, headers={'If-None-Match': first.headers['ETag']})
+    assert changed.status_code == 200 and changed.headers['ETag'] != first.headers['ETag']
+
+
+@pytest.mark.parametrize('query', ['limit=0', 'limit=abc', 'cursor=not-a-cursor', 'fields=password',
+                                   'sort=rating&cursor=not-a-cursor', 'sort=unknown', 'min_price=x'])
+@pytest.mark.parametrize('condition', [{'If-None-Match': '*'},
+                                       {'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'}])
+def test_invalid_parameters_are_400_even_when_the_copy_is_current(client, auth, query, condition):
+    create_place(client, auth())
+    assert client.get('/api/v1/places/?' + query, headers=condition).status_code == 400
+
+
+@pytest.mark.parametrize('query', ['q=&limit=5', 'q=flat&cursor=bad', 'bbox=1,2', 'lat=100&lon=0&radius_km=1'])
+def test_invalid_search_is_400_even_when_the_copy_is_current(client, query):
+    assert client.get('/api/v1/places/search?' + query, headers={'If-None-Match': '*'}).status_code == 400
+
+
+def test_invalid_amenity_page_is_400_even_when_the_copy_is_current(client):
+    assert client.get('/api/v1/amenities/?cursor=bad', headers={'If-None-Match': '*'}).status_code == 400
+
+
+def test_place_detail_is_304_while_unchanged(client, auth):
+    headers = auth()
+    place_id = create_place(client, headers)
+    first = client.get(f'/api/v1/places/{place_id}')
+    etag = first.headers['ETag']
+    assert client.get(f'/api/v1/places/{place_id}', headers={'If-None-Match': etag}).status_code == 304
+
+    client.put(f'/api/v1/places/{place_id}', headers=headers, json={'price': 90})
+    changed = client.get(f'/api/v1/places/{place_id}', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.json['price'] == 90
+
+
+def test_if_match_guards_place_updates(client, auth):
+    headers = auth()
+    place_id = create_place(client, headers)
+    etag = client.get(f'/api/v1/places/{place_id}').headers['ETag']
+
+    matched = client.put(f'/api/v1/places/{place_id}', headers=dict(headers, **{'If-Match': etag}),
+                         json={'price': 90})
+    assert matched.status_code == 200
+
+    # l'ETag lu avant la mise à jour ne correspond plus
+    stale = client.put(f'/api/v1/places/{place_id}', headers=dict(headers, **{'If-Match': etag}),
+                       json={'price': 100})
+    assert stale.status_code == 412
+    assert client.get(f'/api/v1/places/{place_id}').json['price'] == 90
+
+    stale_delete = client.delete(f'/api/v1/places/{place_id}', headers=dict(headers, **{'If-Match': etag}))
+    assert stale_delete.status_code == 412
+    fresh = client.get(f'/api/v1/places/{place_id}').headers['ETag']
+    assert client.delete(f'/api/v1/places/{place_id}',
+                         headers=dict(headers, **{'If-Match': fresh})).status_code == 200
@@ -0,0 +1,98 @@
+import ast
+from pathlib import Path
+import pytest
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+from app.persistence.place_query import PlaceQuery
+from app.persistence.place_repository import search_statement
+from app.persistence.query_plan import assert_uses_index, explain
+from app.persistence import repository
+from app.persistence.repository import is_unique_violation
+
+
+def test_email_lookup_uses_the_unique_index(app):
+    with app.app_context():
+        # index créé par unique=True sur users.email
+        plan = explain(User.query.filter_by(email='user@example.com'))
+    assert len(plan) == 1 and plan[0].startswith('SEARCH users USING') and '(email=?)' in plan[0]
+
+
+def test_reviews_by_place_use_an_index(app):
+    with app.app_context():
+        assert_uses_index(Review.query.filter_by(place_id='place-id'), 'ix_reviews_place_id')
+
+
+def test_one_review_per_user_and_place_uses_the_unique_index(app):
+    with app.app_context():
+        assert_uses_index(Review.query.filter_by(user_id='user-id', place_id='place-id'), 'uq_review_user_place')
+
+
+def test_places_of_an_owner_are_read_in_list_order(app):
+    with app.app_context():
+        plan = explain(search_statement(PlaceQuery(owner_id='owner-id')))
+        assert_uses_index(search_statement(PlaceQuery(owner_id='owner-id')), 'ix_places_owner_id_created_at')
+    assert not any('TEMP B-TREE' in line for line in plan), plan
+
+
+def test_place_pages_are_read_in_index_order(app):
+    with app.app_context():
+        plan = explain(Place.query.order_by(Place.created_at, Place.id))
+    assert any('ix_places_created_at_id' in line for line in plan), plan
+    assert not any('TEMP B-TREE' in line for line in plan), plan
+
+
+def test_top_rated_places_are_read_in_index_order(app):
+    with app.app_context():
+        plan = explain(search_statement(PlaceQuery(sort='-rating')))
+    assert any('ix_places_rating_average_id' in line for line in plan), plan
+    assert not any('TEMP B-TREE' in line for line in plan), plan
+
+
+def test_second_review_of_a_place_is_refused(client, auth):
+    owner = auth()
+    place_id = client.post('/api/v1/places/', headers=owner, json={
+        'title': 'Flat', 'price': 80, 'latitude': 48.85, 'longitude': 2.35, 'amenities': []}).json['id']
+    reviewer = auth('reviewer@example.com')
+    review = {'text': 'Nice', 'rating': 4, 'place_id': place_id}
+
+    assert client.post('/api/v1/reviews/', headers=reviewer, json=review).status_code == 201
+    response = client.post('/api/v1/reviews/', headers=reviewer, json=review)
+    assert response.status_code == 400
+    assert 'already reviewed' in response.json['message']
+
+
+def insert_review(**values):
+    review = Review('user-id', 'place-id', 'Nice', 4)
+    for name, value in values.items():
+        setattr(review, name, value)
+    db.session.add(review)
+    db.session.flush()
+
+
+def test_is_unique_violation_tells_unique_from_not_null(app):
+    with app.app_context():
+        insert_review()
+        with pytest.raises(IntegrityError) as duplicate:
+            insert_review()
+        assert is_unique_violation(duplicate.value)
+        db.session.rollback()
+
+        with pytest.raises(IntegrityError) as missing_text:
+            insert_review(text=None)
+        assert not is_unique_violation(missing_text.value)
+        db.session.rollback()
+
+
+def test_part2_attribute_index_is_a_copy_of_this_one():
+    def attribute_index_source(path):
+        source = path.read_text()
+        node = next(n for n in ast.parse(source).body if getattr(n, 'name', None) == 'AttributeIndex')
+        return ast.get_source_segment(source, node)
+
+    part2 = Path(__file__).resolve().parents[3] / 'part2' / 'hbnb' / 'app' / 'persistence' / 'repository.py'
+    if not part2.exists():
+        pytest.skip('part2 is not checked out')
+    assert attribute_index_source(part2) == attribute_index_source(Path(repository.__file__))
@@ -0,0 +1,46 @@
+import pytest
+from app.persistence.query_counter import assert_max_queries
+
+
+def create_place(client, headers, amenity_ids=()):
+    response = client.post('/api/v1/places/', headers=headers, json={
+        'title': 'Flat', 'price': 80, 'latitude': 48.85, 'longitude': 2.35, 'amenities': list(amenity_ids)})
+    assert response.status_code == 201
+    return response.json['id']
+
+
+def test_place_detail_is_one_query(app, client, auth):
+    admin = auth('admin@example.com', admin=True)
+    amenity_ids = [client.post('/api/v1/amenities/', headers=admin, json={'name': name}).json['id']
+                   for name in ('Wifi', 'Pool', 'Parking')]
+    owner = auth()
+    place_id = create_place(client, owner, amenity_ids)
+    for email in ('a@example.com', 'b@example.com'):
+        client.post('/api/v1/reviews/', headers=auth(email), json={
+            'text': 'Nice', 'rating': 4, 'place_id': place_id})
+
+    # owner, amenities et agrégats des reviews dans la même requête SQL
+    with app.app_context(), assert_max_queries(1):
+        response = client.get('/api/v1/places/' + place_id)
+
+    assert response.status_code == 200
+    assert response.json['owner']['email'] == 'user@example.com'
+    assert sorted(a['name'] for a in response.json['amenities']) == ['Parking', 'Pool', 'Wifi']
+    assert response.json['review_count'] == 2
+
+
+def test_place_detail_queries_do_not_grow_with_amenities(app, client, auth):
+    admin = auth('admin@example.com', admin=True)
+    amenity_ids = [client.post('/api/v1/amenities/', headers=admin, json={'name': 'Amenity {}'.format(i)}).json['id']
+                   for i in range(20)]
+    place_id = create_place(client, auth(), amenity_ids)
+
+    with app.app_context(), assert_max_queries(1):
+        response = client.get('/api/v1/places/' + place_id)
+    assert len(response.json['amenities']) == 20
+
+
+def test_assert_max_queries_reports_the_statements(app):
+    with app.app_context(), pytest.raises(AssertionError, match='FROM places'):
+        with assert_max_queries(0):
+            app.test_client().get('/api/v1/places/missing')
@@ -0,0 +1,84 @@
+from app import db
+from app.models.place import Place
+from app.persistence.place_repository import InMemoryPlaceRepository
+from app.services import facade
+
+
+def create_place(client, headers, title, price=80):
+    return client.post('/api/v1/places/', headers=headers, json={
+        'title': title, 'price': price, 'latitude': 48.85, 'longitude': 2.35, 'amenities': []}).json['id']
+
+
+def review(client, headers, place_id, rating):
+    response = client.post('/api/v1/reviews/', headers=headers,
+                           json={'text': 'Nice', 'rating': rating, 'place_id': place_id})
+    assert response.status_code == 201
+    return response.json['id']
+
+
+def test_rating_sort_follows_the_review_writes(client, auth):
+    owner = auth()
+    first, second = create_place(client, owner, 'First'), create_place(client, owner, 'Second')
+    alice, bob = auth('alice@example.com'), auth('bob@example.com')
+    review(client, alice, first, 3)
+    review(client, alice, second, 4)
+    bob_review = review(client, bob, second, 5)
+
+    def top_rated():
+        items = client.get('/api/v1/places/?sort=-rating&limit=10').json['items']
+        return [(p['title'], p['average_rating']) for p in items]
+
+    assert top_rated() == [('Second', 4.5), ('First', 3.0)]
+    client.put(f'/api/v1/reviews/{bob_review}', headers=bob, json={'rating': 1})
+    assert top_rated() == [('First', 3.0), ('Second', 2.5)]
+    client.delete(f'/api/v1/reviews/{bob_review}', headers=bob)
+    assert top_rated() == [('Second', 4.0), ('First', 3.0)]
+
+
+def test_fields_of_a_filtered_page_limit_the_columns_loaded(app, client, auth):
+    owner = auth()
+    for title in ('First', 'Second', 'Third'):
+        create_place(client, owner, title)
+
+    response = client.get('/api/v1/places/?sort=rating&fields=title&limit=2')
+    assert response.status_code == 200
+    assert [set(p) for p in response.json['items']] == [{'title'}, {'title'}]
+    following = client.get('/api/v1/places/?sort=rating&fields=title&limit=2&cursor='
+                           + response.json['next_cursor'])
+    assert len(following.json['items']) == 1
+
+    with app.app_context():
+        places, _ = facade.search_places(facade.place_query(sort='-rating'), 10, fields=['title'])
+        loaded = set(places[0].__dict__) & {c.name for c in Place.__table__.columns}
+    assert loaded == {'id', 'title', 'rating_average'}
+
+
+def test_memory_and_sql_searches_page_alike(app, client, auth):
+    owner = auth()
+    alice, bob = auth('alice@example.com'), auth('bob@example.com')
+    ratings = {'Four': [4], 'Mixed': [5, 2], 'Tie': [3, 4], 'None': [], 'Low': [1]}
+    for title, marks in ratings.items():
+        place_id = create_place(client, owner, title)
+        for headers, rating in zip((alice, bob), marks):
+            review(client, headers, place_id, rating)
+
+    with app.app_context():
+        memory = InMemoryPlaceRepository()
+        for place in facade.place_repo.get_all():
+            memory.add(place)
+        for sort in ('-rating', 'rating', 'price'):
+            query = facade.place_query(sort=sort)
+
+            def pages(repo):
+                result, cursor = [], None
+                while True:
+                    places, cursor = repo.search(query, 2, cursor, fields=['title'])
+                    result.append(([p.title for p in places], cursor))
+                    if cursor is None:
+                        return result
+
+            assert pages(memory) == pages(facade.place_repo)
+            db.session.expunge_all()
+            sql_place = facade.place_repo.search(query, 1, fields=['title'])[0][0]
+            memory_place = memory.search(query, 1, fields=['title'])[0][0]
+            assert set(vars(memory_place)) == set(sql_place.__dict__) & {c.name for c in Place.__table__.columns}
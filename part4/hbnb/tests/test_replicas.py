@@ -0,0 +1,91 @@
+import shutil
+import pytest
+from app import create_app, db
+from app.models.user import User
+from app.services import facade
+from tests.conftest import TestConfig
+
+
+@pytest.fixture
+def app(tmp_path):
+    class AppConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'primary.db')
+        SQLALCHEMY_BINDS = {'replica_1': 'sqlite:///' + str(tmp_path / 'replica.db')}
+        READ_REPLICAS = ['replica_1']
+    app = create_app(AppConfig)
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def sync_replica(app, tmp_path):
+    """Copy the primary onto the replica: until the next call, the replica lags behind."""
+    def sync():
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+        shutil.copy(tmp_path / 'primary.db', tmp_path / 'replica.db')
+    return sync
+
+
+def test_reviews_of_a_place_and_their_etag_come_from_the_replica(client, auth, sync_replica):
+    owner = auth()
+    place_id = client.post('/api/v1/places/', headers=owner, json={
+        'title': 'Flat', 'price': 80, 'latitude': 48.85, 'longitude': 2.35, 'amenities': []}).json['id']
+    client.post('/api/v1/reviews/', headers=auth('alice@example.com'),
+                json={'text': 'Nice', 'rating': 4, 'place_id': place_id})
+    sync_replica()
+    path = f'/api/v1/reviews/places/{place_id}/reviews'
+    before = client.get(path)
+    assert len(before.json) == 1
+
+    # écrit sur le primary seulement : le replica renvoie encore l'ancienne liste et sa version
+    client.post('/api/v1/reviews/', headers=auth('bob@example.com'),
+                json={'text': 'Fine', 'rating': 3, 'place_id': place_id})
+    lagging = client.get(path)
+    assert len(lagging.json) == 1 and lagging.headers['ETag'] == before.headers['ETag']
+
+    sync_replica()
+    caught_up = client.get(path)
+    assert len(caught_up.json) == 2 and caught_up.headers['ETag'] != before.headers['ETag']
+
+
+def test_user_by_email_is_read_on_the_replica(app, auth, sync_replica):
+    auth()
+    sync_replica()
+    auth('late@example.com')
+    with app.test_request_context(method='GET'):
+        assert facade.get_user_by_email('user@example.com') is not None
+        assert facade.get_user_by_email('late@example.com') is None
+    with app.test_request_context(method='POST'):
+        assert facade.get_user_by_email('late@example.com') is not None
+
+
+def test_reads_served_by_a_replica_do_not_fill_the_cache(app, auth, sync_replica):
+    auth()
+    sync_replica()
+    with app.app_context():
+        user_id = User.query.filter_by(email='user@example.com').one().id
+    repo = facade.user_repo
+    key = repo._key(user_id)
+
+    with app.test_request_context(method='GET'):
+        assert facade.get_user(user_id) is not None
+        assert repo.backend.get(key) is None
+    with app.test_request_context(method='POST'):
+        facade.get_user(user_id)
+        assert repo.backend.get(key) is not None
+
+
+def test_amenity_by_name_is_read_on_the_replica(app, client, auth, sync_replica):
+    admin = auth('admin@example.com', admin=True)
+    client.post('/api/v1/amenities/', headers=admin, json={'name': 'Wifi'})
+    sync_replica()
+    client.post('/api/v1/amenities/', headers=admin, json={'name': 'Pool'})
+    with app.test_request_context(method='GET'):
+        assert facade.amenity_repo.get_by_name('WIFI') is not None
+        assert facade.amenity_repo.get_by_name('pool') is None
+    with app.test_request_context(method='POST'):
+        assert facade.amenity_repo.get_by_name('pool') is not None
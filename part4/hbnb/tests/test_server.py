@@ -0,0 +1,44 @@
+import pytest
+from app import create_app, server
+from tests.conftest import TestConfig
+
+
+def test_several_workers_need_the_sql_revocation_store(app):
+    app.config['JWT_DENYLIST_STORE'] = 'memory'
+    assert server.check_workers(app, 1) == []
+    with pytest.raises(ValueError, match="'sql'"):
+        server.check_workers(app, 4)
+
+    app.config['JWT_DENYLIST_STORE'] = 'sql'
+    app.config['RATE_LIMIT_ENABLED'] = True
+    warnings = server.check_workers(app, 4)
+    assert any('repository cache' in w and '300 s' in w for w in warnings), warnings
+    assert any('4 times' in w for w in warnings), warnings
+
+
+def test_serve_refuses_several_workers_with_the_memory_store(app):
+    app.config['JWT_DENYLIST_STORE'] = 'memory'
+    result = app.test_cli_runner().invoke(args=['serve', '--workers', '2', '--check'])
+    assert result.exit_code == 2
+    assert "JWT_DENYLIST_STORE = 'memory'" in result.output
+
+    result = app.test_cli_runner().invoke(args=['serve', '--workers', '1', '--check'])
+    assert result.exit_code == 0, result.output
+
+
+def test_warm_up_logs_the_failing_routes_and_goes_on(tmp_path, capsys):
+    class Unmigrated(TestConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'empty.db')
+        AUTO_MIGRATE = False
+    app = create_app(Unmigrated)
+
+    routes = server.warm_up(app)
+    assert 0 < routes < sum(1 for rule in app.url_map.iter_rules() if 'GET' in rule.methods and not rule.arguments)
+    assert 'Warm-up of /api/v1/places/ failed' in capsys.readouterr().err
+
+
+def test_gunicorn_settings_come_from_the_config(app):
+    app.config.update(SERVER_BIND='0.0.0.0:8000', SERVER_WORKERS=3, SERVER_THREADS=4)
+    options = server.gunicorn_options(app.config, workers=2)
+    assert options['bind'] == '0.0.0.0:8000' and options['workers'] == 2 and options['threads'] == 4
+    assert options['preload_app'] and options['post_fork'] is server.post_fork
@@ -0,0 +1,86 @@
+import time
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from app import db
+from app.identity import token_denylist
+from app.services import facade
+from app.models.revoked_token import RevokedToken
+
+
+def create_place(client, headers):
+    return client.post('/api/v1/places/', headers=headers, json={
+        'title': 'Flat', 'price': 80, 'latitude': 48.85, 'longitude': 2.35, 'amenities': []})
+
+
+def test_revoked_token_is_refused_with_401(client, auth):
+    headers = auth()
+    assert create_place(client, headers).status_code == 201
+    assert client.post('/api/v1/auth/logout', headers=headers).status_code == 200
+
+    response = create_place(client, headers)
+    assert response.status_code == 401
+    assert response.json['msg'] == 'Token has been revoked'
+
+
+def test_missing_and_expired_tokens_are_refused_with_401(app, client):
+    with app.app_context():
+        expired = create_access_token('someone', expires_delta=timedelta(seconds=-10))
+    assert create_place(client, {}).status_code == 401
+    assert create_place(client, {'Authorization': 'Bearer ' + expired}).status_code == 401
+
+
+def use_sql_store(app):
+    app.config['JWT_DENYLIST_STORE'] = 'sql'
+    token_denylist.init_app(app)
+
+
+def revoked_jtis():
+    return sorted(row.jti for row in RevokedToken.query)
+
+
+def test_purge_revoked_tokens_command(app):
+    use_sql_store(app)
+    now = datetime.utcnow()
+    with app.app_context():
+        db.session.add_all([RevokedToken(jti='live', expires_at=now + timedelta(hours=1)),
+                            RevokedToken(jti='expired', expires_at=now - timedelta(minutes=1))])
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['purge-revoked-tokens'])
+
+    assert '1 expired revoked tokens removed' in result.output
+    with app.app_context():
+        assert revoked_jtis() == ['live']
+
+
+def test_revocation_purges_expired_rows(app):
+    app.config['JWT_DENYLIST_SWEEP_INTERVAL'] = 0
+    use_sql_store(app)
+    with app.app_context():
+        db.session.add(RevokedToken(jti='expired', expires_at=datetime.utcnow() - timedelta(minutes=1)))
+        db.session.commit()
+        token_denylist.revoke('new', time.time() + 3600)
+        db.session.commit()
+        assert revoked_jtis() == ['new']
+
+
+def test_jwt_errors_are_401_without_propagating_exceptions(app, client, auth, monkeypatch):
+    # TESTING propage les exceptions : on se place dans la configuration de production
+    app.config['TESTING'] = False
+    headers = auth()
+    with app.app_context():
+        expired = create_access_token('someone', expires_delta=timedelta(seconds=-10))
+
+    assert create_place(client, {}).json['msg'] == 'Missing Authorization Header'
+    assert create_place(client, {'Authorization': 'Bearer ' + expired}).json['msg'] == 'Token has expired'
+    assert create_place(client, {'Authorization': 'Bearer not-a-token'}).status_code == 401
+    client.post('/api/v1/auth/logout', headers=headers)
+    response = create_place(client, headers)
+    assert (response.status_code, response.json['msg']) == (401, 'Token has been revoked')
+
+    # les autres erreurs restent des 500 de l'application, pas des exceptions
+    def broken():
+        raise RuntimeError('boom')
+    monkeypatch.setattr(facade, 'get_all_amenities', broken)
+    response = client.get('/api/v1/amenities/')
+    assert response.status_code == 500 and response.json['message'] == 'Internal Server Error'
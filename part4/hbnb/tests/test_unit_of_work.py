@@ -0,0 +1,49 @@
+import pytest
+from app.models.user import User
+from app.services import facade
+
+
+def new_user(email):
+    return facade.create_user({'first_name': 'Test', 'last_name': 'User', 'email': email, 'password': 'password'})
+
+
+def emails():
+    return sorted(email for (email,) in User.query.with_entities(User.email))
+
+
+def test_failed_nested_block_keeps_the_earlier_writes(app):
+    with app.app_context():
+        with facade.transaction():
+            new_user('kept@example.com')
+            with pytest.raises(ValueError):
+                with facade.transaction():
+                    new_user('undone@example.com')
+                    raise ValueError('boom')
+            new_user('after@example.com')
+        assert emails() == ['after@example.com', 'kept@example.com']
+
+
+def test_failed_outer_block_undoes_the_released_nested_block(app):
+    with app.app_context():
+        with pytest.raises(ValueError):
+            with facade.transaction():
+                with facade.transaction():
+                    new_user('nested@example.com')
+                raise ValueError('boom')
+        assert emails() == []
+
+
+def test_duplicate_review_only_undoes_itself(app):
+    with app.app_context():
+        with facade.transaction():
+            owner = new_user('owner@example.com')
+            reviewer = new_user('reviewer@example.com')
+            place = facade.create_place({'title': 'Flat', 'price': 80, 'latitude': 48.85, 'longitude': 2.35,
+                                         'owner_id': owner.id})
+            facade.create_review({'user_id': reviewer.id, 'place_id': place.id, 'text': 'Nice', 'rating': 4})
+            with pytest.raises(ValueError, match='already reviewed'):
+                facade.create_review({'user_id': reviewer.id, 'place_id': place.id, 'text': 'Again', 'rating': 1})
+            place_id = place.id
+
+        place, review_count, average_rating = facade.get_place_detail(place_id)
+        assert (review_count, average_rating) == (1, 4.0)